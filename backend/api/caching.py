@@ -0,0 +1,67 @@
+# caching.py
+
+import hashlib
+import time
+from typing import Optional
+from urllib.parse import urlencode
+from fastapi import Request, Response
+from api.shards import data_token
+
+# Clients may store responses but must revalidate them with the ETag on every use
+CACHE_CONTROL = "public, no-cache"
+
+
+def compute_etag(
+    request: Request, time_bucket: Optional[int] = None, variant: str = ""
+) -> str:
+    """
+    Build a weak ETag from the data watermark, the route and its query parameters.
+
+    Args:
+        request (Request): The incoming request.
+        time_bucket (Optional[int]): If set, the ETag also changes every `time_bucket`
+            seconds. Used for responses that depend on the current time.
+        variant (str): Representation of the resource, e.g. the negotiated format.
+
+    Returns:
+        str: A weak ETag value.
+    """
+    params = urlencode(sorted(request.query_params.multi_items()))
+    key = f"{data_token()}|{request.url.path}?{params}|{variant}"
+    if time_bucket:
+        key += f"|t{int(time.time() // time_bucket)}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified_response(
+    request: Request,
+    response: Response,
+    time_bucket: Optional[int] = None,
+    variant: str = "",
+) -> Optional[Response]:
+    """
+    Answer a conditional request before any database work is done.
+
+    Sets the ETag and Cache-Control headers on `response`. Returns a 304 response if
+    the client's cached copy is still current, otherwise None.
+    """
+    etag = compute_etag(request, time_bucket, variant)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,204 @@
+# catalog.py
+
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import duckdb
+from fastapi import HTTPException
+from db_lock import acquire_lock, release_lock
+from watermark import watermark_token
+from api.metrics import STAGE_LATENCY
+from api.shards import current_db_filename, current_lockfile
+
+logger = logging.getLogger(__name__)
+
+# The catalog is rebuilt when the watermark moves, and at least this often so tables
+# written without a new watermark (pipeline_runs...) do not go stale
+CATALOG_MAX_AGE_SECONDS = float(os.getenv("CATALOG_MAX_AGE_SECONDS", "300"))
+
+# Column whose range is reported per table
+BLOCK_COLUMN = "block_number"
+
+# Zone map statistics of a numeric segment, as reported by pragma_storage_info
+_STATS_RE = re.compile(r"\[Min: (-?\d+), Max: (-?\d+)\]")
+
+# Database file -> (watermark token, monotonic build time, catalog)
+_catalogs: Dict[str, Tuple[str, float, Dict]] = {}
+_catalog_lock = threading.Lock()
+
+
+def _table_storage(
+    conn: duckdb.DuckDBPyConnection, table_name: str, block_size: int
+) -> Dict:
+    """
+    Block number range and storage size of a table, from its segment metadata.
+
+    The range comes from the min/max statistics DuckDB keeps per segment, so no rows
+    are scanned; it is a bound, and may still include rows deleted since. The size
+    counts the blocks holding the table's segments, including shared partial blocks.
+    """
+    segments = conn.execute(
+        """
+        SELECT column_name, segment_type, stats, block_id, additional_block_ids
+        FROM pragma_storage_info(?)
+        """,
+        [table_name],
+    ).fetchall()
+
+    lows, highs, blocks = [], [], set()
+    for column_name, segment_type, stats, block_id, additional in segments:
+        if block_id is not None and block_id >= 0:
+            blocks.add(block_id)
+        blocks.update(additional or [])
+        if column_name == BLOCK_COLUMN and segment_type != "VALIDITY":
+            match = _STATS_RE.search(stats or "")
+            if match:
+                lows.append(int(match.group(1)))
+                highs.append(int(match.group(2)))
+
+    return {
+        "min_block_number": min(lows) if lows else None,
+        "max_block_number": max(highs) if highs else None,
+        "estimated_bytes": len(blocks) * block_size,
+    }
+
+
+def _build_catalog(conn: duckdb.DuckDBPyConnection, db_filename: str) -> Dict:
+    """Read the tables, their columns, row counts, block ranges and sizes from metadata."""
+    block_size = conn.execute("PRAGMA database_size").fetchone()[2]
+    columns: Dict[str, List[Dict[str, str]]] = {}
+    for table_name, column_name, data_type in conn.execute("""
+        SELECT table_name, column_name, data_type
+        FROM duckdb_columns()
+        WHERE schema_name = 'main'
+        ORDER BY table_name, column_index
+        """).fetchall():
+        columns.setdefault(table_name, []).append(
+            {"column_name": column_name, "data_type": data_type}
+        )
+
+    tables = {}
+    for table_name, estimated_rows in conn.execute("""
+        SELECT table_name, estimated_size
+        FROM duckdb_tables()
+        WHERE schema_name = 'main'
+        ORDER BY table_name
+        """).fetchall():
+        tables[table_name] = {
+            "table_name": table_name,
+            "estimated_rows": estimated_rows,
+            "column_count": len(columns.get(table_name, [])),
+            **_table_storage(conn, table_name, block_size),
+            "columns": columns.get(table_name, []),
+        }
+
+    wal_filename = f"{db_filename}.wal"
+    return {
+        "database_bytes": os.path.getsize(db_filename),
+        "wal_bytes": (
+            os.path.getsize(wal_filename) if os.path.exists(wal_filename) else 0
+        ),
+        "tables": tables,
+    }
+
+
+def get_catalog() -> Dict:
+    """
+    Return the catalog of the current network's database: its tables, their schemas,
+    estimated row counts, block number ranges and storage sizes.
+
+    Everything is read from DuckDB's metadata (duckdb_tables, duckdb_columns,
+    pragma_storage_info) rather than by scanning tables, and the result is cached
+    until the watermark moves or CATALOG_MAX_AGE_SECONDS pass.
+
+    Raises:
+        HTTPException: If the database cannot be read, returns a 500 status code.
+    """
+    db_filename = current_db_filename()
+    token = watermark_token(db_filename)
+    cached = _catalogs.get(db_filename)
+    if (
+        cached is not None
+        and cached[0] == token
+        and time.monotonic() - cached[1] < CATALOG_MAX_AGE_SECONDS
+    ):
+        return cached[2]
+
+    with _catalog_lock:
+        cached = _catalogs.get(db_filename)
+        if (
+            cached is not None
+            and cached[0] == token
+            and time.monotonic() - cached[1] < CATALOG_MAX_AGE_SECONDS
+        ):
+            return cached[2]
+
+        lockfile = acquire_lock(current_lockfile())
+        try:
+            with STAGE_LATENCY.labels("catalog").time():
+                with duckdb.connect(db_filename, read_only=True) as conn:
+                    catalog = _build_catalog(conn, db_filename)
+        except Exception as e:
+            logger.error(f"Error reading the catalog of {db_filename}: {e}")
+            raise HTTPException(status_code=500, detail="Internal Server Error")
+        finally:
+            release_lock(lockfile)
+
+        _catalogs[db_filename] = (token, time.monotonic(), catalog)
+        return catalog
+
+
+def _get_table(table_name: str) -> Dict:
+    table = get_catalog()["tables"].get(table_name)
+    if table is None:
+        raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found.")
+    return table
+
+
+def get_table_names() -> List[str]:
+    """Names of the tables of the current network's database."""
+    return list(get_catalog()["tables"])
+
+
+def get_table_schema(table_name: str) -> List[Dict[str, str]]:
+    """
+    Retrieve the schema of the specified table.
+
+    Args:
+        table_name (str): Name of the table whose schema is to be retrieved.
+
+    Returns:
+        List[Dict[str, str]]: A list of dictionaries containing column names and their data types.
+
+    Raises:
+        HTTPException: If the table does not exist, returns a 404 status code.
+    """
+    return _get_table(table_name)["columns"]
+
+
+def get_table_stats(table_name: Optional[str] = None) -> Dict:
+    """
+    Retrieve the statistics of one table, or of every table and the database file.
+
+    Args:
+        table_name (Optional[str]): Name of the table, or None for all tables.
+
+    Returns:
+        Dict: The table's estimated row count, column count, block number range and
+            estimated size; or the database and WAL file sizes and every table's
+            statistics under "tables".
+
+    Raises:
+        HTTPException: If the table does not exist, returns a 404 status code.
+    """
+    if table_name is not None:
+        return _get_table(table_name)
+    catalog = get_catalog()
+    return {
+        "database_bytes": catalog["database_bytes"],
+        "wal_bytes": catalog["wal_bytes"],
+        "tables": list(catalog["tables"].values()),
+    }
@@ -1,179 +1,251 @@
 # database.py
 
-import os
+import math
+import tempfile
 import duckdb
 import polars as pl
 import logging
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 from db_lock import acquire_lock, release_lock  # Import the locking functions
+from archive import archive_files, archived_max_block
 from fastapi import HTTPException  # Only import HTTPException for error handling
-from api.utils import byte_to_string
+from commitments import (
+    add_builder_graffiti,
+    commitments_query,
+    derive_commitment_columns,
+    join_columns,
+)
+from sketches import PROVIDER_METRICS, estimate_quantiles
+from snapshot import load_snapshot
+from watermark import read_watermark
+from api.metrics import STAGE_LATENCY
+from api.shards import current_db_filename, current_lockfile, fan_out
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Get the database filename from the environment variable
-DB_FILENAME = os.getenv("DATABASE_URL", "/app/db_data/mev_commit.duckdb")
+# Columns read by the /aggregations endpoint
+AGGREGATION_COLUMNS = (
+    "bidder",
+    "committer",
+    "date",
+    "bid_eth",
+    "decayed_bid_eth",
+    "isSlash",
+    "commitmentIndex",
+)
+
+# Tables whose block numbers tell that a commitment became complete, in the order of
+# the join columns block_number, block_number_encrypted, block_number_processed and
+# block_number_l1
+NEW_COMMITMENT_TABLES = (
+    "commit_stores",
+    "encrypted_stores",
+    "commits_processed",
+    "l1_transactions",
+)
 
 
 def get_db_connection():
-    """Establishes and returns a DuckDB connection."""
+    """Establishes and returns a DuckDB connection to the current network's database."""
     try:
-        return duckdb.connect(DB_FILENAME, read_only=True)
+        return duckdb.connect(current_db_filename(), read_only=True)
     except Exception as e:
         logger.error(f"Error connecting to the database: {e}")
         raise HTTPException(status_code=500, detail="Database connection failed")
 
 
-def load_commitments_df() -> pl.DataFrame:
+def enrich_commitments(
+    df: pl.DataFrame, columns: Optional[Sequence[str]] = None
+) -> pl.DataFrame:
     """
-    Loads data from encrypted_stores, commits_processed, and commit_stores and joins
-    them together to create a unified view of preconfirmation data.
+    Adds the derived bid, date, decay and builder graffiti columns to joined
+    commitments and selects the columns exposed by the API (or only `columns`),
+    timing each stage.
+    """
+    if columns is None or "builder_graffiti" in columns:
+        with STAGE_LATENCY.labels("udf").time():
+            df = add_builder_graffiti(df)
+
+    with STAGE_LATENCY.labels("enrich").time():
+        return derive_commitment_columns(df, columns)
+
+
+def commitment_filters(
+    hash: Optional[str] = None,
+    block_number_l1: Optional[int] = None,
+) -> Tuple[List[str], List, Dict[str, Tuple[Optional[int], Optional[int]]]]:
+    """
+    Build SQL predicates and parameters for the /preconfs filters, applied on top of
+    the commitments join, and the column ranges they restrict the archive to.
+    """
+    predicates, params, ranges = [], [], {}
+    if hash:
+        predicates.append("bidHash = ?")
+        params.append(hash)
+    if block_number_l1 is not None:
+        predicates.append("block_number_l1 = ?")
+        params.append(block_number_l1)
+        ranges["block_number_l1"] = (block_number_l1, block_number_l1)
+    return predicates, params, ranges
+
+
+def query_commitments(
+    predicates: Optional[List[str]] = None,
+    params: Optional[List] = None,
+    order_by: Optional[str] = None,
+    limit: Optional[int] = None,
+    ranges: Optional[Dict[str, Tuple[Optional[int], Optional[int]]]] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> pl.DataFrame:
+    """
+    Runs the commitments join in DuckDB with the given predicates pushed down and
+    returns the enriched result.
+
+    Commitments moved to the Parquet archive are included from the day partitions
+    overlapping `ranges` (see common/archive.py), so a query bounded to recent
+    blocks only reads the hot tier. If `columns` are given, only the join columns
+    they are built from are read, and only they are derived.
     """
     # Acquire lock before accessing DuckDB
-    lockfile = acquire_lock()
+    with STAGE_LATENCY.labels("lock_wait").time():
+        lockfile = acquire_lock(current_lockfile())
     try:
+        # Listed under the lock, which the tiering job holds while it moves rows
+        query = commitments_query(
+            predicates,
+            order_by,
+            limit,
+            archive_files=archive_files(current_db_filename(), ranges),
+            columns=join_columns(columns) if columns is not None else None,
+        )
         conn = get_db_connection()
+        try:
+            with STAGE_LATENCY.labels("query").time():
+                result = conn.execute(query, params or [])
+            with STAGE_LATENCY.labels("fetch").time():
+                df = result.pl()
+        finally:
+            conn.close()
+    finally:
+        # Release the lock after operation is done
+        release_lock(lockfile)
 
-        # Read the tables
-        encrypted_stores_df = conn.execute("SELECT * FROM encrypted_stores").pl()
-        commit_stores_df = conn.execute("SELECT * FROM commit_stores").pl()
-        commits_processed_df = conn.execute("SELECT * FROM commits_processed").pl()
-        l1_txs = conn.execute("SELECT * FROM l1_transactions").pl()
+    return enrich_commitments(df, columns)
 
-        conn.close()
 
-        # Perform joins
-        commitments_df = (
-            encrypted_stores_df.select(
-                "commitmentIndex", "committer", "commitmentDigest"
-            )
-            .join(
-                commit_stores_df,
-                on="commitmentIndex",
-                how="inner",
-                suffix="_opened_commit",
-            )
-            .with_columns((pl.lit("0x") + pl.col("txnHash")).alias("txnHash"))
-            .join(
-                commits_processed_df.select("commitmentIndex", "isSlash"),
-                on="commitmentIndex",
-                how="inner",
-            )
-            .join(
-                l1_txs,
-                left_on="txnHash",
-                right_on="hash",
-                suffix="_l1",
-            )
-            .rename(
-                {"blockNumber": "inc_block_number"}  # desired block number for preconf
-            )
-            .with_columns(
-                (pl.col("bid") / 10**18).alias("bid_eth"),
-                pl.from_epoch("timestamp", time_unit="ms").alias("date"),
-                pl.col("extra_data_l1")
-                .map_elements(byte_to_string, return_dtype=str)
-                .alias("builder_graffiti"),
-            )
-            # bid decay calculations
-            # the formula to calculate the bid decay = (decayEndTimeStamp - decayStartTimeStamp) / (dispatchTimestamp - decayEndTimeStamp). If it's a negative number, then bid would have decayed to 0
-            .with_columns(
-                # need to change type from uint to int to account for negative numbers
-                pl.col("decayStartTimeStamp").cast(pl.Int64),
-                pl.col("decayEndTimeStamp").cast(pl.Int64),
-                pl.col("dispatchTimestamp").cast(pl.Int64),
-            )
-            .with_columns(
-                (pl.col("decayEndTimeStamp") - pl.col("decayStartTimeStamp")).alias(
-                    "decay_range"
-                ),
-                (pl.col("decayEndTimeStamp") - pl.col("dispatchTimestamp")).alias(
-                    "dispatch_range"
-                ),
-            )
-            .with_columns(
-                (pl.col("dispatch_range") / pl.col("decay_range")).alias(
-                    "decay_multiplier"
-                )
-            )
-            .with_columns(
-                pl.when(pl.col("decay_multiplier") < 0)
-                .then(0)
-                .otherwise(pl.col("decay_multiplier"))
-            )
-            # calculate decayed bid. The decay multiplier is the amount that the bid decays by.
-            .with_columns(
-                (pl.col("decay_multiplier") * pl.col("bid_eth")).alias(
-                    "decayed_bid_eth"
-                )
-            )
-        )
+def get_snapshot_df() -> Optional[pl.DataFrame]:
+    """
+    Return the memory-mapped enriched commitments snapshot published by the pipeline
+    for the current watermark generation, or None if there is none yet.
 
-        # Select desired columns
-        commitments_df = commitments_df.select(
-            "commitmentIndex",
-            "committer",
-            "commitmentDigest",
-            "bidder",
-            "isSlash",
-            "commitmentSignature",
-            "bid",
-            "inc_block_number",
-            "bidHash",
-            "decayStartTimeStamp",
-            "decayEndTimeStamp",
-            "txnHash",
-            "revertingTxHashes",
-            "bidSignature",
-            "sharedSecretKey",
-            "block_number",  # mev-commit block number
-            # the l1 transaction data
-            "block_number_l1",
-            "extra_data_l1",
-            "to_l1",
-            "from_l1",
-            "nonce_l1",
-            "type_l1",
-            "block_hash_l1",
-            "timestamp_l1",
-            "base_fee_per_gas_l1",
-            "gas_used_block_l1",
-            "parent_beacon_block_root",
-            "max_priority_fee_per_gas_l1",
-            "max_fee_per_gas_l1",
-            "effective_gas_price_l1",
-            "gas_used_l1",
-            "date",
-            "bid_eth",
-            "decayed_bid_eth",
-            "dispatch_range",
-            "decay_multiplier",
-            "builder_graffiti",
-        )
+    Every worker maps the same file, so the dataset is held once in the page cache
+    instead of once per worker.
+    """
+    generation = read_watermark(current_db_filename()).get("generation")
+    if generation is None:
+        return None
+    return load_snapshot(current_db_filename(), generation)
+
+
+def load_commitments_df(columns: Optional[Sequence[str]] = None) -> pl.DataFrame:
+    """
+    Loads data from encrypted_stores, commits_processed, and commit_stores and joins
+    them together to create a unified view of preconfirmation data.
 
-        return commitments_df
+    Served from the pipeline's snapshot when it is current, otherwise joined in DuckDB.
+    If `columns` are given, only those columns are returned, and only they are read
+    and derived when joining in DuckDB.
+    """
+    try:
+        snapshot = get_snapshot_df()
+        if snapshot is not None:
+            # Selecting from the memory-mapped snapshot copies nothing
+            return snapshot if columns is None else snapshot.select(columns)
+        return query_commitments(columns=columns)
     except Exception as e:
         logger.error(f"Error loading commitments data: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+def get_new_commitments(
+    since: Optional[Dict[str, int]] = None,
+) -> Tuple[pl.DataFrame, Dict[str, int]]:
+    """
+    Retrieve the commitments that became complete after the `since` block watermarks.
+
+    A commitment shows up in the join once its encrypted store, opened store and
+    processed events and its L1 transaction are all present, so it is new if any of
+    those four rows has a block number above the previous watermark of its table.
+    The L1 transaction is often merged in a later cycle than the events. The
+    watermarks and the new rows are read on one connection so they describe the
+    same snapshot.
+
+    Args:
+        since (Optional[Dict[str, int]]): Block watermarks returned by a previous call.
+            If None, only the current watermarks are returned.
+
+    Returns:
+        Tuple[pl.DataFrame, Dict[str, int]]: The new enriched commitments (empty if
+            `since` is None) and the current block watermarks.
+    """
+    # Acquire lock before accessing DuckDB
+    lockfile = acquire_lock(current_lockfile())
+    try:
+        conn = get_db_connection()
+        try:
+            row = conn.execute("""
+                SELECT
+                    (SELECT MAX(block_number) FROM commit_stores),
+                    (SELECT MAX(block_number) FROM encrypted_stores),
+                    (SELECT MAX(block_number) FROM commits_processed),
+                    (SELECT MAX(block_number) FROM l1_transactions)
+                """).fetchone()
+            blocks = {
+                table: max(
+                    int(value or 0), archived_max_block(current_db_filename(), table)
+                )
+                for table, value in zip(NEW_COMMITMENT_TABLES, row)
+            }
+
+            df = None
+            if since is not None:
+                query = commitments_query(
+                    [
+                        "(block_number > ? OR block_number_encrypted > ?"
+                        " OR block_number_processed > ? OR block_number_l1 > ?)"
+                    ]
+                )
+                df = conn.execute(
+                    query, [since[table] for table in NEW_COMMITMENT_TABLES]
+                ).pl()
+        finally:
+            conn.close()
     finally:
         # Release the lock after operation is done
         release_lock(lockfile)
 
+    if df is None:
+        return pl.DataFrame(), blocks
+    return enrich_commitments(df), blocks
+
 
 def get_commitments(
     hash: Optional[str] = None,
     block_number_l1: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None,
 ) -> pl.DataFrame:
     """
-    Retrieve preconf commitments with optional filtering by bidder, block numbers, and hash.
+    Retrieve preconf commitments with optional filtering by hash and L1 block number.
+    The filters are applied to the current snapshot, or pushed down into the DuckDB
+    join when there is none.
 
     Args:
-        block_number_min (Optional[int]): Optional filter for minimum block number.
-        block_number_max (Optional[int]): Optional filter for maximum block number.
         hash (Optional[str]): Optional filter for hash.
         block_number_l1 (Optional[int]): Optional filter for exact Layer 1 block number.
+        columns (Optional[Sequence[str]]): Only return these columns (default: all).
 
     Returns:
         pl.DataFrame: Filtered DataFrame containing commitments.
@@ -182,65 +254,685 @@ def get_commitments(
         HTTPException: If there is an error retrieving data, returns a 500 status code.
     """
     try:
-        df = load_commitments_df()
+        snapshot = get_snapshot_df()
+        if snapshot is not None:
+            # Planned lazily so the filters only gather the selected columns
+            plan = snapshot.lazy()
+            if hash:
+                plan = plan.filter(pl.col("bidHash") == hash)
+            if block_number_l1 is not None:
+                plan = plan.filter(pl.col("block_number_l1") == block_number_l1)
+            if columns is not None:
+                plan = plan.select(columns)
+            return plan.collect()
 
-        # Apply hash filter
-        if hash:
-            df = df.filter(pl.col("bidHash") == hash)
+        predicates, params, ranges = commitment_filters(hash, block_number_l1)
+        return query_commitments(predicates, params, ranges=ranges, columns=columns)
+    except Exception as e:
+        logger.error(f"Error retrieving commitments: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
 
-        # Apply exact Layer 1 block number filter
-        if block_number_l1 is not None:
-            df = df.filter(pl.col("block_number_l1") == block_number_l1)
 
-        return df
+def _with_column(columns: Optional[Sequence[str]], column: str) -> Optional[List[str]]:
+    """`columns` plus `column` if it is missing, or None for all columns."""
+    return None if columns is None else list(dict.fromkeys([*columns, column]))
+
+
+def get_commitments_page(
+    hash: Optional[str] = None,
+    block_number_l1: Optional[int] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> Tuple[pl.DataFrame, int]:
+    """
+    Retrieve one page of commitments, newest mev-commit block first, and the total
+    number of matches.
+
+    Only the requested columns and the sort key are read; the sort and slice are
+    planned lazily so only the rows of the page are gathered.
+
+    Args:
+        hash (Optional[str]): Optional filter for hash.
+        block_number_l1 (Optional[int]): Optional filter for exact Layer 1 block number.
+        offset (int): Number of rows to skip.
+        limit (Optional[int]): Maximum number of rows to return (default: all).
+        columns (Optional[Sequence[str]]): Only return these columns (default: all).
+
+    Returns:
+        Tuple[pl.DataFrame, int]: The page and the total number of matches.
+
+    Raises:
+        HTTPException: If there is an error retrieving data, returns a 500 status code.
+    """
+    df = get_commitments(
+        hash=hash,
+        block_number_l1=block_number_l1,
+        columns=_with_column(columns, "inc_block_number"),
+    )
+    plan = df.lazy().sort("inc_block_number", descending=True).slice(offset, limit)
+    if columns is not None:
+        plan = plan.select(columns)
+    return plan.collect(), df.height
+
+
+def _newest_commitments(
+    hash: Optional[str],
+    block_number_l1: Optional[int],
+    n: Optional[int],
+    columns: Optional[Sequence[str]],
+) -> Tuple[pl.DataFrame, int]:
+    """The `n` newest commitments of the current network and its total match count."""
+    df = get_commitments(
+        hash=hash,
+        block_number_l1=block_number_l1,
+        columns=_with_column(columns, "date"),
+    )
+    return df.sort("date", descending=True, maintain_order=True).head(n), df.height
+
+
+def get_commitments_all_networks(
+    hash: Optional[str] = None,
+    block_number_l1: Optional[int] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> Tuple[pl.DataFrame, int]:
+    """
+    Retrieve one page of commitments merged across every network.
+
+    Each shard is queried in parallel for its `offset + limit` newest matches, which
+    is all a page of the merged order can hold from it. The partial results are
+    merged newest first by commitment time, since block numbers of different
+    networks are not comparable.
+
+    Args:
+        hash (Optional[str]): Optional filter for hash.
+        block_number_l1 (Optional[int]): Optional filter for exact Layer 1 block number.
+        offset (int): Number of merged rows to skip.
+        limit (Optional[int]): Maximum number of rows to return (default: all).
+        columns (Optional[Sequence[str]]): Only return these columns and the
+            network (default: all).
+
+    Returns:
+        Tuple[pl.DataFrame, int]: The page, with a network column, and the total
+            number of matches across networks.
+
+    Raises:
+        HTTPException: If there is an error retrieving data, returns a 500 status code.
+    """
+    n = offset + limit if limit is not None else None
+    try:
+        shards = fan_out(_newest_commitments, hash, block_number_l1, n, columns)
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error retrieving commitments: {e}")
+        logger.error(f"Error retrieving commitments across networks: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+    merged = pl.concat(
+        [
+            df.with_columns(pl.lit(network).alias("network"))
+            for network, (df, _) in shards.items()
+        ],
+        how="diagonal_relaxed",
+    ).sort(["date", "network"], descending=[True, False], maintain_order=True)
+    total = sum(count for _, count in shards.values())
+    page = merged.slice(offset, limit)
+    if columns is not None:
+        page = page.select(*columns, "network")
+    return page, total
 
-def get_table_schema(table_name: str) -> List[Dict[str, str]]:
+
+def iter_commitment_chunks(
+    hash: Optional[str] = None,
+    block_number_l1: Optional[int] = None,
+    cursor: Optional[Tuple[int, str]] = None,
+    chunk_size: int = 50_000,
+) -> Iterator[pl.DataFrame]:
     """
-    Retrieve the schema of the specified table.
+    Yield enriched commitments in chunks of at most `chunk_size` rows, ordered by
+    mev-commit block number and commitment index.
+
+    The export is one ordered query, read in Arrow batches of `chunk_size` rows and
+    spooled to a zstd compressed temporary file under a single lock acquisition.
+    The lock is released before the first chunk is sent, so a slow client never
+    holds up the pipeline or other requests, and memory stays bounded by the chunk
+    size.
 
     Args:
-        table_name (str): Name of the table whose schema is to be retrieved.
+        hash (Optional[str]): Optional filter for hash.
+        block_number_l1 (Optional[int]): Optional filter for exact Layer 1 block number.
+        cursor (Optional[Tuple[int, str]]): Resume after this
+            (block_number, commitmentIndex) pair.
+        chunk_size (int): Maximum number of rows per chunk.
+
+    Yields:
+        pl.DataFrame: The next chunk of commitments.
+    """
+    # Imported here to keep pyarrow out of the startup path
+    import pyarrow as pa
+
+    predicates, params, ranges = commitment_filters(hash, block_number_l1)
+    if cursor is not None:
+        # The first predicate lets DuckDB skip row groups before the cursor
+        predicates.append(
+            "block_number >= ? AND (block_number > ? OR commitmentIndex > ?)"
+        )
+        params.extend([cursor[0], cursor[0], cursor[1]])
+        # ...and the archive partitions before it
+        ranges["block_number"] = (cursor[0], None)
+
+    with tempfile.TemporaryFile() as spool:
+        with STAGE_LATENCY.labels("lock_wait").time():
+            lockfile = acquire_lock(current_lockfile())
+        try:
+            query = commitments_query(
+                predicates,
+                order_by="block_number, commitmentIndex",
+                archive_files=archive_files(current_db_filename(), ranges),
+            )
+            conn = get_db_connection()
+            try:
+                with STAGE_LATENCY.labels("query").time():
+                    reader = conn.execute(query, params).fetch_record_batch(chunk_size)
+                    with pa.ipc.new_stream(
+                        spool,
+                        reader.schema,
+                        options=pa.ipc.IpcWriteOptions(compression="zstd"),
+                    ) as writer:
+                        for batch in reader:
+                            writer.write_batch(batch)
+            finally:
+                conn.close()
+        finally:
+            # Release the lock after operation is done
+            release_lock(lockfile)
+
+        spool.seek(0)
+        for batch in pa.ipc.open_stream(spool):
+            if batch.num_rows:
+                yield enrich_commitments(pl.from_arrow(batch))
+
+
+def get_pipeline_run_summary(hours: int, bucket_minutes: int) -> Dict:
+    """
+    Summarize ingestion cycle telemetry from the pipeline_runs table.
+
+    Cycles are grouped into time buckets with their durations, stage timings and
+    throughput. Correlations of the cycle duration with the stored history and with
+    the rows fetched per cycle show whether cycles slow down as the history grows or
+    with bursty traffic.
+
+    Args:
+        hours (int): Summarize cycles started in the last `hours` hours.
+        bucket_minutes (int): Width of each time bucket in minutes.
 
     Returns:
-        List[Dict[str, str]]: A list of dictionaries containing column names and their data types.
+        Dict: The window totals, the trend statistics and the per-bucket rows.
+
+    Raises:
+        HTTPException: If there is an error reading the telemetry, returns a 500 status code.
     """
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=hours)
+    summary = {
+        "hours": hours,
+        "bucket_minutes": bucket_minutes,
+        "runs": 0,
+        "failed_runs": 0,
+        "duration_vs_history_corr": None,
+        "duration_vs_rows_fetched_corr": None,
+        "seconds_per_million_history_rows": None,
+        "buckets": [],
+    }
     try:
         # Acquire lock before accessing DuckDB
-        lockfile = acquire_lock()
-        conn = get_db_connection()
+        lockfile = acquire_lock(current_lockfile())
+        try:
+            conn = get_db_connection()
+            tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+            if "pipeline_runs" not in tables:
+                conn.close()
+                return summary
 
-        # Use DuckDB's information_schema to get column details
-        query = f"""
-        SELECT column_name, data_type
-        FROM information_schema.columns
-        WHERE table_name = '{table_name}'
-        ORDER BY ordinal_position
-        """
-
-        result = conn.execute(query).fetchall()
-        conn.close()
-
-        if not result:
-            logger.error(f"Table '{table_name}' does not exist.")
-            raise HTTPException(
-                status_code=404, detail=f"Table '{table_name}' not found."
-            )
+            totals = conn.execute(
+                """
+                SELECT
+                    COUNT(*),
+                    COUNT(*) FILTER (WHERE status <> 'ok'),
+                    corr(duration_seconds, history_rows),
+                    corr(duration_seconds, rows_fetched),
+                    regr_slope(duration_seconds, history_rows) * 1000000
+                FROM pipeline_runs
+                WHERE started_at >= ?
+                """,
+                [since],
+            ).fetchone()
+            buckets = conn.execute(
+                """
+                SELECT
+                    time_bucket(to_minutes(?), started_at) AS bucket_start,
+                    COUNT(*) AS runs,
+                    COUNT(*) FILTER (WHERE status <> 'ok') AS failed_runs,
+                    AVG(duration_seconds) AS avg_duration_seconds,
+                    quantile_cont(duration_seconds, 0.95) AS p95_duration_seconds,
+                    MAX(duration_seconds) AS max_duration_seconds,
+                    AVG(watermark_lookup_seconds) AS avg_watermark_lookup_seconds,
+                    AVG(fetch_seconds) AS avg_fetch_seconds,
+                    AVG(l1_enrichment_seconds) AS avg_l1_enrichment_seconds,
+                    AVG(lock_wait_seconds) AS avg_lock_wait_seconds,
+                    AVG(write_seconds) AS avg_write_seconds,
+                    SUM(rows_fetched) AS rows_fetched,
+                    SUM(rows_written) AS rows_written,
+                    SUM(bytes_written) AS bytes_written,
+                    SUM(rows_written) / NULLIF(SUM(duration_seconds), 0) AS rows_per_second,
+                    MAX(history_rows) AS history_rows,
+                    MAX(db_size_bytes) AS db_size_bytes
+                FROM pipeline_runs
+                WHERE started_at >= ?
+                GROUP BY bucket_start
+                ORDER BY bucket_start
+                """,
+                [bucket_minutes, since],
+            ).pl()
+            conn.close()
+        finally:
+            # Release the lock after operation is done
+            release_lock(lockfile)
+    except Exception as e:
+        logger.error(f"Error summarizing pipeline runs: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    summary["runs"] = totals[0]
+    summary["failed_runs"] = totals[1]
+    summary["duration_vs_history_corr"] = _finite_or_none(totals[2])
+    summary["duration_vs_rows_fetched_corr"] = _finite_or_none(totals[3])
+    summary["seconds_per_million_history_rows"] = _finite_or_none(totals[4])
+    summary["buckets"] = buckets.to_dicts()
+    return summary
 
-        # Format the schema as a list of dictionaries
-        schema = [{"column_name": row[0], "data_type": row[1]} for row in result]
-        return schema
 
-    except HTTPException as he:
-        raise he  # Re-raise HTTP exceptions
+def get_aggregation_sketches(
+    bidder: Optional[Union[List[str], str]] = None,
+    provider: Optional[Union[List[str], str]] = None,
+    since: Optional[datetime] = None,
+    by_day: bool = True,
+) -> Optional[pl.DataFrame]:
+    """
+    Merge the per-day sketches the pipeline keeps in aggregation_sketch_bins.
 
+    Only sketch rows are read: the bins of every day, bidder and committer matching
+    the filters are summed and the quantiles estimated from the merged bins, within
+    1% of the exact values. Distinct bidders and committers are counted exactly from
+    the keys of the sketch rows.
+
+    Args:
+        bidder (Optional[Union[List[str], str]]): Only merge these bidders.
+        provider (Optional[Union[List[str], str]]): Only merge these committers.
+        since (Optional[datetime]): Only merge days from this one on.
+        by_day (bool): Merge each day separately instead of the whole range.
+
+    Returns:
+        Optional[pl.DataFrame]: preconf_count, distinct_bidders, distinct_committers
+            and the quantile columns (e.g. bid_eth_p99), per day if `by_day`, or None
+            if the pipeline has not built the sketches yet.
+
+    Raises:
+        HTTPException: If there is an error reading the sketches, returns a 500 status code.
+    """
+    predicates, params = [], []
+    for column, values in (("bidder", bidder), ("committer", provider)):
+        if values:
+            values = [values] if isinstance(values, str) else list(values)
+            predicates.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params += values
+    if since is not None:
+        predicates.append("day >= ?")
+        params.append(since)
+    where = " AND ".join(predicates) or "TRUE"
+    by = ["day"] if by_day else []
+    group_by = "GROUP BY day" if by_day else ""
+    day_column = "day, " if by_day else ""
+
+    try:
+        # Acquire lock before accessing DuckDB
+        lockfile = acquire_lock(current_lockfile())
+        try:
+            conn = get_db_connection()
+            tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+            if "aggregation_sketch_bins" not in tables:
+                conn.close()
+                return None
+
+            bins = conn.execute(
+                f"""
+                SELECT {day_column}metric, bin, SUM(count)::BIGINT AS count
+                FROM aggregation_sketch_bins
+                WHERE {where}
+                GROUP BY ALL
+                """,
+                params,
+            ).pl()
+            counts = conn.execute(
+                f"""
+                SELECT
+                    {day_column}
+                    SUM(count) FILTER (WHERE metric = 'bid_eth')::BIGINT AS preconf_count,
+                    COUNT(DISTINCT bidder) AS distinct_bidders,
+                    COUNT(DISTINCT committer) AS distinct_committers
+                FROM aggregation_sketch_bins
+                WHERE {where}
+                {group_by}
+                """,
+                params,
+            ).pl()
+            conn.close()
+        finally:
+            # Release the lock after operation is done
+            release_lock(lockfile)
     except Exception as e:
-        logger.error(f"Error retrieving schema for table '{table_name}': {e}")
+        logger.error(f"Error reading aggregation sketches: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    finally:
-        # Release the lock after operation is done
-        release_lock(lockfile)
+    quantiles = estimate_quantiles(bins, by)
+    if by_day:
+        return counts.join(quantiles, on="day", how="left").sort("day")
+    if quantiles.is_empty():
+        quantiles = quantiles.clear(1)
+    return pl.concat([counts, quantiles], how="horizontal")
+
+
+def get_provider_performance(
+    provider: Optional[Union[List[str], str]] = None,
+    since: Optional[datetime] = None,
+    by_day: bool = False,
+    limit: Optional[int] = None,
+) -> Optional[pl.DataFrame]:
+    """
+    Merge the per day and provider inclusion statistics the pipeline keeps in
+    provider_performance_days and provider_performance_bins.
+
+    Counts, rates and means are exact: the day totals are summed and divided.
+    Percentiles are estimated within 1% from the merged sketch bins.
+
+    Args:
+        provider (Optional[Union[List[str], str]]): Only merge these committers.
+        since (Optional[datetime]): Only merge days from this one on.
+        by_day (bool): Merge each day separately instead of the whole range.
+        limit (Optional[int]): Keep the providers with the most preconfs (ignored
+            with `by_day`).
+
+    Returns:
+        Optional[pl.DataFrame]: One row per provider (and day if `by_day`) with its
+            counts, rates, bid totals, mean latencies and block gaps, and percentile
+            columns such as dispatch_latency_s_p90, or None if the pipeline has not
+            built the tables yet.
+
+    Raises:
+        HTTPException: If there is an error reading the tables, returns a 500 status code.
+    """
+    predicates, params = [], []
+    if provider:
+        providers = [provider] if isinstance(provider, str) else list(provider)
+        predicates.append(f"committer IN ({', '.join('?' * len(providers))})")
+        params += providers
+    if since is not None:
+        predicates.append("day >= ?")
+        params.append(since)
+    where = " AND ".join(predicates) or "TRUE"
+    by = ["day", "committer"] if by_day else ["committer"]
+    order_by = "day, committer" if by_day else "preconf_count DESC, committer"
+    limit_clause = f"LIMIT {int(limit)}" if limit is not None and not by_day else ""
+
+    try:
+        # Acquire lock before accessing DuckDB
+        lockfile = acquire_lock(current_lockfile())
+        try:
+            conn = get_db_connection()
+            tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+            if not {"provider_performance_days", "provider_performance_bins"} <= tables:
+                conn.close()
+                return None
+
+            totals = conn.execute(
+                f"""
+                SELECT
+                    {", ".join(by)},
+                    SUM(preconf_count)::BIGINT AS preconf_count,
+                    SUM(slash_count)::BIGINT AS slash_count,
+                    SUM(slash_count) / SUM(preconf_count) AS slash_rate,
+                    SUM(on_target_count) / SUM(preconf_count) AS on_target_rate,
+                    SUM(total_bid_eth) AS total_bid_eth,
+                    SUM(total_decayed_bid_eth) AS total_decayed_bid_eth,
+                    SUM(total_decayed_bid_eth) / NULLIF(SUM(total_bid_eth), 0)
+                        AS decay_realized,
+                    SUM(dispatch_latency_sum) / SUM(preconf_count)
+                        AS mean_dispatch_latency_s,
+                    SUM(decay_start_latency_sum) / SUM(preconf_count)
+                        AS mean_decay_start_latency_s,
+                    SUM(block_gap_sum) / SUM(preconf_count) AS mean_block_gap
+                FROM provider_performance_days
+                WHERE {where}
+                GROUP BY ALL
+                ORDER BY {order_by}
+                {limit_clause}
+                """,
+                params,
+            ).pl()
+            conn.register("selected", totals.select("committer").unique().to_arrow())
+            bins = conn.execute(
+                f"""
+                SELECT {", ".join(by)}, metric, bin, SUM(count)::BIGINT AS count
+                FROM provider_performance_bins
+                WHERE {where} AND committer IN (SELECT committer FROM selected)
+                GROUP BY ALL
+                """,
+                params,
+            ).pl()
+            conn.close()
+        finally:
+            # Release the lock after operation is done
+            release_lock(lockfile)
+    except Exception as e:
+        logger.error(f"Error reading provider performance: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    quantiles = estimate_quantiles(bins, by, metrics=PROVIDER_METRICS)
+    return totals.join(
+        quantiles, on=by, how="left", maintain_order="left"
+    ).with_columns(pl.col(pl.Float64).fill_nan(None))
+
+
+# Leaderboard window -> (length, bucket resolution). The pipeline keeps minute buckets
+# for 24 hours and hour buckets for 30 days.
+LEADERBOARD_WINDOWS = {
+    "1h": (timedelta(hours=1), "minute"),
+    "24h": (timedelta(hours=24), "minute"),
+    "7d": (timedelta(days=7), "hour"),
+    "30d": (timedelta(days=30), "hour"),
+}
+
+# Columns a leaderboard can be ranked by
+LEADERBOARD_METRICS = ("preconf_count", "total_bid", "total_decayed_bid", "slash_rate")
+
+
+def get_leaderboard(role: str, window: str, metric: str, limit: int) -> Dict:
+    """
+    Rank bidders or providers over a sliding window from the leaderboard buckets.
+
+    The window starts at the beginning of the bucket `window` ago, so it can cover up
+    to one bucket more than its length.
+
+    Args:
+        role (str): "bidder" or "provider".
+        window (str): One of LEADERBOARD_WINDOWS.
+        metric (str): One of LEADERBOARD_METRICS to rank by.
+        limit (int): Number of entries to return.
+
+    Returns:
+        Dict: The window start and the ranked entries with all their totals.
+
+    Raises:
+        HTTPException: If there is an error reading the buckets, returns a 500 status code.
+    """
+    length, resolution = LEADERBOARD_WINDOWS[window]
+    window_start = datetime.now(timezone.utc).replace(tzinfo=None) - length
+    window_start = window_start.replace(second=0, microsecond=0)
+    if resolution == "hour":
+        window_start = window_start.replace(minute=0)
+
+    leaderboard = {
+        "role": role,
+        "window": window,
+        "metric": metric,
+        "window_start": window_start,
+        "entries": [],
+    }
+    try:
+        # Acquire lock before accessing DuckDB
+        lockfile = acquire_lock(current_lockfile())
+        try:
+            conn = get_db_connection()
+            tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+            if "leaderboard_buckets" not in tables:
+                conn.close()
+                return leaderboard
+
+            # metric is one of LEADERBOARD_METRICS, checked by the endpoint
+            entries = conn.execute(
+                f"""
+                SELECT
+                    address,
+                    SUM(preconf_count)::BIGINT AS preconf_count,
+                    SUM(total_bid_eth) AS total_bid,
+                    SUM(total_decayed_bid_eth) AS total_decayed_bid,
+                    SUM(slash_count)::BIGINT AS slash_count,
+                    SUM(slash_count) / SUM(preconf_count) AS slash_rate
+                FROM leaderboard_buckets
+                WHERE resolution = ? AND role = ? AND bucket_start >= ?
+                GROUP BY address
+                ORDER BY {metric} DESC NULLS LAST, preconf_count DESC, address
+                LIMIT ?
+                """,
+                [resolution, role, window_start, limit],
+            ).pl()
+            conn.close()
+        finally:
+            # Release the lock after operation is done
+            release_lock(lockfile)
+    except Exception as e:
+        logger.error(f"Error reading leaderboard: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    leaderboard["entries"] = entries.with_row_index("rank", offset=1).to_dicts()
+    return leaderboard
+
+
+def _finite_or_none(value: Optional[float]) -> Optional[float]:
+    # corr() is NaN when one side is constant, which JSON cannot represent
+    if value is None or math.isnan(value):
+        return None
+    return value
+
+
+def _read_block_summaries(query: str, params: List) -> Optional[pl.DataFrame]:
+    """Run a query on l1_block_summary, or return None if the table is not built yet."""
+    try:
+        # Acquire lock before accessing DuckDB
+        lockfile = acquire_lock(current_lockfile())
+        try:
+            with STAGE_LATENCY.labels("block_summary").time():
+                with duckdb.connect(current_db_filename(), read_only=True) as conn:
+                    tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+                    if "l1_block_summary" not in tables:
+                        return None
+                    return conn.execute(query, params).pl()
+        finally:
+            # Release the lock after operation is done
+            release_lock(lockfile)
+    except Exception as e:
+        logger.error(f"Error reading L1 block summaries: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+def get_block_summaries(
+    block_min: Optional[int],
+    block_max: Optional[int],
+    before: Optional[int],
+    limit: int,
+) -> Dict:
+    """
+    Page through the per-L1-block summaries the pipeline maintains, highest block first.
+
+    Pages are keyed by block number rather than offset, so each one is a range read
+    on the primary key however deep it is.
+
+    Args:
+        block_min (Optional[int]): Lowest L1 block number to include.
+        block_max (Optional[int]): Highest L1 block number to include.
+        before (Optional[int]): Only include blocks below this one, the `next_before`
+            of the previous page.
+        limit (int): Number of blocks per page.
+
+    Returns:
+        Dict: The summaries under "data", and under "next_before" the cursor of the
+            next page, or None on the last page.
+
+    Raises:
+        HTTPException: If there is an error reading the summaries, returns a 500 status code.
+    """
+    predicates, params = [], []
+    if block_min is not None:
+        predicates.append("block_number_l1 >= ?")
+        params.append(block_min)
+    if block_max is not None:
+        predicates.append("block_number_l1 <= ?")
+        params.append(block_max)
+    if before is not None:
+        predicates.append("block_number_l1 < ?")
+        params.append(before)
+    where = f"WHERE {' AND '.join(predicates)}" if predicates else ""
+
+    # One row more than the page tells whether there is a next one
+    summaries = _read_block_summaries(
+        f"""
+        SELECT * FROM l1_block_summary {where}
+        ORDER BY block_number_l1 DESC
+        LIMIT ?
+        """,
+        [*params, limit + 1],
+    )
+    if summaries is None:
+        return {"data": [], "next_before": None}
+    page = summaries.head(limit)
+    return {
+        "data": page.to_dicts(),
+        "next_before": (
+            page["block_number_l1"][-1] if summaries.height > limit else None
+        ),
+    }
+
+
+def get_block_summary(block_number: int) -> Dict:
+    """
+    Retrieve the summary of one L1 block.
+
+    Args:
+        block_number (int): L1 block number.
+
+    Returns:
+        Dict: The block's preconf, transaction, bid, slash, bidder and provider totals.
+
+    Raises:
+        HTTPException: If no preconfirmed transaction landed in the block, returns a
+            404 status code; if there is an error reading the summaries, returns a
+            500 status code.
+    """
+    summaries = _read_block_summaries(
+        "SELECT * FROM l1_block_summary WHERE block_number_l1 = ?", [block_number]
+    )
+    if summaries is None or summaries.is_empty():
+        raise HTTPException(
+            status_code=404, detail=f"No preconfs found in L1 block {block_number}."
+        )
+    return summaries.row(0, named=True)
@@ -0,0 +1,113 @@
+# export.py
+
+import io
+from typing import Iterator, Optional, Tuple
+import polars as pl
+from api.models import PreconfDataItem
+from api.serialization import PARQUET_MEDIA_TYPE, model_select_exprs
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": PARQUET_MEDIA_TYPE,
+}
+
+
+class _DrainableSink(io.RawIOBase):
+    """
+    Write-only file object whose contents can be drained as they are produced.
+
+    tell() keeps counting drained bytes so the Parquet footer offsets stay valid.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[Tuple[int, str]]:
+    """
+    Parse an export cursor of the form `<block_number>:<commitmentIndex>`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    if not cursor:
+        return None
+    block_number, sep, commitment_index = cursor.partition(":")
+    if not sep or not commitment_index:
+        raise ValueError("cursor must look like '<block_number>:<commitmentIndex>'")
+    return int(block_number), commitment_index
+
+
+def _csv_chunks(chunks: Iterator[pl.DataFrame]) -> Iterator[bytes]:
+    include_header = True
+    for chunk in chunks:
+        yield chunk.write_csv(include_header=include_header).encode()
+        include_header = False
+
+
+def _ndjson_chunks(chunks: Iterator[pl.DataFrame]) -> Iterator[bytes]:
+    for chunk in chunks:
+        exprs = model_select_exprs(PreconfDataItem, chunk.schema)
+        yield chunk.select(exprs).write_ndjson().encode()
+
+
+def _parquet_chunks(chunks: Iterator[pl.DataFrame]) -> Iterator[bytes]:
+    # Imported here to keep pyarrow out of the startup path
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Each chunk becomes one zstd compressed row group, sent as soon as it is written
+    sink = _DrainableSink()
+    writer = None
+    for chunk in chunks:
+        table = chunk.to_arrow()
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema, compression="zstd")
+        writer.write_table(table.cast(writer.schema))
+        yield sink.drain()
+
+    if writer is None:
+        # Still produce a valid, empty Parquet file
+        schema = pa.schema([])
+        writer = pq.ParquetWriter(sink, schema)
+    writer.close()
+    yield sink.drain()
+
+
+def stream_export(chunks: Iterator[pl.DataFrame], fmt: str) -> Iterator[bytes]:
+    """
+    Encode chunks of commitments as a stream of CSV, NDJSON or Parquet bytes.
+
+    Args:
+        chunks (Iterator[pl.DataFrame]): Chunks from `iter_commitment_chunks`.
+        fmt (str): One of "csv", "ndjson" or "parquet".
+
+    Yields:
+        bytes: The encoded output, one piece per chunk.
+    """
+    if fmt == "csv":
+        return _csv_chunks(chunks)
+    if fmt == "ndjson":
+        return _ndjson_chunks(chunks)
+    if fmt == "parquet":
+        return _parquet_chunks(chunks)
+    raise ValueError(f"Unsupported export format: {fmt}")
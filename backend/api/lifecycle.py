@@ -0,0 +1,134 @@
+# lifecycle.py
+
+import logging
+import os
+import time
+from typing import Dict, Optional
+import httpx
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from snapshot import read_snapshot_pointer, snapshot_dir, snapshot_files
+from api.database import get_snapshot_df
+from api.metrics import STARTUP_SECONDS
+from api.shards import SHARDS, use_network
+
+logger = logging.getLogger(__name__)
+
+# The request a freshly started worker answers before it reports ready, so the first
+# real visitor does not pay for the first join, serialization and compression.
+WARMUP_PATH = "/preconfs?page=1&limit=50"
+
+_imported_at = time.monotonic()
+
+
+def process_uptime() -> float:
+    """
+    Seconds since this process started, including interpreter start-up and imports.
+
+    Reads the start time from /proc on Linux and falls back to the time since this
+    module was imported elsewhere.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the command name; starttime is field 22 of the full line
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _imported_at
+
+
+class Readiness:
+    """Warm-up state of this worker, reported by /health/ready."""
+
+    def __init__(self):
+        self.ready = False
+        self.phases: Dict[str, float] = {}
+        self.error: Optional[str] = None
+
+    def report(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "pid": os.getpid(),
+            "phases_seconds": {
+                phase: round(seconds, 3) for phase, seconds in self.phases.items()
+            },
+            "warmup_error": self.error,
+        }
+
+    def record(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = seconds
+        STARTUP_SECONDS.labels(phase).observe(seconds)
+
+
+readiness = Readiness()
+
+
+def _prefetch_snapshot(db_filename: str) -> bool:
+    """Ask the kernel to read the current snapshot files into the page cache."""
+    pointer = read_snapshot_pointer(db_filename)
+    prefetched = False
+    for filename in snapshot_files(pointer).values():
+        path = os.path.join(snapshot_dir(db_filename), filename)
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+        prefetched = True
+    return prefetched
+
+
+async def warm_up(app: FastAPI) -> None:
+    """
+    Prepare this worker for traffic, then mark it ready.
+
+    Maps the current enriched snapshot of every network (prefetching its pages),
+    then serves WARMUP_PATH in-process so the first real request finds the query,
+    serialization and compression paths already warm. Time to ready and time to first byte of the
+    warm-up request are logged and recorded in backend_startup_seconds. A failed
+    warm-up is logged and the worker still becomes ready, since an empty or missing
+    database is a valid state.
+
+    Args:
+        app (FastAPI): The application to send the warm-up request to.
+    """
+    readiness.record("startup", process_uptime())
+    try:
+        start = time.perf_counter()
+        for network, db_filename in SHARDS.items():
+            await run_in_threadpool(_prefetch_snapshot, db_filename)
+            with use_network(network):
+                snapshot = await run_in_threadpool(get_snapshot_df)
+            if snapshot is None:
+                logger.info(f"No current {network} snapshot, queries will use DuckDB")
+        readiness.record("snapshot", time.perf_counter() - start)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://warmup", timeout=None
+        ) as client:
+            start = time.perf_counter()
+            async with client.stream("GET", WARMUP_PATH) as response:
+                readiness.record("first_request", time.perf_counter() - start)
+                await response.aread()
+            if response.status_code != 200:
+                readiness.error = f"GET {WARMUP_PATH} returned {response.status_code}"
+    except Exception as e:
+        readiness.error = f"{type(e).__name__}: {e}"
+
+    readiness.record("ready", process_uptime())
+    readiness.ready = True
+    phases = readiness.phases
+    logger.info(
+        f"Worker {os.getpid()} ready in {phases['ready']:.2f}s "
+        f"(startup {phases['startup']:.2f}s, snapshot {phases.get('snapshot', 0):.2f}s, "
+        f"first byte of {WARMUP_PATH} {phases.get('first_request', 0):.2f}s)"
+    )
+    if readiness.error:
+        logger.warning(f"Warm-up did not complete: {readiness.error}")
@@ -0,0 +1,162 @@
+# live.py
+
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+import polars as pl
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from watermark import watermark_token
+from api.database import get_new_commitments
+from api.models import PreconfDataItem
+from api.serialization import dataframe_to_json
+from api.shards import SHARDS, use_network
+
+logger = logging.getLogger(__name__)
+
+# How often the watermark is checked for a new ingest cycle, in seconds
+POLL_INTERVAL = 1.0
+
+# Events buffered per subscriber before it is considered too slow to keep up
+MAX_QUEUED_EVENTS = 100
+
+# Idle connections get a comment line this often so proxies don't close them
+KEEPALIVE_INTERVAL = 15.0
+
+# Sent instead of the dropped backlog when a subscriber falls behind. The client
+# should refetch /preconfs to resynchronize.
+LAGGED_EVENT = b"event: lagged\ndata: {}\n\n"
+
+Filters = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+class Subscriber:
+    """A connected stream client with its filters and a bounded event queue."""
+
+    def __init__(
+        self,
+        bidder: Optional[str] = None,
+        committer: Optional[str] = None,
+        hash: Optional[str] = None,
+    ):
+        self.filters: Filters = (bidder, committer, hash)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_QUEUED_EVENTS)
+
+    def offer(self, event: bytes) -> None:
+        """Queue an event without blocking the broadcaster."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: drop its backlog rather than buffering without bound
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(LAGGED_EVENT)
+
+
+def _apply_filters(df: pl.DataFrame, filters: Filters) -> pl.DataFrame:
+    bidder, committer, hash = filters
+    if bidder:
+        df = df.filter(pl.col("bidder") == bidder)
+    if committer:
+        df = df.filter(pl.col("committer") == committer)
+    if hash:
+        df = df.filter(pl.col("bidHash") == hash)
+    return df
+
+
+class PreconfBroadcaster:
+    """
+    Pushes newly enriched commitments of one network to stream subscribers.
+
+    Watches the data watermark and, once per ingest cycle, reads only the commitments
+    that became complete since the previous cycle. Each distinct filter is applied and
+    serialized once, and the resulting event is fanned out to every subscriber that
+    shares it.
+    """
+
+    def __init__(self, network: str):
+        self.network = network
+        self.subscribers: Set[Subscriber] = set()
+        self._token: Optional[str] = None
+        self._blocks: Optional[Dict[str, int]] = None
+        self._generation = 0
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        self.subscribers.add(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self.subscribers.discard(subscriber)
+
+    def publish(self, df: pl.DataFrame) -> None:
+        """Fan out a batch of new commitments to all matching subscribers."""
+        self._generation += 1
+        events: Dict[Filters, Optional[bytes]] = {}
+        for subscriber in list(self.subscribers):
+            if subscriber.filters not in events:
+                matched = _apply_filters(df, subscriber.filters)
+                events[subscriber.filters] = (
+                    b"id: %d\nevent: preconfs\ndata: %s\n\n"
+                    % (self._generation, dataframe_to_json(matched, PreconfDataItem))
+                    if not matched.is_empty()
+                    else None
+                )
+            event = events[subscriber.filters]
+            if event is not None:
+                subscriber.offer(event)
+
+    async def poll(self) -> None:
+        """Publish new commitments if the watermark moved since the last poll."""
+        token = watermark_token(SHARDS[self.network])
+        if token == self._token:
+            return
+
+        # Without subscribers only the block watermarks need to move forward
+        since = self._blocks if self.subscribers else None
+        with use_network(self.network):
+            df, blocks = await run_in_threadpool(get_new_commitments, since)
+        self._token, self._blocks = token, blocks
+        if not df.is_empty():
+            self.publish(df)
+
+    async def run(self) -> None:
+        """Poll the watermark until cancelled."""
+        while True:
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error publishing new {self.network} preconfs: {e}")
+            await asyncio.sleep(POLL_INTERVAL)
+
+
+# One broadcaster per network, each polling its own shard's watermark
+broadcasters = {network: PreconfBroadcaster(network) for network in SHARDS}
+
+
+async def run_broadcasters() -> None:
+    """Run the broadcasters of every network until cancelled."""
+    await asyncio.gather(*(broadcaster.run() for broadcaster in broadcasters.values()))
+
+
+async def event_stream(
+    request: Request, subscriber: Subscriber, network: str
+) -> AsyncIterator[bytes]:
+    """Yield Server-Sent Events for a subscriber until the client disconnects."""
+    broadcaster = broadcasters[network]
+    broadcaster.subscribe(subscriber)
+    try:
+        yield b"retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscriber.queue.get(), timeout=KEEPALIVE_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield b": keepalive\n\n"
+                continue
+            yield event
+    finally:
+        broadcaster.unsubscribe(subscriber)
@@ -0,0 +1,174 @@
+# lookup.py
+
+from typing import Dict, List
+import polars as pl
+from fastapi import HTTPException
+from api.database import load_commitments_df
+from api.metrics import STAGE_LATENCY
+from api.search import get_search_index
+from api.shards import fan_out
+
+# Upper bound on the hashes and block numbers of one lookup, all kinds together
+MAX_LOOKUP_KEYS = 50_000
+
+# Request field -> search index entity holding its keys
+LOOKUP_HASH_FIELDS = {"bid_hashes": "bidHash", "txn_hashes": "txnHash"}
+
+
+def _normalize_hash(value: str) -> str:
+    value = value.strip().lower()
+    return value if value.startswith("0x") else f"0x{value}"
+
+
+def _resolve_hashes(
+    index: pl.DataFrame, entity: str, hashes: List[str]
+) -> pl.DataFrame:
+    """
+    Find the commitments of many hashes of one entity in the search index.
+
+    The index keys are sorted, so all the hashes are located at once with one
+    vectorized binary search instead of a scan per hash.
+
+    Returns:
+        pl.DataFrame: One row per requested hash with its position in `hashes`
+            and the bidHash of each of its commitments (null if there are none).
+    """
+    if index.is_empty():
+        return pl.DataFrame(
+            {
+                "position": pl.int_range(0, len(hashes), eager=True),
+                "bidHash": pl.Series([None] * len(hashes), dtype=pl.String),
+            }
+        )
+    keys = pl.Series("key", [_normalize_hash(h) for h in hashes], dtype=pl.String)
+    lo = index["key"].search_sorted(keys, side="left")
+    hi = index["key"].search_sorted(keys, side="right")
+    # A key maps to several rows when it names several entities or commitments, and
+    # to a single null row when it is missing
+    spans = pl.DataFrame(
+        {"position": pl.int_range(0, len(hashes), eager=True), "lo": lo, "hi": hi}
+    ).with_columns(
+        pl.when(pl.col("hi") > pl.col("lo"))
+        .then(pl.int_ranges("lo", "hi"))
+        .otherwise(pl.lit([None], dtype=pl.List(pl.Int64)))
+        .alias("row")
+    )
+    rows = spans.explode("row")
+    matched = index.select("entity", "bidHash")[
+        rows["row"].fill_null(0).cast(pl.Int64)
+    ].with_columns(rows["position"], rows["row"].is_null().alias("_empty"))
+    return matched.select(
+        "position",
+        pl.when(~pl.col("_empty") & (pl.col("entity") == entity))
+        .then(pl.col("bidHash"))
+        .alias("bidHash"),
+    )
+
+
+def lookup_commitments(
+    bid_hashes: List[str], txn_hashes: List[str], block_numbers_l1: List[int]
+) -> Dict:
+    """
+    Resolve many bid hashes, transaction hashes and L1 block numbers in one pass.
+
+    Hashes are located in the sorted search index published with the snapshot, and
+    the commitments they point to and those of the requested L1 blocks are then
+    taken from the enriched commitments with a single semi-join.
+
+    Args:
+        bid_hashes (List[str]): Bid hashes, with or without 0x, in any case.
+        txn_hashes (List[str]): L1 transaction hashes, with or without 0x, in any case.
+        block_numbers_l1 (List[int]): L1 block numbers.
+
+    Returns:
+        Dict: The matching enriched commitments under "data" (newest first), and the
+            requested values that matched nothing under "misses", by field.
+
+    Raises:
+        HTTPException: If more than MAX_LOOKUP_KEYS values are requested, returns a
+            422 status code.
+    """
+    requested = {
+        "bid_hashes": bid_hashes,
+        "txn_hashes": txn_hashes,
+        "block_numbers_l1": block_numbers_l1,
+    }
+    if sum(len(values) for values in requested.values()) > MAX_LOOKUP_KEYS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"A lookup takes at most {MAX_LOOKUP_KEYS} hashes and block numbers",
+        )
+
+    commitments = load_commitments_df()
+    index = get_search_index()
+    misses: Dict[str, List] = {}
+
+    with STAGE_LATENCY.labels("lookup").time():
+        found_bid_hashes = []
+        for field, entity in LOOKUP_HASH_FIELDS.items():
+            values = requested[field]
+            if not values:
+                misses[field] = []
+                continue
+            resolved = _resolve_hashes(index, entity, values)
+            hits = resolved.filter(pl.col("bidHash").is_not_null())
+            found_bid_hashes.append(hits["bidHash"])
+            found_positions = set(hits["position"].to_list())
+            misses[field] = [
+                value for i, value in enumerate(values) if i not in found_positions
+            ]
+
+        keys = pl.concat(
+            [pl.Series("bidHash", [], dtype=pl.String), *found_bid_hashes]
+        ).unique()
+        blocks = pl.Series(
+            "block_number_l1",
+            block_numbers_l1,
+            dtype=commitments.schema["block_number_l1"],
+        ).unique()
+
+        # One semi-join of the commitments against every requested key
+        data = commitments.filter(
+            pl.col("bidHash").is_in(keys) | pl.col("block_number_l1").is_in(blocks)
+        ).sort("inc_block_number", descending=True, maintain_order=True)
+
+        found_blocks = set(
+            data.filter(pl.col("block_number_l1").is_in(blocks))["block_number_l1"]
+        )
+        misses["block_numbers_l1"] = [
+            block for block in block_numbers_l1 if block not in found_blocks
+        ]
+
+    return {"data": data, "misses": misses}
+
+
+def lookup_all_networks(
+    bid_hashes: List[str], txn_hashes: List[str], block_numbers_l1: List[int]
+) -> Dict:
+    """
+    Run `lookup_commitments` on every network in parallel and merge the results.
+
+    Returns:
+        Dict: The matches of every network under "data", with a network column, and
+            under "misses" the requested values no network matched.
+    """
+    results = fan_out(lookup_commitments, bid_hashes, txn_hashes, block_numbers_l1)
+    data = pl.concat(
+        [
+            result["data"].with_columns(pl.lit(network).alias("network"))
+            for network, result in results.items()
+        ],
+        how="diagonal_relaxed",
+    ).sort(["date", "network"], descending=[True, False], maintain_order=True)
+
+    misses = {}
+    for field in ("bid_hashes", "txn_hashes", "block_numbers_l1"):
+        missed_everywhere = set.intersection(
+            *(set(result["misses"][field]) for result in results.values())
+        )
+        misses[field] = [
+            value
+            for value in next(iter(results.values()))["misses"][field]
+            if value in missed_everywhere
+        ]
+    return {"data": data, "misses": misses}
@@ -1,18 +1,101 @@
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 import polars as pl
-from fastapi import FastAPI, HTTPException, Query
-from typing import List, Dict, Any, Optional, Union
+from fastapi import Depends, FastAPI, HTTPException, Path, Query, Request, Response
+from typing import List, Dict, Any, Literal, Optional, Union
 from fastapi.middleware.cors import CORSMiddleware
-from api.models import PreconfsResponse, AggregationResult, TableSchemaItem
+from fastapi.responses import JSONResponse, StreamingResponse
+from api.models import (
+    PreconfsResponse,
+    PreconfsCompactResponse,
+    PreconfCompactItem,
+    PreconfDataItem,
+    AggregationDistribution,
+    AggregationResult,
+    BlockSummary,
+    BlockSummaryPage,
+    DatabaseStats,
+    Leaderboard,
+    LookupRequest,
+    LookupResponse,
+    PipelineRunSummary,
+    ProviderPerformance,
+    ProviderPerformanceDay,
+    ProviderPerformanceHistory,
+    ProviderPerformanceReport,
+    QueryRequest,
+    QueryResponse,
+    ReplicaStatus,
+    SearchResponse,
+    SketchSummary,
+    TableSchemaItem,
+    TableStats,
+)
+from api.caching import not_modified_response
+from api.catalog import get_table_names, get_table_schema, get_table_stats
+from api.export import EXPORT_MEDIA_TYPES, parse_cursor, stream_export
+from api.lifecycle import readiness, warm_up
+from api.live import Subscriber, event_stream, run_broadcasters
+from api.lookup import lookup_all_networks, lookup_commitments
+from api.metrics import MetricsMiddleware, render_metrics
+from api.query import run_query
+from api.replica import REPLICA_SOURCE, replica_status, run_replica_applier
+from api.search import search_prefix
+from api.shards import SHARDS, current_network, is_fan_out, select_network
+from sketches import DAY_BUCKET, day_of
+from api.serialization import (
+    columnar_response,
+    dataframe_to_json,
+    encoded_response,
+    lookup_json,
+    negotiate_format,
+    query_json,
+    parse_fields,
+    preconfs_page_json,
+)
 
 from api.database import (
+    AGGREGATION_COLUMNS,
+    LEADERBOARD_METRICS,
+    LEADERBOARD_WINDOWS,
+    get_aggregation_sketches,
+    get_block_summaries,
+    get_block_summary,
     get_commitments,
-    get_db_connection,
+    get_commitments_all_networks,
+    get_commitments_page,
+    iter_commitment_chunks,
     load_commitments_df,
-    get_table_schema,
+    get_leaderboard,
+    get_pipeline_run_summary,
+    get_provider_performance,
 )
 
-app = FastAPI(title="DuckDB Table Row Counts API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Push new preconfs to /preconfs/stream subscribers after every ingest cycle
+    broadcaster_task = asyncio.create_task(run_broadcasters())
+    # Map the snapshot and serve a first request before /health/ready passes
+    warmup_task = asyncio.create_task(warm_up(app))
+    # On a read replica, apply the change log shipped from the primary
+    replica_task = (
+        asyncio.create_task(run_replica_applier()) if REPLICA_SOURCE else None
+    )
+    yield
+    if replica_task is not None:
+        replica_task.cancel()
+    warmup_task.cancel()
+    broadcaster_task.cancel()
+
+
+# Every route takes a `network` query parameter selecting the shard it reads
+app = FastAPI(
+    title="DuckDB Table Row Counts API",
+    lifespan=lifespan,
+    dependencies=[Depends(select_network)],
+)
 
 # Enable CORS for the frontend to access the API
 app.add_middleware(
@@ -23,6 +106,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record per-route latency and in-flight requests for /metrics
+app.add_middleware(MetricsMiddleware, fastapi_app=app)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Expose API and query stage metrics in the Prometheus text format."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/health/live", include_in_schema=False)
+def health_live():
+    """Liveness probe: the worker is up and serving requests."""
+    return {"alive": True}
+
+
+@app.get("/health/ready", include_in_schema=False)
+def health_ready():
+    """
+    Readiness probe: 200 once this worker has finished warming up, 503 before.
+
+    The body reports the time spent in each startup phase, including time to ready.
+    """
+    status_code = 200 if readiness.ready else 503
+    return JSONResponse(readiness.report(), status_code=status_code)
+
+
+@app.get("/replica/status", response_model=ReplicaStatus)
+def get_replica_status():
+    """
+    Replication state of this read replica: the last change log entry applied and
+    shipped, and how far behind the primary it is, for every network.
+
+    Returns:
+        ReplicaStatus: The state of each network.
+
+    Raises:
+        HTTPException: If this node is not a replica (REPLICA_SOURCE is unset),
+            returns a 404 status code.
+    """
+    if not REPLICA_SOURCE:
+        raise HTTPException(status_code=404, detail="This node is not a read replica")
+    return {"networks": [replica_status(network) for network in SHARDS]}
+
 
 @app.get("/tables", response_model=List[str])
 def list_tables():
@@ -35,17 +163,47 @@ def list_tables():
     Raises:
         HTTPException: If there is an error querying the database, returns a 500 status code.
     """
-    try:
-        with get_db_connection() as conn:
-            tables = conn.execute("SHOW TABLES").fetchall()
-            table_names = [table[0] for table in tables]
-        return table_names
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return get_table_names()
+
+
+@app.get("/tables/stats", response_model=DatabaseStats)
+def get_all_table_stats():
+    """
+    Retrieve the size of the database file and the statistics of every table.
+
+    Row counts, block number ranges and sizes are read from DuckDB's metadata, not by
+    scanning the tables, and cached until the next ingest cycle.
+
+    Returns:
+        DatabaseStats: The database and WAL file sizes and every table's statistics.
+
+    Raises:
+        HTTPException: If there is an error querying the database, returns a 500 status code.
+    """
+    return get_table_stats()
+
+
+@app.get("/tables/{table_name}/stats", response_model=TableStats)
+def get_table_stats_endpoint(table_name: str):
+    """
+    Retrieve the estimated row count, block number range and size of a DuckDB table.
+
+    Args:
+        table_name (str): Name of the table.
+
+    Returns:
+        TableStats: The statistics of the table.
+
+    Raises:
+        HTTPException: If the table does not exist, returns a 404 status code.
+    """
+    return get_table_stats(table_name)
 
 
-@app.get("/preconfs", response_model=PreconfsResponse)
+@app.get("/preconfs", response_model=Union[PreconfsResponse, PreconfsCompactResponse])
 def get_preconfs(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1, description="Page number for pagination (default: 1)."),
     limit: int = Query(
         50, ge=1, le=100, description="Limit of items per page (default: 50)."
@@ -54,10 +212,26 @@ def get_preconfs(
     block_number_l1: Optional[int] = Query(
         None, description="Filter by exact Layer 1 block number."
     ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated preconf fields to return, or `compact` for the "
+        "fields of the explorer's table view (default: all fields).",
+    ),
 ):
     """
     Get preconfs data with optional filters, paginated.
 
+    Responses carry an ETag derived from the data watermark and the query parameters,
+    so a matching `If-None-Match` is answered with 304 without touching the database.
+    The page is serialized to JSON directly from the columnar data in the
+    `PreconfsResponse` layout and compressed with zstd or gzip when the client accepts it.
+    Clients sending `Accept: application/vnd.apache.arrow.stream` or
+    `Accept: application/x-parquet` get the page as Arrow IPC or Parquet instead, with
+    the total row count in the `X-Total-Count` header.
+
+    With `fields`, only the requested columns are read, sorted, sliced and
+    serialized, so pages for list views skip the signatures and L1 details.
+
     Args:
         page (int): Page number for pagination (default: 1).
         limit (int): Number of rows per page (default: 50, maximum: 100).
@@ -66,35 +240,308 @@ def get_preconfs(
         block_number_max (Optional[int]): Optional filter for maximum block number.
         hash (Optional[str]): Optional filter for hash.
         block_number_l1 (Optional[int]): Optional filter for exact Layer 1 block number.
+        fields (Optional[str]): Optional comma separated fields to return, or `compact`.
 
     Returns:
         dict: Paginated results with 'page', 'limit', 'total' rows, and the filtered data.
 
     Raises:
-        HTTPException: If there is an error retrieving data, returns a 500 status code.
+        HTTPException: If a requested field is unknown, or only network is requested
+            from a single network, returns a 422 status code.
+            If there is an error retrieving data, returns a 500 status code.
     """
-    try:
-        commitments_df = get_commitments(
-            hash=hash,
-            block_number_l1=block_number_l1,
+    model = parse_fields(fields, PreconfDataItem, {"compact": PreconfCompactItem})
+    # network is not stored; it is added when the request fans out
+    columns = (
+        None
+        if model is PreconfDataItem
+        else [name for name in model.model_fields if name != "network"]
+    )
+    if columns == [] and not is_fan_out():
+        # A single network's page would have no columns to count its rows by
+        raise HTTPException(
+            status_code=422,
+            detail="fields must include a stored field; network is only set "
+            "when reading network=all",
         )
 
-        total_rows = commitments_df.height
+    fmt = negotiate_format(request.headers.get("accept"))
+    not_modified = not_modified_response(request, response, variant=fmt)
+    if not_modified is not None:
+        return not_modified
+
+    try:
         offset = (page - 1) * limit
+        if is_fan_out():
+            paginated_df, total_rows = get_commitments_all_networks(
+                hash=hash,
+                block_number_l1=block_number_l1,
+                offset=offset,
+                limit=limit,
+                columns=columns,
+            )
+        else:
+            paginated_df, total_rows = get_commitments_page(
+                hash=hash,
+                block_number_l1=block_number_l1,
+                offset=offset,
+                limit=limit,
+                columns=columns,
+            )
 
-        paginated_df = commitments_df.sort("inc_block_number", descending=True).slice(
-            offset, limit
-        )
+        if fmt != "json":
+            response.headers["X-Total-Count"] = str(total_rows)
+            return columnar_response(paginated_df, fmt, request, response)
+
+        # Serialize straight from the columns instead of validating each row
+        body = preconfs_page_json(page, limit, total_rows, paginated_df, model)
+        return encoded_response(body, "application/json", request, response)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
+
+
+@app.get("/preconfs/bulk", response_model=List[PreconfDataItem])
+def get_preconfs_bulk(
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0, description="Number of rows to skip (default: 0)."),
+    limit: Optional[int] = Query(
+        None, ge=1, description="Maximum number of rows to return (default: all)."
+    ),
+    hash: Optional[str] = Query(None, description="Filter by bid mev-commit hash."),
+    block_number_l1: Optional[int] = Query(
+        None, description="Filter by exact Layer 1 block number."
+    ),
+):
+    """
+    Get preconfs data in bulk, with the same filters and ordering as `/preconfs`.
 
-        result = paginated_df.to_dicts()
+    Meant for analysts loading data into polars or pandas. Send
+    `Accept: application/vnd.apache.arrow.stream` or `Accept: application/x-parquet`
+    to receive the columnar result without any per-row conversion; otherwise a JSON
+    array of preconfs is returned.
 
-        return {"page": page, "limit": limit, "total": total_rows, "data": result}
+    Args:
+        offset (int): Number of rows to skip (default: 0).
+        limit (Optional[int]): Maximum number of rows to return (default: all).
+        hash (Optional[str]): Optional filter for hash.
+        block_number_l1 (Optional[int]): Optional filter for exact Layer 1 block number.
+
+    Returns:
+        Response: The matching rows, with the total match count in `X-Total-Count`.
+
+    Raises:
+        HTTPException: If there is an error retrieving data, returns a 500 status code.
+    """
+    fmt = negotiate_format(request.headers.get("accept"))
+    not_modified = not_modified_response(request, response, variant=fmt)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        if is_fan_out():
+            result_df, total_rows = get_commitments_all_networks(
+                hash=hash, block_number_l1=block_number_l1, offset=offset, limit=limit
+            )
+            response.headers["X-Total-Count"] = str(total_rows)
+        else:
+            commitments_df = get_commitments(
+                hash=hash,
+                block_number_l1=block_number_l1,
+            )
+
+            response.headers["X-Total-Count"] = str(commitments_df.height)
+            result_df = commitments_df.sort("inc_block_number", descending=True).slice(
+                offset, limit
+            )
+
+        if fmt != "json":
+            return columnar_response(result_df, fmt, request, response)
+
+        body = dataframe_to_json(result_df, PreconfDataItem)
+        return encoded_response(body, "application/json", request, response)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
+
+
+@app.post("/preconfs/lookup", response_model=LookupResponse)
+def lookup_preconfs(request: Request, lookup: LookupRequest):
+    """
+    Look up many bid hashes, transaction hashes and L1 block numbers in one request.
+
+    Meant for reconciliation jobs that would otherwise send one `/preconfs?hash=`
+    request per value. All values are resolved together against the search index
+    and the enriched commitments, and the values that matched nothing are listed
+    in `misses` as they were sent.
+
+    Args:
+        lookup (LookupRequest): Up to 50,000 hashes and block numbers in total.
+
+    Returns:
+        LookupResponse: The matching preconfs and the misses.
+
+    Raises:
+        HTTPException: If too many values are sent, returns a 422 status code; if
+            there is an error retrieving data, returns a 500 status code.
+    """
+    try:
+        lookup_fn = lookup_all_networks if is_fan_out() else lookup_commitments
+        result = lookup_fn(
+            lookup.bid_hashes, lookup.txn_hashes, lookup.block_numbers_l1
+        )
+        body = lookup_json(result["data"], result["misses"], PreconfDataItem)
+        return encoded_response(body, "application/json", request)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
 
 
+@app.post("/query", response_model=QueryResponse)
+def query(request: Request, response: Response, body: QueryRequest):
+    """
+    Run a read-only SQL query on the current snapshot of the data.
+
+    Meant for exploratory analysis that would otherwise open the production database
+    and hold its lock. The query runs in a private in-memory DuckDB over the snapshot
+    the pipeline publishes for the current watermark (`commitments`, `search_index`),
+    with limits on memory, threads, time and rows, and waits for one of a few query
+    slots so it cannot starve other traffic. Results are cached until the watermark
+    moves. Send `Accept: application/vnd.apache.arrow.stream` or
+    `Accept: application/x-parquet` for a columnar result, with the result details in
+    `X-Query-*` headers.
+
+    Args:
+        body (QueryRequest): The SQL and optional lower row and time limits.
+
+    Returns:
+        QueryResponse: The columns and rows of the result.
+
+    Raises:
+        HTTPException: If the SQL is invalid, not a single SELECT, or the request reads
+            every network, returns a 422 status code; if it times out, 408; if it
+            runs out of memory, 413; if no snapshot exists yet or the query queue is
+            full, 503.
+    """
+    if is_fan_out():
+        raise HTTPException(
+            status_code=422, detail="Queries run against a single network"
+        )
+    fmt = negotiate_format(request.headers.get("accept"))
+    result = run_query(body.sql, body.max_rows, body.timeout_seconds)
+
+    if fmt != "json":
+        response.headers.update(
+            {
+                "X-Query-Truncated": str(result["truncated"]).lower(),
+                "X-Query-Cached": str(result["cached"]).lower(),
+                "X-Query-Generation": str(result["generation"]),
+            }
+        )
+        return columnar_response(result["data"], fmt, request, response)
+    return encoded_response(query_json(result), "application/json", request)
+
+
+@app.get("/preconfs/export")
+def export_preconfs(
+    format: Literal["csv", "ndjson", "parquet"] = Query(
+        "csv", description="Export format: csv, ndjson or parquet (default: csv)."
+    ),
+    hash: Optional[str] = Query(None, description="Filter by bid mev-commit hash."),
+    block_number_l1: Optional[int] = Query(
+        None, description="Filter by exact Layer 1 block number."
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="Resume after the row identified by '<block_number>:<commitmentIndex>'.",
+    ),
+    chunk_size: int = Query(
+        50_000, ge=1_000, le=500_000, description="Rows read from DuckDB per chunk."
+    ),
+):
+    """
+    Stream the full enriched commitments dataset as CSV, NDJSON or Parquet.
+
+    Rows are read from DuckDB in chunks ordered by mev-commit block number and
+    commitment index and written to a chunked response as they are produced, so
+    server memory stays bounded by `chunk_size` whatever the size of the result.
+    Parquet exports send one row group per chunk.
+
+    If the connection drops, pass the `block_number` and `commitmentIndex` of the last
+    complete row received as `cursor` to continue where the export stopped.
+
+    Args:
+        format (str): Export format: csv, ndjson or parquet.
+        hash (Optional[str]): Optional filter for hash.
+        block_number_l1 (Optional[int]): Optional filter for exact Layer 1 block number.
+        cursor (Optional[str]): Optional '<block_number>:<commitmentIndex>' to resume after.
+        chunk_size (int): Number of rows read from DuckDB per chunk.
+
+    Returns:
+        StreamingResponse: The exported rows.
+
+    Raises:
+        HTTPException: If the cursor is malformed, returns a 400 status code.
+    """
+    try:
+        start_after = parse_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    chunks = iter_commitment_chunks(
+        hash=hash,
+        block_number_l1=block_number_l1,
+        cursor=start_after,
+        chunk_size=chunk_size,
+    )
+    return StreamingResponse(
+        stream_export(chunks, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="preconfs.{format}"'},
+    )
+
+
+@app.get("/preconfs/stream")
+async def stream_preconfs(
+    request: Request,
+    bidder: Optional[str] = Query(
+        None, description="Only push preconfs by this bidder."
+    ),
+    committer: Optional[str] = Query(
+        None, description="Only push preconfs by this committer."
+    ),
+    hash: Optional[str] = Query(
+        None, description="Only push the preconf with this bid mev-commit hash."
+    ),
+):
+    """
+    Subscribe to newly enriched preconfs as Server-Sent Events.
+
+    After every ingest cycle the server computes the new commitments once and pushes
+    them to all subscribers as a `preconfs` event whose data is a JSON array of
+    preconfs. A subscriber that falls too far behind has its backlog dropped and
+    receives a `lagged` event, after which it should refetch `/preconfs`.
+
+    Args:
+        bidder (Optional[str]): Optional filter for bidder address.
+        committer (Optional[str]): Optional filter for committer address.
+        hash (Optional[str]): Optional filter for hash.
+
+    Returns:
+        StreamingResponse: A `text/event-stream` response.
+    """
+    subscriber = Subscriber(bidder=bidder, committer=committer, hash=hash)
+    return StreamingResponse(
+        event_stream(request, subscriber, current_network()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/preconfs/aggregations", response_model=List[AggregationResult])
 def aggregations(
+    request: Request,
+    response: Response,
     bidder: Optional[Union[List[str], str]] = Query(
         None, description="Optional filter by bidder(s)."
     ),
@@ -108,6 +555,11 @@ def aggregations(
     """
     Get group-by aggregations on preconfs data for bidders.
 
+    Supports conditional requests with `If-None-Match` like `/preconfs`. When `days`
+    is set the ETag also rolls over every minute, since the window moves with time.
+    Days are whole, so the totals and the quantiles of each row cover the same
+    commitments: the first day returned is the day `days` ago.
+
     Args:
         bidder (Optional[Union[List[str], str]]): Optional filter by one or more bidders.
         provider (Optional[Union[List[str], str]]): Optional filter by one or more providers.
@@ -119,8 +571,14 @@ def aggregations(
     Raises:
         HTTPException: If there is an error performing the aggregation, returns a 500 status code.
     """
+    not_modified = not_modified_response(
+        request, response, time_bucket=60 if days else None
+    )
+    if not_modified is not None:
+        return not_modified
+
     try:
-        df = load_commitments_df()
+        df = load_commitments_df(columns=AGGREGATION_COLUMNS)
 
         # Apply bidder filter if provided
         if bidder:
@@ -136,14 +594,14 @@ def aggregations(
             else:
                 df = df.filter(pl.col("committer").is_in(provider))
 
-        # Apply date filter if `days` is provided
-        if days:
-            start_date = datetime.now() - timedelta(days=days)
-            df = df.filter(pl.col("date") >= pl.lit(start_date))
+        # Apply date filter if `days` is provided, on whole days like the sketches
+        since = day_of(datetime.now() - timedelta(days=days)) if days else None
+        if since is not None:
+            df = df.filter(DAY_BUCKET >= pl.lit(since))
 
         # Group by date and aggregate
         agg_df = (
-            df.with_columns(pl.col("date").dt.round("1d"))
+            df.with_columns(DAY_BUCKET)
             .group_by("date")
             .agg(
                 (pl.col("bid_eth").sum().alias("total_bid_eth")),
@@ -154,6 +612,18 @@ def aggregations(
             .sort(by="date")
         )
 
+        # Add the quantiles and distinct counts merged from the per-day sketches
+        sketches = get_aggregation_sketches(bidder, provider, since=since)
+        if sketches is not None:
+            agg_df = agg_df.join(
+                sketches.drop("preconf_count").select(
+                    pl.col("day").cast(agg_df.schema["date"]).alias("date"),
+                    pl.exclude("day"),
+                ),
+                on="date",
+                how="left",
+            )
+
         # Convert to AggregationResult structure
         result = [
             AggregationResult(
@@ -165,6 +635,7 @@ def aggregations(
                 total_decayed_bid=row["total_decayed_bid_eth"],
                 slash_count=row["slash_count"],
                 group_by_value=row["date"].isoformat(),
+                **{field: row.get(field) for field in SketchSummary.model_fields},
             )
             for row in agg_df.to_dicts()
         ]
@@ -174,6 +645,345 @@ def aggregations(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/preconfs/aggregations/distribution", response_model=AggregationDistribution)
+def aggregation_distribution(
+    request: Request,
+    response: Response,
+    bidder: Optional[Union[List[str], str]] = Query(
+        None, description="Optional filter by bidder(s)."
+    ),
+    provider: Optional[Union[List[str], str]] = Query(
+        None, description="Optional filter by provider(s)."
+    ),
+    days: Optional[int] = Query(
+        None, description="Only merge the past number of days (e.g., 1, 7, 30)."
+    ),
+):
+    """
+    Get bid and decay quantiles and distinct counts over a whole date range.
+
+    Merges the per-day sketches of the matching bidders and providers instead of
+    reading the commitments, so the cost depends on the number of days and addresses
+    rather than the number of preconfs. Days are whole: the first one merged is the
+    day `days` ago.
+
+    Args:
+        bidder (Optional[Union[List[str], str]]): Optional filter by one or more bidders.
+        provider (Optional[Union[List[str], str]]): Optional filter by one or more providers.
+        days (Optional[int]): Optional number of past days to merge.
+
+    Returns:
+        AggregationDistribution: Quantiles within 1% and exact distinct counts.
+
+    Raises:
+        HTTPException: If the pipeline has not built the sketches yet, returns a 503
+            status code; if there is an error reading them, returns a 500 status code.
+    """
+    not_modified = not_modified_response(
+        request, response, time_bucket=60 if days else None
+    )
+    if not_modified is not None:
+        return not_modified
+
+    since = day_of(datetime.now() - timedelta(days=days)) if days else None
+    sketches = get_aggregation_sketches(bidder, provider, since=since, by_day=False)
+    if sketches is None:
+        raise HTTPException(
+            status_code=503, detail="Aggregation sketches are not available yet"
+        )
+    row = sketches.row(0, named=True)
+    return AggregationDistribution(
+        since=since, **{**row, "preconf_count": row["preconf_count"] or 0}
+    )
+
+
+@app.get("/leaderboards/{role}", response_model=Leaderboard)
+def leaderboard(
+    request: Request,
+    response: Response,
+    role: str = Path(
+        ..., pattern="^(bidders|providers)$", description="bidders or providers."
+    ),
+    window: str = Query(
+        "24h",
+        pattern=f"^({'|'.join(LEADERBOARD_WINDOWS)})$",
+        description="Sliding window: 1h, 24h, 7d or 30d.",
+    ),
+    metric: str = Query(
+        "preconf_count",
+        pattern=f"^({'|'.join(LEADERBOARD_METRICS)})$",
+        description="Rank by preconf_count, total_bid, total_decayed_bid or slash_rate.",
+    ),
+    limit: int = Query(10, ge=1, le=100, description="Number of entries."),
+):
+    """
+    Get the top bidders or providers over a sliding window.
+
+    Served from per-minute (1h, 24h) and per-hour (7d, 30d) buckets the pipeline keeps
+    up to date, so the cost does not grow with the history. The ETag rolls over every
+    minute, since the window moves with time.
+
+    Args:
+        role (str): "bidders" or "providers".
+        window (str): Length of the window.
+        metric (str): Total to rank by.
+        limit (int): Number of entries.
+
+    Returns:
+        Leaderboard: The ranked entries with their counts, bids and slash rates.
+
+    Raises:
+        HTTPException: If there is an error reading the buckets, returns a 500 status code.
+    """
+    not_modified = not_modified_response(request, response, time_bucket=60)
+    if not_modified is not None:
+        return not_modified
+
+    return get_leaderboard(role.removesuffix("s"), window, metric, limit)
+
+
+@app.get("/blocks", response_model=BlockSummaryPage)
+def blocks(
+    request: Request,
+    response: Response,
+    block_min: Optional[int] = Query(
+        None, ge=0, description="Lowest L1 block number to include."
+    ),
+    block_max: Optional[int] = Query(
+        None, ge=0, description="Highest L1 block number to include."
+    ),
+    before: Optional[int] = Query(
+        None,
+        ge=0,
+        description="Cursor: only blocks below this one, the `next_before` of the "
+        "previous page.",
+    ),
+    limit: int = Query(50, ge=1, le=500, description="Number of blocks per page."),
+):
+    """
+    List the L1 blocks holding preconfirmed transactions, highest first.
+
+    Each row is a summary the pipeline keeps up to date as commitments arrive (preconf
+    and transaction counts, bid totals, slashes, bidders, providers), so a page is a
+    range read rather than a grouping of the commitments. Page with `before`.
+
+    Args:
+        block_min (Optional[int]): Lowest L1 block number to include.
+        block_max (Optional[int]): Highest L1 block number to include.
+        before (Optional[int]): Cursor of the page to fetch.
+        limit (int): Number of blocks per page.
+
+    Returns:
+        BlockSummaryPage: The block summaries and the cursor of the next page.
+
+    Raises:
+        HTTPException: If there is an error reading the summaries, returns a 500 status code.
+    """
+    not_modified = not_modified_response(request, response)
+    if not_modified is not None:
+        return not_modified
+
+    return get_block_summaries(block_min, block_max, before, limit)
+
+
+@app.get("/blocks/{block_number}", response_model=BlockSummary)
+def block(
+    request: Request,
+    response: Response,
+    block_number: int = Path(..., ge=0, description="L1 block number."),
+):
+    """
+    Get the summary of one L1 block.
+
+    Args:
+        block_number (int): L1 block number.
+
+    Returns:
+        BlockSummary: The block's preconf, transaction, bid, slash, bidder and
+            provider totals.
+
+    Raises:
+        HTTPException: If no preconfirmed transaction landed in the block, returns a
+            404 status code; if there is an error reading the summaries, returns a
+            500 status code.
+    """
+    not_modified = not_modified_response(request, response)
+    if not_modified is not None:
+        return not_modified
+
+    return get_block_summary(block_number)
+
+
+@app.get("/providers/performance", response_model=ProviderPerformanceReport)
+def providers_performance(
+    request: Request,
+    response: Response,
+    provider: Optional[Union[List[str], str]] = Query(
+        None, description="Optional filter by provider(s)."
+    ),
+    days: Optional[int] = Query(
+        None, ge=1, description="Only merge the past number of days (e.g., 1, 7, 30)."
+    ),
+    limit: int = Query(50, ge=1, le=500, description="Number of providers."),
+):
+    """
+    Compare providers on inclusion latency, block gaps, slashes and realized decay.
+
+    Served from per-day totals and sketches the pipeline computes as commitments
+    arrive, so the cost depends on the number of days and providers rather than the
+    number of preconfs. Rates and means are exact; percentiles are within 1%.
+
+    Args:
+        provider (Optional[Union[List[str], str]]): Optional filter by one or more providers.
+        days (Optional[int]): Optional number of past days to merge.
+        limit (int): Number of providers, most preconfs first.
+
+    Returns:
+        ProviderPerformanceReport: The statistics of each provider.
+
+    Raises:
+        HTTPException: If the pipeline has not built the statistics yet, returns a 503
+            status code; if there is an error reading them, returns a 500 status code.
+    """
+    not_modified = not_modified_response(
+        request, response, time_bucket=60 if days else None
+    )
+    if not_modified is not None:
+        return not_modified
+
+    since = day_of(datetime.now() - timedelta(days=days)) if days else None
+    performance = get_provider_performance(provider, since=since, limit=limit)
+    if performance is None:
+        raise HTTPException(
+            status_code=503, detail="Provider performance is not available yet"
+        )
+    return ProviderPerformanceReport(
+        since=since,
+        providers=[ProviderPerformance(**row) for row in performance.to_dicts()],
+    )
+
+
+@app.get("/providers/{address}/performance", response_model=ProviderPerformanceHistory)
+def provider_performance(
+    request: Request,
+    response: Response,
+    address: str = Path(..., description="Provider address."),
+    days: Optional[int] = Query(
+        None, ge=1, description="Only return the past number of days (e.g., 1, 7, 30)."
+    ),
+):
+    """
+    Get one provider's inclusion latency, block gap, slash and decay statistics per day.
+
+    Args:
+        address (str): Provider address.
+        days (Optional[int]): Optional number of past days to return.
+
+    Returns:
+        ProviderPerformanceHistory: The provider's statistics per day, oldest first.
+
+    Raises:
+        HTTPException: If the provider has no preconfs in the range, returns a 404
+            status code; if the pipeline has not built the statistics yet, returns a
+            503 status code; if there is an error reading them, returns a 500 status
+            code.
+    """
+    not_modified = not_modified_response(
+        request, response, time_bucket=60 if days else None
+    )
+    if not_modified is not None:
+        return not_modified
+
+    since = day_of(datetime.now() - timedelta(days=days)) if days else None
+    performance = get_provider_performance(address.lower(), since=since, by_day=True)
+    if performance is None:
+        raise HTTPException(
+            status_code=503, detail="Provider performance is not available yet"
+        )
+    if performance.is_empty():
+        raise HTTPException(
+            status_code=404, detail=f"No preconfs found for provider {address}"
+        )
+    return ProviderPerformanceHistory(
+        committer=address.lower(),
+        since=since,
+        days=[ProviderPerformanceDay(**row) for row in performance.to_dicts()],
+    )
+
+
+@app.get("/search", response_model=SearchResponse)
+def search(
+    request: Request,
+    response: Response,
+    q: str = Query(
+        ...,
+        description="Hex prefix (at least 6 digits) of a bidHash, txnHash, "
+        "commitmentIndex, commitmentDigest, bidder or committer.",
+    ),
+    limit: int = Query(
+        10, ge=1, le=100, description="Maximum number of results per group."
+    ),
+):
+    """
+    Search hashes and addresses by prefix.
+
+    Looks the prefix up in the sorted search index the pipeline publishes with each
+    snapshot and returns the matches grouped by the field they belong to, best match
+    first. Supports conditional requests with `If-None-Match` like `/preconfs`.
+
+    Args:
+        q (str): Hex prefix, with or without 0x, in any case.
+        limit (int): Maximum number of results per group.
+
+    Returns:
+        SearchResponse: The matches grouped by entity.
+
+    Raises:
+        HTTPException: If the prefix is not hex or too short, returns a 422 status
+            code; if there is an error searching, returns a 500 status code.
+    """
+    not_modified = not_modified_response(request, response)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        return search_prefix(q, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/pipeline/runs/summary", response_model=PipelineRunSummary)
+def pipeline_run_summary(
+    hours: int = Query(
+        24, ge=1, le=24 * 90, description="Summarize the last `hours` hours."
+    ),
+    bucket_minutes: int = Query(
+        60, ge=1, le=24 * 60, description="Width of each time bucket in minutes."
+    ),
+):
+    """
+    Summarize ingestion throughput and stage timings over time.
+
+    Every ingestion cycle records its stage durations, row counts, bytes written and
+    block range in the pipeline_runs table. This groups them into time buckets and
+    reports how strongly the cycle duration tracks the stored history and the rows
+    fetched per cycle.
+
+    Args:
+        hours (int): Length of the window to summarize.
+        bucket_minutes (int): Width of each time bucket in minutes.
+
+    Returns:
+        PipelineRunSummary: Window totals, trend statistics and per-bucket rows.
+
+    Raises:
+        HTTPException: If there is an error reading the telemetry, returns a 500 status code.
+    """
+    return get_pipeline_run_summary(hours, bucket_minutes)
+
+
 @app.get("/tables/{table_name}/schema", response_model=List[TableSchemaItem])
 def get_table_schema_endpoint(table_name: str):
     """
@@ -186,10 +996,7 @@ def get_table_schema_endpoint(table_name: str):
         List[Dict[str, str]]: A list of column names and their data types for the specified table.
 
     Raises:
-        HTTPException: If there is an error retrieving the table schema, returns a 500 status code.
+        HTTPException: If the table does not exist, returns a 404 status code. If
+            there is an error retrieving the table schema, returns a 500 status code.
     """
-    try:
-        schema = get_table_schema(table_name)
-        return schema
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return get_table_schema(table_name)
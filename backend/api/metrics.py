@@ -0,0 +1,124 @@
+# metrics.py
+
+import os
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling HTTP requests.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled.",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+
+# Stages of building a preconfs response: waiting for the DuckDB lock, running the
+# join in DuckDB, fetching the result into polars, the graffiti UDF, the remaining
+# derived columns, and encoding the response body.
+STAGE_LATENCY = Histogram(
+    "load_commitments_stage_seconds",
+    "Time spent in each stage of loading and serving commitments.",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+# Cold start of each worker: time from process start until the app is set up
+# ("startup"), spent mapping the snapshot ("snapshot"), serving the warm-up
+# /preconfs request ("first_request"), and in total until ready ("ready").
+STARTUP_SECONDS = Histogram(
+    "backend_startup_seconds",
+    "Time spent in each phase of a worker's cold start.",
+    ["phase"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+
+
+# Read replicas: change log entries published by the primary but not yet applied,
+# and the age of the oldest of them (0 when caught up), by network
+REPLICA_LAG_ENTRIES = Gauge(
+    "replica_lag_entries",
+    "Change log entries published by the primary and not applied yet.",
+    ["network"],
+    multiprocess_mode="livemax",
+)
+
+REPLICA_LAG_SECONDS = Gauge(
+    "replica_lag_seconds",
+    "Age of the oldest change log entry not applied yet.",
+    ["network"],
+    multiprocess_mode="livemax",
+)
+
+
+def render_metrics() -> tuple:
+    """
+    Render all metrics in the Prometheus text format.
+
+    When PROMETHEUS_MULTIPROC_DIR is set, metrics from every uvicorn worker are
+    aggregated.
+
+    Returns:
+        tuple: The rendered metrics and their content type.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def _route_template(app, scope: Scope) -> str:
+    """Return the path template of the route matching the request, e.g. /tables/{table_name}/schema."""
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and in-flight request counts."""
+
+    def __init__(self, app: ASGIApp, fastapi_app=None):
+        self.app = app
+        self.fastapi_app = fastapi_app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_template(self.fastapi_app, scope)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            REQUEST_LATENCY.labels(method, route, str(status["code"])).observe(
+                time.perf_counter() - start
+            )
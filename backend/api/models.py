@@ -1,6 +1,6 @@
 from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 
 class PreconfDataItem(BaseModel):
@@ -142,6 +142,11 @@ class PreconfDataItem(BaseModel):
     builder_graffiti: str = Field(
         ..., description="Builder graffiti.", example="preconf.builder"
     )
+    network: Optional[str] = Field(
+        None,
+        description="Network the preconf was indexed from, set when querying network=all.",
+        example="mainnet",
+    )
 
 
 class PreconfsResponse(BaseModel):
@@ -195,7 +200,123 @@ class PreconfsResponse(BaseModel):
     )
 
 
-class AggregationResult(BaseModel):
+# The fields of a preconf shown in the explorer's table view, returned for fields=compact
+class PreconfCompactItem(BaseModel):
+    commitmentIndex: str = Field(
+        ...,
+        description="Hexadecimal hash representing the commitment index.",
+        example="0x55286507e3699888db944de5fbdcb4109f73e3e7c1f68065fb9d9a6c955553db",
+    )
+    date: datetime = Field(
+        ...,
+        description="Date and time of the commitment.",
+        example="2024-04-01T12:34:56Z",
+    )
+    builder_graffiti: str = Field(
+        ..., description="Builder graffiti.", example="preconf.builder"
+    )
+    bidHash: str = Field(
+        ...,
+        description="Hash of the bid.",
+        example="0x7211ac9299337d69e11bb9e08de5bb4ee3fc65461228554039e4fc0a2d4e1d6a",
+    )
+    bidder: str = Field(
+        ...,
+        description="Address of the bidder.",
+        example="0xe51ef1836dbef052bffd2eb3fe1314365d23129d",
+    )
+    from_l1: str = Field(
+        ...,
+        description="Sender address in Layer 1.",
+        example="0xe51ef1836dbef052bffd2eb3fe1314365d23129d",
+    )
+    bid_eth: float = Field(..., description="Bid amount in ETH.", example=89.28788689)
+    base_fee_per_gas_l1: int = Field(
+        ..., description="Base fee per gas unit in Layer 1.", example=8
+    )
+    max_priority_fee_per_gas_l1: int = Field(
+        ..., description="Maximum priority fee per gas unit in Layer 1.", example=0
+    )
+    network: Optional[str] = Field(
+        None,
+        description="Network the preconf was indexed from, set when querying network=all.",
+        example="mainnet",
+    )
+
+
+class PreconfsCompactResponse(BaseModel):
+    page: int = Field(..., description="Current page number.", example=1)
+    limit: int = Field(..., description="Number of items per page.", example=50)
+    total: int = Field(..., description="Total number of items available.", example=1)
+    data: List[PreconfCompactItem] = Field(
+        ...,
+        description="List of preconfs with only the requested fields.",
+        example=[
+            {
+                "commitmentIndex": "0x55286507e3699888db944de5fbdcb4109f73e3e7c1f68065fb9d9a6c955553db",
+                "date": "2024-10-21T19:25:44.211000",
+                "builder_graffiti": "preconf.builder",
+                "bidHash": "0x7211ac9299337d69e11bb9e08de5bb4ee3fc65461228554039e4fc0a2d4e1d6a",
+                "bidder": "0xe51ef1836dbef052bffd2eb3fe1314365d23129d",
+                "from_l1": "0xe51ef1836dbef052bffd2eb3fe1314365d23129d",
+                "bid_eth": 0.05017327452651951,
+                "base_fee_per_gas_l1": 8,
+                "max_priority_fee_per_gas_l1": 0,
+            }
+        ],
+    )
+
+
+class SketchSummary(BaseModel):
+    bid_eth_p50: Optional[float] = Field(
+        None, description="Median bid in ETH (within 1%).", example=0.0112
+    )
+    bid_eth_p90: Optional[float] = Field(
+        None, description="90th percentile bid in ETH (within 1%).", example=0.0431
+    )
+    bid_eth_p99: Optional[float] = Field(
+        None, description="99th percentile bid in ETH (within 1%).", example=0.1875
+    )
+    decayed_bid_eth_p50: Optional[float] = Field(
+        None, description="Median decayed bid in ETH (within 1%).", example=0.0074
+    )
+    decayed_bid_eth_p90: Optional[float] = Field(
+        None,
+        description="90th percentile decayed bid in ETH (within 1%).",
+        example=0.0302,
+    )
+    decayed_bid_eth_p99: Optional[float] = Field(
+        None,
+        description="99th percentile decayed bid in ETH (within 1%).",
+        example=0.1412,
+    )
+    decay_multiplier_p50: Optional[float] = Field(
+        None, description="Median decay multiplier (within 1%).", example=0.66
+    )
+    decay_multiplier_p90: Optional[float] = Field(
+        None, description="90th percentile decay multiplier (within 1%).", example=0.93
+    )
+    decay_multiplier_p99: Optional[float] = Field(
+        None, description="99th percentile decay multiplier (within 1%).", example=0.99
+    )
+    distinct_bidders: Optional[int] = Field(
+        None, description="Number of distinct bidders.", example=14
+    )
+    distinct_committers: Optional[int] = Field(
+        None, description="Number of distinct providers.", example=5
+    )
+
+
+class AggregationDistribution(SketchSummary):
+    since: Optional[datetime] = Field(
+        None, description="First day merged, null for the full history.", example=None
+    )
+    preconf_count: int = Field(
+        ..., description="Number of preconf commitments merged.", example=8841
+    )
+
+
+class AggregationResult(SketchSummary):
     preconf_count: int = Field(
         ..., description="Total number of preconf commitments.", example=89
     )
@@ -236,3 +357,509 @@ class TableSchemaItem(BaseModel):
         schema_extra = {
             "example": {"column_name": "commitmentIndex", "data_type": "str"}
         }
+
+
+class PipelineRunBucket(BaseModel):
+    bucket_start: datetime = Field(
+        ...,
+        description="Start of the time bucket (UTC).",
+        example="2024-10-21T19:00:00",
+    )
+    runs: int = Field(..., description="Number of ingestion cycles.", example=120)
+    failed_runs: int = Field(..., description="Number of failed cycles.", example=0)
+    avg_duration_seconds: float = Field(
+        ..., description="Average cycle duration.", example=4.2
+    )
+    p95_duration_seconds: float = Field(
+        ..., description="95th percentile cycle duration.", example=7.9
+    )
+    max_duration_seconds: float = Field(
+        ..., description="Longest cycle duration.", example=12.3
+    )
+    avg_watermark_lookup_seconds: float = Field(
+        ...,
+        description="Average time spent reading the latest block numbers.",
+        example=0.02,
+    )
+    avg_fetch_seconds: float = Field(
+        ...,
+        description="Average time spent fetching events from hypersync.",
+        example=2.1,
+    )
+    avg_l1_enrichment_seconds: float = Field(
+        ..., description="Average time spent fetching L1 transactions.", example=1.4
+    )
+    avg_lock_wait_seconds: float = Field(
+        ..., description="Average time spent waiting for the DuckDB lock.", example=0.1
+    )
+    avg_write_seconds: float = Field(
+        ..., description="Average time spent writing to DuckDB.", example=0.3
+    )
+    rows_fetched: int = Field(
+        ..., description="Records fetched across all streams.", example=5400
+    )
+    rows_written: int = Field(..., description="Rows written to DuckDB.", example=5400)
+    bytes_written: int = Field(
+        ..., description="In-memory size of the batches written.", example=2800000
+    )
+    rows_per_second: Optional[float] = Field(
+        None, description="Rows written per second of cycle time.", example=10.7
+    )
+    history_rows: int = Field(
+        ...,
+        description="Rows in commit_stores at the end of the bucket.",
+        example=250000,
+    )
+    db_size_bytes: int = Field(
+        ...,
+        description="Size of the DuckDB file at the end of the bucket.",
+        example=1200000000,
+    )
+
+
+class PipelineRunSummary(BaseModel):
+    hours: int = Field(..., description="Length of the summarized window.", example=24)
+    bucket_minutes: int = Field(..., description="Width of each bucket.", example=60)
+    runs: int = Field(..., description="Number of cycles in the window.", example=2880)
+    failed_runs: int = Field(
+        ..., description="Number of failed cycles in the window.", example=2
+    )
+    duration_vs_history_corr: Optional[float] = Field(
+        None,
+        description="Correlation between cycle duration and the rows already stored.",
+        example=0.82,
+    )
+    duration_vs_rows_fetched_corr: Optional[float] = Field(
+        None,
+        description="Correlation between cycle duration and the rows fetched in the cycle.",
+        example=0.31,
+    )
+    seconds_per_million_history_rows: Optional[float] = Field(
+        None,
+        description="Growth of the cycle duration per million stored rows (linear fit).",
+        example=1.7,
+    )
+    buckets: List[PipelineRunBucket] = Field(
+        ..., description="Per-bucket throughput and stage timings, oldest first."
+    )
+
+
+class SearchResult(BaseModel):
+    key: str = Field(
+        ...,
+        description="Matching hash or address (lowercase).",
+        example="0x5a2c1f4b7d0e8a6c3b9f2e1d4c7a8b6e5f3d2c1b0a9e8f7d6c5b4a3e2f1d0c9b",
+    )
+    bidHash: Optional[str] = Field(
+        None,
+        description="Bid hash of the matching commitment, null for addresses.",
+        example="0x5a2c1f4b7d0e8a6c3b9f2e1d4c7a8b6e5f3d2c1b0a9e8f7d6c5b4a3e2f1d0c9b",
+    )
+    inc_block_number: Optional[int] = Field(
+        None,
+        description="L1 block of the commitment, or the latest one of an address.",
+        example=20995003,
+    )
+    preconf_count: int = Field(
+        ..., description="Number of commitments behind the key.", example=1
+    )
+    exact: bool = Field(
+        ..., description="Whether the key equals the query.", example=False
+    )
+
+
+class SearchGroup(BaseModel):
+    entity: str = Field(
+        ...,
+        description="Field the keys belong to: bidHash, txnHash, commitmentIndex, "
+        "commitmentDigest, bidder or committer.",
+        example="bidHash",
+    )
+    total: int = Field(..., description="Number of matching keys.", example=3)
+    results: List[SearchResult] = Field(..., description="Best matches, best first.")
+
+
+class SearchResponse(BaseModel):
+    query: str = Field(..., description="The query as sent.", example="0x5A2C1F")
+    prefix: str = Field(..., description="The normalized prefix.", example="0x5a2c1f")
+    truncated: bool = Field(
+        ...,
+        description="Whether more keys matched than were ranked; totals are then partial.",
+        example=False,
+    )
+    groups: List[SearchGroup] = Field(
+        ..., description="Matches grouped by entity, best group first."
+    )
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int = Field(..., description="Position in the leaderboard.", example=1)
+    address: str = Field(
+        ...,
+        description="Bidder or provider address.",
+        example="0xe51ef1836dbef052bffd2eb3a3fd3e2a0df9d6a5",
+    )
+    preconf_count: int = Field(..., description="Preconfs in the window.", example=1520)
+    total_bid: float = Field(..., description="Total bid in ETH.", example=1.53)
+    total_decayed_bid: Optional[float] = Field(
+        None, description="Total decayed bid in ETH.", example=0.97
+    )
+    slash_count: int = Field(..., description="Slashed preconfs.", example=2)
+    slash_rate: float = Field(
+        ..., description="Share of the preconfs that were slashed.", example=0.0013
+    )
+
+
+class Leaderboard(BaseModel):
+    role: str = Field(..., description="bidder or provider.", example="bidder")
+    window: str = Field(..., description="Length of the window.", example="24h")
+    metric: str = Field(
+        ..., description="Total the entries are ranked by.", example="total_bid"
+    )
+    window_start: datetime = Field(
+        ...,
+        description="Start of the first bucket in the window (UTC).",
+        example="2024-10-21T19:00:00",
+    )
+    entries: List[LeaderboardEntry] = Field(..., description="Ranked entries.")
+
+
+class LookupRequest(BaseModel):
+    bid_hashes: List[str] = Field(
+        [],
+        description="Bid hashes to resolve, with or without 0x, in any case.",
+        example=["0x7211ac9299337d69e11bb9e08de5bb4ee3fc65461228554039e4fc0a2d4e1d6a"],
+    )
+    txn_hashes: List[str] = Field(
+        [],
+        description="L1 transaction hashes to resolve, with or without 0x, in any case.",
+        example=["0x16f670c74bd86cddb149e66b9c2aabf8b9a5bf801096c6dd2ab1843c27d004f5"],
+    )
+    block_numbers_l1: List[int] = Field(
+        [], description="L1 block numbers to resolve.", example=[2581126]
+    )
+
+
+class LookupMisses(BaseModel):
+    bid_hashes: List[str] = Field(
+        ..., description="Requested bid hashes without a commitment, as sent."
+    )
+    txn_hashes: List[str] = Field(
+        ..., description="Requested transaction hashes without a commitment, as sent."
+    )
+    block_numbers_l1: List[int] = Field(
+        ..., description="Requested L1 blocks without a commitment."
+    )
+
+
+class LookupResponse(BaseModel):
+    found: int = Field(..., description="Number of matching preconfs.", example=1)
+    data: List[PreconfDataItem] = Field(
+        ..., description="Matching preconfs, newest first."
+    )
+    misses: LookupMisses = Field(
+        ..., description="Requested values that matched nothing."
+    )
+
+
+class ReplicaNetworkStatus(BaseModel):
+    network: str = Field(..., description="Network name.", example="default")
+    applied_seq: int = Field(
+        ..., description="Last change log entry applied to this replica.", example=41
+    )
+    latest_seq: int = Field(
+        ..., description="Last change log entry shipped by the primary.", example=42
+    )
+    lag_entries: int = Field(
+        ..., description="Shipped entries not applied yet.", example=1
+    )
+    lag_seconds: float = Field(
+        ...,
+        description="Age in seconds of the oldest entry not applied yet, 0 when caught up.",
+        example=3.2,
+    )
+    gap: bool = Field(
+        ...,
+        description="Whether entries the replica needs were pruned from the outbox, "
+        "in which case it has to be re-seeded from a copy of the primary.",
+        example=False,
+    )
+
+
+class ReplicaStatus(BaseModel):
+    networks: List[ReplicaNetworkStatus] = Field(
+        ..., description="Replication state of each network."
+    )
+
+
+class TableStats(BaseModel):
+    table_name: str = Field(
+        ..., description="Name of the table.", example="commit_stores"
+    )
+    estimated_rows: int = Field(
+        ...,
+        description="Row count from the table metadata; may include rows deleted "
+        "since the last checkpoint.",
+        example=48521,
+    )
+    column_count: int = Field(..., description="Number of columns.", example=31)
+    min_block_number: Optional[int] = Field(
+        None,
+        description="Lower bound of block_number from the storage statistics, if the "
+        "table has that column.",
+        example=1000001,
+    )
+    max_block_number: Optional[int] = Field(
+        None,
+        description="Upper bound of block_number from the storage statistics, if the "
+        "table has that column.",
+        example=1099999,
+    )
+    estimated_bytes: int = Field(
+        ...,
+        description="Size of the storage blocks holding the table.",
+        example=4194304,
+    )
+
+
+class DatabaseStats(BaseModel):
+    database_bytes: int = Field(
+        ..., description="Size of the DuckDB database file.", example=49545216
+    )
+    wal_bytes: int = Field(
+        ..., description="Size of the write-ahead log not yet checkpointed.", example=0
+    )
+    tables: List[TableStats] = Field(..., description="Statistics of every table.")
+
+
+class BlockSummary(BaseModel):
+    block_number_l1: int = Field(..., description="L1 block number.", example=2581126)
+    block_hash_l1: Optional[str] = Field(
+        None,
+        description="L1 block hash.",
+        example="0x996d79e31d18ca12c7736c79cf76f9bd2a8b2d0d0b8c8e4b2f7a5b4c3d2e1f00",
+    )
+    timestamp_l1: Optional[int] = Field(
+        None, description="L1 block timestamp (seconds).", example=1729537456
+    )
+    builder_graffiti: Optional[str] = Field(
+        None, description="Builder graffiti of the block.", example="titanbuilder.xyz"
+    )
+    base_fee_per_gas_l1: Optional[float] = Field(
+        None, description="Base fee per gas of the block (wei).", example=7643210.0
+    )
+    gas_used_block_l1: Optional[int] = Field(
+        None, description="Gas used by the whole block.", example=14253981
+    )
+    preconf_count: int = Field(
+        ..., description="Preconfs for transactions of the block.", example=3
+    )
+    txn_count: int = Field(
+        ..., description="Distinct preconfirmed transactions.", example=2
+    )
+    preconf_gas_used: Optional[int] = Field(
+        None, description="Gas used by the preconfirmed transactions.", example=42000
+    )
+    total_bid_eth: Optional[float] = Field(
+        None, description="Total bid in ETH.", example=0.0021
+    )
+    total_decayed_bid_eth: Optional[float] = Field(
+        None, description="Total decayed bid in ETH.", example=0.0014
+    )
+    slash_count: int = Field(..., description="Slashed preconfs.", example=0)
+    bidder_count: int = Field(..., description="Distinct bidders.", example=1)
+    provider_count: int = Field(..., description="Distinct providers.", example=2)
+
+
+class BlockSummaryPage(BaseModel):
+    data: List[BlockSummary] = Field(
+        ..., description="Block summaries, highest block first."
+    )
+    next_before: Optional[int] = Field(
+        None,
+        description="Pass as `before` to fetch the next page; null on the last page.",
+        example=2581090,
+    )
+
+
+class ProviderPerformanceStats(BaseModel):
+    preconf_count: int = Field(..., description="Preconfs committed.", example=812)
+    slash_count: int = Field(..., description="Slashed preconfs.", example=3)
+    slash_rate: Optional[float] = Field(
+        None, description="Share of preconfs slashed.", example=0.0037
+    )
+    on_target_rate: Optional[float] = Field(
+        None,
+        description="Share of preconfs included in the block they were bid for.",
+        example=0.9963,
+    )
+    total_bid_eth: Optional[float] = Field(
+        None, description="Total bid in ETH.", example=1.2431
+    )
+    total_decayed_bid_eth: Optional[float] = Field(
+        None, description="Total decayed bid in ETH.", example=0.8217
+    )
+    decay_realized: Optional[float] = Field(
+        None,
+        description="Share of the bids kept after decay (decayed / full bid).",
+        example=0.661,
+    )
+    mean_dispatch_latency_s: Optional[float] = Field(
+        None,
+        description="Mean seconds from commitment dispatch to the L1 block.",
+        example=7.4,
+    )
+    mean_decay_start_latency_s: Optional[float] = Field(
+        None,
+        description="Mean seconds from the start of the decay to the L1 block.",
+        example=9.8,
+    )
+    mean_block_gap: Optional[float] = Field(
+        None,
+        description="Mean L1 blocks between the block bid for and the inclusion.",
+        example=0.004,
+    )
+    dispatch_latency_s_p50: Optional[float] = Field(
+        None, description="Median dispatch latency in seconds (within 1%).", example=6.9
+    )
+    dispatch_latency_s_p90: Optional[float] = Field(
+        None,
+        description="90th percentile dispatch latency in seconds (within 1%).",
+        example=11.2,
+    )
+    dispatch_latency_s_p99: Optional[float] = Field(
+        None,
+        description="99th percentile dispatch latency in seconds (within 1%).",
+        example=12.0,
+    )
+    decay_start_latency_s_p50: Optional[float] = Field(
+        None,
+        description="Median decay start latency in seconds (within 1%).",
+        example=9.1,
+    )
+    decay_start_latency_s_p90: Optional[float] = Field(
+        None,
+        description="90th percentile decay start latency in seconds (within 1%).",
+        example=13.4,
+    )
+    decay_start_latency_s_p99: Optional[float] = Field(
+        None,
+        description="99th percentile decay start latency in seconds (within 1%).",
+        example=15.8,
+    )
+    block_gap_p50: Optional[float] = Field(
+        None, description="Median block gap (within 1%).", example=0.0
+    )
+    block_gap_p90: Optional[float] = Field(
+        None, description="90th percentile block gap (within 1%).", example=0.0
+    )
+    block_gap_p99: Optional[float] = Field(
+        None, description="99th percentile block gap (within 1%).", example=1.0
+    )
+    dispatch_block_gap_p50: Optional[float] = Field(
+        None,
+        description="Median L1 blocks from the head at dispatch to the inclusion "
+        "(within 1%).",
+        example=1.0,
+    )
+    dispatch_block_gap_p90: Optional[float] = Field(
+        None,
+        description="90th percentile L1 blocks from the head at dispatch to the "
+        "inclusion (within 1%).",
+        example=1.0,
+    )
+    dispatch_block_gap_p99: Optional[float] = Field(
+        None,
+        description="99th percentile L1 blocks from the head at dispatch to the "
+        "inclusion (within 1%).",
+        example=2.0,
+    )
+    decay_multiplier_p50: Optional[float] = Field(
+        None, description="Median decay multiplier (within 1%).", example=0.66
+    )
+    decay_multiplier_p90: Optional[float] = Field(
+        None, description="90th percentile decay multiplier (within 1%).", example=0.93
+    )
+    decay_multiplier_p99: Optional[float] = Field(
+        None, description="99th percentile decay multiplier (within 1%).", example=0.99
+    )
+
+
+class ProviderPerformance(ProviderPerformanceStats):
+    committer: str = Field(
+        ...,
+        description="Provider address.",
+        example="0xe3d71ee44f7b5e8ec3e6e5f5c8f4e7b0a1d2c3b4",
+    )
+
+
+class ProviderPerformanceDay(ProviderPerformanceStats):
+    day: datetime = Field(..., description="Day bucket.", example="2024-10-21T00:00:00")
+
+
+class ProviderPerformanceReport(BaseModel):
+    since: Optional[datetime] = Field(
+        None, description="First day merged, null for the full history.", example=None
+    )
+    providers: List[ProviderPerformance] = Field(
+        ..., description="Providers, most preconfs first."
+    )
+
+
+class ProviderPerformanceHistory(BaseModel):
+    committer: str = Field(
+        ...,
+        description="Provider address.",
+        example="0xe3d71ee44f7b5e8ec3e6e5f5c8f4e7b0a1d2c3b4",
+    )
+    since: Optional[datetime] = Field(
+        None, description="First day merged, null for the full history.", example=None
+    )
+    days: List[ProviderPerformanceDay] = Field(
+        ..., description="The provider's statistics per day, oldest first."
+    )
+
+
+class QueryRequest(BaseModel):
+    sql: str = Field(
+        ...,
+        max_length=100_000,
+        description="A single SELECT statement over the `commitments` and "
+        "`search_index` tables.",
+        example="SELECT committer, COUNT(*) AS preconfs FROM commitments GROUP BY 1",
+    )
+    max_rows: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Rows to return at most; capped by the server's row limit.",
+        example=1000,
+    )
+    timeout_seconds: Optional[float] = Field(
+        None,
+        gt=0,
+        description="Seconds the query may run; capped by the server's time limit.",
+        example=10,
+    )
+
+
+class QueryColumn(BaseModel):
+    name: str = Field(..., description="Column name.", example="committer")
+    type: str = Field(..., description="Column type.", example="String")
+
+
+class QueryResponse(BaseModel):
+    columns: List[QueryColumn] = Field(..., description="Columns of the result.")
+    row_count: int = Field(..., description="Rows returned.", example=5)
+    truncated: bool = Field(
+        ..., description="Whether the result was cut at the row limit.", example=False
+    )
+    cached: bool = Field(
+        ..., description="Whether the result came from the cache.", example=False
+    )
+    generation: Optional[int] = Field(
+        None, description="Watermark generation of the data queried.", example=1287
+    )
+    elapsed_seconds: float = Field(
+        ..., description="Seconds spent serving the query.", example=0.042
+    )
+    data: List[Dict[str, Any]] = Field(..., description="Rows of the result.")
@@ -0,0 +1,297 @@
+# query.py
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import duckdb
+import polars as pl
+import pyarrow as pa
+from fastapi import HTTPException
+from snapshot import load_snapshot, read_snapshot_pointer, snapshot_files
+from watermark import read_watermark
+from api.metrics import STAGE_LATENCY
+from api.shards import current_db_filename
+
+logger = logging.getLogger(__name__)
+
+# Limits of every query: DuckDB memory limit and worker threads, wall clock time and
+# rows returned. Requests may ask for less time and fewer rows, never more.
+QUERY_MEMORY_LIMIT = os.getenv("QUERY_MEMORY_LIMIT", "1GB")
+QUERY_THREADS = int(os.getenv("QUERY_THREADS", "2"))
+QUERY_TIMEOUT_SECONDS = float(os.getenv("QUERY_TIMEOUT_SECONDS", "30"))
+QUERY_MAX_ROWS = int(os.getenv("QUERY_MAX_ROWS", "100000"))
+
+# Queries running at once in this process, and queries waiting for a slot; when the
+# queue is full, or a slot does not free up within QUERY_QUEUE_TIMEOUT_SECONDS, the
+# query is turned away with a 503
+QUERY_CONCURRENCY = int(os.getenv("QUERY_CONCURRENCY", "2"))
+QUERY_QUEUE_SIZE = int(os.getenv("QUERY_QUEUE_SIZE", "8"))
+QUERY_QUEUE_TIMEOUT_SECONDS = float(os.getenv("QUERY_QUEUE_TIMEOUT_SECONDS", "30"))
+
+# Results kept by this process, least recently used evicted first
+QUERY_CACHE_MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", str(256 * 1024**2)))
+
+# Rows fetched from DuckDB at a time, so a large result stops being read at the limit
+FETCH_BATCH_ROWS = 10_000
+
+_slots = threading.BoundedSemaphore(QUERY_CONCURRENCY)
+_waiting = 0
+_waiting_lock = threading.Lock()
+
+# (database file, generation, normalized SQL digest, max rows) -> (result, truncated)
+_cache: "OrderedDict[Tuple[str, int, str, int], Tuple[pl.DataFrame, bool]]" = (
+    OrderedDict()
+)
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+# Database file -> (generation, snapshot frames as Arrow tables by name)
+_tables: Dict[str, Tuple[int, Dict[str, pa.Table]]] = {}
+_tables_lock = threading.Lock()
+
+
+def _strip_locations(node):
+    if isinstance(node, dict):
+        return {
+            key: _strip_locations(value)
+            for key, value in node.items()
+            if key != "query_location"
+        }
+    if isinstance(node, list):
+        return [_strip_locations(value) for value in node]
+    return node
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Check that `sql` is a single SELECT statement and return a digest of its syntax
+    tree.
+
+    The tree comes from DuckDB's parser, so queries differing only in whitespace,
+    comments or keyword case share a digest.
+
+    Raises:
+        HTTPException: If the SQL does not parse or is not a single SELECT statement,
+            returns a 422 status code.
+    """
+    with duckdb.connect(":memory:") as conn:
+        try:
+            statements = conn.extract_statements(sql)
+        except duckdb.Error as e:
+            raise HTTPException(status_code=422, detail=f"Invalid query: {e}")
+        if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+            raise HTTPException(
+                status_code=422, detail="Only a single SELECT statement is allowed"
+            )
+        tree = json.loads(
+            conn.execute("SELECT json_serialize_sql(?)", [sql]).fetchone()[0]
+        )
+    if tree.get("error"):
+        raise HTTPException(
+            status_code=422, detail=f"Invalid query: {tree.get('error_message')}"
+        )
+    canonical = json.dumps(_strip_locations(tree["statements"]), sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _snapshot_tables(db_filename: str, generation: int) -> Dict[str, pa.Table]:
+    """
+    Frames of the current snapshot as Arrow tables, by name, or an empty dict if the
+    snapshot does not belong to `generation`.
+
+    The conversion is done once per generation and shared by every query.
+    """
+    cached = _tables.get(db_filename)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+
+    with _tables_lock:
+        cached = _tables.get(db_filename)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        pointer = read_snapshot_pointer(db_filename)
+        if pointer.get("generation") != generation:
+            return {}
+        tables = {}
+        for name in snapshot_files(pointer):
+            frame = load_snapshot(db_filename, generation, name)
+            if frame is not None:
+                tables[name] = frame.to_arrow()
+        _tables[db_filename] = (generation, tables)
+        return tables
+
+
+def _cache_get(key: Tuple) -> Optional[Tuple[pl.DataFrame, bool]]:
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+        return entry
+
+
+def _cache_put(key: Tuple, result: pl.DataFrame, truncated: bool) -> None:
+    global _cache_bytes
+    size = result.estimated_size()
+    if size > QUERY_CACHE_MAX_BYTES:
+        return
+    with _cache_lock:
+        # Results of older generations of the same database are never read again
+        for stale in [k for k in _cache if k[0] == key[0] and k[1] != key[1]]:
+            _cache_bytes -= _cache.pop(stale)[0].estimated_size()
+        if key in _cache:
+            _cache_bytes -= _cache.pop(key)[0].estimated_size()
+        _cache[key] = (result, truncated)
+        _cache_bytes += size
+        while _cache_bytes > QUERY_CACHE_MAX_BYTES:
+            _cache_bytes -= _cache.popitem(last=False)[1][0].estimated_size()
+
+
+def _acquire_slot() -> None:
+    global _waiting
+    with _waiting_lock:
+        if _waiting >= QUERY_QUEUE_SIZE:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many queries are waiting, try again later",
+                headers={"Retry-After": "5"},
+            )
+        _waiting += 1
+    try:
+        with STAGE_LATENCY.labels("query_queue").time():
+            acquired = _slots.acquire(timeout=QUERY_QUEUE_TIMEOUT_SECONDS)
+    finally:
+        with _waiting_lock:
+            _waiting -= 1
+    if not acquired:
+        raise HTTPException(
+            status_code=503,
+            detail="No query slot freed up in time, try again later",
+            headers={"Retry-After": "5"},
+        )
+
+
+def _execute(
+    tables: Dict[str, pa.Table], sql: str, max_rows: int, timeout: float
+) -> Tuple[pl.DataFrame, bool]:
+    """Run a query on the snapshot frames in a sandboxed in-memory DuckDB."""
+    conn = duckdb.connect(
+        ":memory:",
+        config={
+            "memory_limit": QUERY_MEMORY_LIMIT,
+            "threads": QUERY_THREADS,
+            # No files, no ATTACH, no extension downloads
+            "enable_external_access": False,
+        },
+    )
+    timer = threading.Timer(timeout, conn.interrupt)
+    try:
+        for name, table in tables.items():
+            conn.register(name, table)
+        # The query cannot raise its own limits with SET
+        conn.execute("SET lock_configuration = true")
+
+        timer.start()
+        reader = conn.execute(sql).fetch_record_batch(FETCH_BATCH_ROWS)
+        batches, rows = [], 0
+        for batch in reader:
+            batches.append(batch)
+            rows += batch.num_rows
+            if rows > max_rows:
+                break
+    except (duckdb.Error, OSError) as e:
+        # Errors raised while reading the result come through Arrow as OSError
+        if isinstance(e, duckdb.InterruptException) or "INTERRUPT" in str(e):
+            raise HTTPException(
+                status_code=408, detail=f"Query timed out after {timeout:g} seconds"
+            )
+        if isinstance(e, duckdb.OutOfMemoryException) or "Out of Memory" in str(e):
+            raise HTTPException(
+                status_code=413,
+                detail=f"Query exceeded the memory limit of {QUERY_MEMORY_LIMIT}",
+            )
+        raise HTTPException(status_code=422, detail=f"Invalid query: {e}")
+    finally:
+        timer.cancel()
+        conn.close()
+
+    result = pl.from_arrow(batches or reader.schema.empty_table())
+    return result.head(max_rows), result.height > max_rows
+
+
+def run_query(
+    sql: str, max_rows: Optional[int] = None, timeout: Optional[float] = None
+) -> Dict:
+    """
+    Run a read-only SQL query on the current snapshot of the data.
+
+    The query sees the frames of the snapshot the pipeline publishes for the current
+    watermark generation (`commitments`, the enriched commitments, and
+    `search_index`) as tables of a private in-memory DuckDB, so it never opens the
+    database file or takes its lock. It runs with QUERY_MEMORY_LIMIT, QUERY_THREADS,
+    a time limit and a row limit, and without file system access, after waiting for
+    one of QUERY_CONCURRENCY slots. Results are cached by the query's syntax tree,
+    the row limit and the watermark generation.
+
+    Args:
+        sql (str): A single SELECT statement.
+        max_rows (Optional[int]): Rows to return at most (default and upper bound:
+            QUERY_MAX_ROWS).
+        timeout (Optional[float]): Seconds the query may run (default and upper
+            bound: QUERY_TIMEOUT_SECONDS).
+
+    Returns:
+        Dict: The result frame, whether it was truncated at the row limit, whether it
+            came from the cache, the watermark generation and the seconds spent.
+
+    Raises:
+        HTTPException: If the SQL is invalid or not a single SELECT, returns a 422
+            status code; if it times out, 408; if it runs out of memory, 413; if no
+            snapshot of the current data exists yet or the queue is full, 503.
+    """
+    start = time.perf_counter()
+    max_rows = min(max_rows or QUERY_MAX_ROWS, QUERY_MAX_ROWS)
+    timeout = min(timeout or QUERY_TIMEOUT_SECONDS, QUERY_TIMEOUT_SECONDS)
+    digest = normalize_sql(sql)
+
+    db_filename = current_db_filename()
+    generation = read_watermark(db_filename).get("generation")
+    key = (db_filename, generation, digest, max_rows)
+    cached = _cache_get(key)
+    if cached is not None:
+        return {
+            "data": cached[0],
+            "truncated": cached[1],
+            "cached": True,
+            "generation": generation,
+            "elapsed_seconds": time.perf_counter() - start,
+        }
+
+    tables = _snapshot_tables(db_filename, generation) if generation else {}
+    if not tables:
+        raise HTTPException(
+            status_code=503, detail="No snapshot of the current data is available yet"
+        )
+
+    _acquire_slot()
+    try:
+        with STAGE_LATENCY.labels("query").time():
+            result, truncated = _execute(tables, sql, max_rows, timeout)
+    finally:
+        _slots.release()
+    _cache_put(key, result, truncated)
+    logger.info(
+        f"Ran query {digest[:12]} on generation {generation}: {result.height} rows"
+        f"{' (truncated)' if truncated else ''} in {time.perf_counter() - start:.3f}s"
+    )
+    return {
+        "data": result,
+        "truncated": truncated,
+        "cached": False,
+        "generation": generation,
+        "elapsed_seconds": time.perf_counter() - start,
+    }
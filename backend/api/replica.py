@@ -0,0 +1,228 @@
+# replica.py
+
+import asyncio
+import fcntl
+import logging
+import os
+import time
+from typing import Dict, Optional
+import duckdb
+from fastapi.concurrency import run_in_threadpool
+from db_lock import acquire_lock, release_lock
+from changelog import (
+    OUTBOX_DIRNAME,
+    apply_entry,
+    get_position,
+    list_entries,
+    read_entry,
+)
+from search_index import build_search_index
+from snapshot import publish_snapshot
+from watermark import read_watermark, write_watermark
+from api.database import query_commitments
+from api.metrics import REPLICA_LAG_ENTRIES, REPLICA_LAG_SECONDS
+from api.shards import SHARDS, current_db_filename, current_lockfile, use_network
+
+logger = logging.getLogger(__name__)
+
+# Directory the primary's db/data directory is shipped to (rsync, a shared volume,
+# an object store mount...). When set, this node is a read replica: it applies the
+# change log entries found there to its own databases.
+REPLICA_SOURCE = os.getenv("REPLICA_SOURCE")
+
+# Seconds between polls of the shipped outboxes
+POLL_INTERVAL = float(os.getenv("REPLICA_POLL_INTERVAL", "2"))
+
+# Entries applied per poll before the snapshot and watermark are republished
+MAX_ENTRIES_PER_POLL = 100
+
+# Block column of each table the watermark tracks
+WATERMARK_BLOCK_COLUMNS = {
+    "commit_stores": "block_number",
+    "encrypted_stores": "block_number",
+    "commits_processed": "block_number",
+    "l1_transactions": "block_number",
+}
+
+
+def replica_outbox(network: str) -> str:
+    """
+    Shipped outbox of a network: REPLICA_SOURCE/outbox for the single network
+    layout, REPLICA_SOURCE/<network>/outbox when NETWORKS is set, mirroring the
+    primary's db/data directory.
+    """
+    if os.getenv("NETWORKS"):
+        return os.path.join(REPLICA_SOURCE, network, OUTBOX_DIRNAME)
+    return os.path.join(REPLICA_SOURCE, OUTBOX_DIRNAME)
+
+
+def _read_position() -> int:
+    """Sequence number of the last entry applied to the current network's database."""
+    if not os.path.exists(current_db_filename()):
+        return 0
+    lockfile = acquire_lock(current_lockfile())
+    try:
+        with duckdb.connect(current_db_filename(), read_only=True) as conn:
+            return get_position(conn)
+    finally:
+        release_lock(lockfile)
+
+
+def replica_status(network: str) -> Dict:
+    """
+    Replication state of a network: the last entry applied, the last one shipped,
+    and how far behind the replica is in entries and in seconds.
+
+    Computed from the database and the outbox, so every worker reports the same
+    state whichever one applies the entries.
+    """
+    with use_network(network):
+        applied = _read_position()
+    directory = replica_outbox(network)
+    pending = list_entries(directory, applied)
+    lag_seconds = 0.0
+    if pending:
+        try:
+            created_at = read_entry(directory, pending[0])["created_at"]
+            lag_seconds = max(time.time() - created_at, 0.0)
+        except (OSError, ValueError, KeyError):
+            pass
+    return {
+        "network": network,
+        "applied_seq": applied,
+        "latest_seq": pending[-1] if pending else applied,
+        "lag_entries": len(pending),
+        "lag_seconds": round(lag_seconds, 3),
+        # The outbox no longer holds the entry after the applied one: the replica
+        # missed changes and has to be re-seeded from a copy of the primary
+        "gap": bool(pending) and pending[0] != applied + 1,
+    }
+
+
+def _republish(db_filename: str) -> None:
+    """
+    Rebuild the snapshot and publish a new watermark generation after entries were
+    applied, so the workers of this node and /preconfs/stream pick up the changes.
+    """
+    lockfile = acquire_lock(current_lockfile())
+    try:
+        with duckdb.connect(db_filename, read_only=True) as conn:
+            tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+            blocks = {
+                table: int(
+                    conn.execute(f"SELECT MAX({column}) FROM {table}").fetchone()[0]
+                    or 0
+                )
+                for table, column in WATERMARK_BLOCK_COLUMNS.items()
+                if table in tables
+            }
+    finally:
+        release_lock(lockfile)
+
+    generation = read_watermark(db_filename).get("generation", 0) + 1
+    if {"commit_stores", "encrypted_stores", "commits_processed"} <= set(blocks):
+        df = query_commitments().sort(
+            "inc_block_number", descending=True, maintain_order=True
+        )
+        publish_snapshot(
+            db_filename,
+            {"commitments": df, "search_index": build_search_index(df)},
+            generation,
+        )
+    write_watermark(db_filename, blocks)
+
+
+def apply_pending(network: str) -> int:
+    """
+    Apply the shipped change log entries of a network that this replica has not
+    applied yet, oldest first.
+
+    Each entry is applied in its own transaction under the database lock, together
+    with the new position, so readers never see half an entry and a crash between
+    entries resumes where it stopped. Nothing is applied past a gap in the sequence.
+
+    Returns:
+        int: The number of entries applied.
+    """
+    with use_network(network):
+        status = replica_status(network)
+        REPLICA_LAG_ENTRIES.labels(network).set(status["lag_entries"])
+        REPLICA_LAG_SECONDS.labels(network).set(status["lag_seconds"])
+        if status["gap"]:
+            logger.error(
+                f"Replica of {network} is at entry {status['applied_seq']} but the "
+                f"outbox starts later; re-seed it from a copy of the primary database"
+            )
+            return 0
+
+        db_filename = current_db_filename()
+        directory = replica_outbox(network)
+        os.makedirs(os.path.dirname(db_filename), exist_ok=True)
+        applied = 0
+        for seq in list_entries(directory, status["applied_seq"])[
+            :MAX_ENTRIES_PER_POLL
+        ]:
+            manifest = read_entry(directory, seq)
+            lockfile = acquire_lock(current_lockfile())
+            try:
+                with duckdb.connect(db_filename) as conn:
+                    inserted, deleted = apply_entry(conn, directory, manifest)
+            finally:
+                release_lock(lockfile)
+            logger.info(
+                f"Applied {network} change log entry {seq}: "
+                f"{inserted} rows inserted, {deleted} deleted"
+            )
+            applied += 1
+
+        if applied:
+            _republish(db_filename)
+            status = replica_status(network)
+            REPLICA_LAG_ENTRIES.labels(network).set(status["lag_entries"])
+            REPLICA_LAG_SECONDS.labels(network).set(status["lag_seconds"])
+        return applied
+
+
+def _try_lock_applier() -> Optional[int]:
+    """
+    Take the node-wide applier lock without waiting, so a single worker of the node
+    writes to the replica databases. Returns the lock's file descriptor, or None if
+    another worker holds it.
+    """
+    path = os.path.join(
+        os.path.dirname(next(iter(SHARDS.values()))), "replica_applier.lock"
+    )
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+async def run_replica_applier() -> None:
+    """
+    Apply the shipped change log of every network until cancelled.
+
+    Every worker runs this loop, but only the one holding the applier lock applies
+    entries; the others retry the lock each poll and take over if that worker exits.
+    """
+    fd = None
+    try:
+        while True:
+            if fd is None:
+                fd = _try_lock_applier()
+            if fd is not None:
+                for network in SHARDS:
+                    try:
+                        await run_in_threadpool(apply_pending, network)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        logger.error(f"Error applying {network} change log: {e}")
+            await asyncio.sleep(POLL_INTERVAL)
+    finally:
+        if fd is not None:
+            os.close(fd)
@@ -0,0 +1,152 @@
+# search.py
+
+import re
+import threading
+from typing import Dict, List, Tuple
+import polars as pl
+from fastapi import HTTPException
+from search_index import ADDRESS_FIELDS, HASH_FIELDS, build_search_index
+from snapshot import load_snapshot
+from watermark import read_watermark, watermark_token
+from api.database import load_commitments_df
+from api.metrics import STAGE_LATENCY
+from api.shards import current_db_filename
+
+# Shorter prefixes match too large a share of the keys to be useful
+MIN_PREFIX_LENGTH = 6
+
+# Upper bound on the keys ranked for one query; totals beyond it are reported as truncated
+MAX_SCANNED_KEYS = 10_000
+
+# Order of groups with the same score
+ENTITY_ORDER = HASH_FIELDS + ADDRESS_FIELDS
+
+_HEX_RE = re.compile(r"^(0x)?([0-9a-f]+)$")
+
+# Index built in this process when the pipeline has not published one, by database
+# file: (token, index)
+_fallback_indexes: Dict[str, Tuple[str, pl.DataFrame]] = {}
+_fallback_lock = threading.Lock()
+
+
+def normalize_prefix(query: str) -> str:
+    """
+    Turn a user supplied hash or address prefix into an index key prefix.
+
+    Args:
+        query (str): Hex prefix, with or without 0x, in any case.
+
+    Returns:
+        str: The lowercase prefix starting with 0x.
+
+    Raises:
+        HTTPException: If the query is not hex or has fewer than MIN_PREFIX_LENGTH
+            hex digits, returns a 422 status code.
+    """
+    match = _HEX_RE.match(query.strip().lower())
+    if match is None or len(match.group(2)) < MIN_PREFIX_LENGTH:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Search needs a hex prefix of at least {MIN_PREFIX_LENGTH} digits",
+        )
+    return f"0x{match.group(2)}"
+
+
+def get_search_index() -> pl.DataFrame:
+    """
+    Return the prefix search index for the current data.
+
+    Uses the index the pipeline publishes with each snapshot. Until one exists for the
+    current watermark generation, an index is built from the commitments and kept
+    until the watermark moves.
+    """
+    db_filename = current_db_filename()
+    generation = read_watermark(db_filename).get("generation")
+    if generation is not None:
+        index = load_snapshot(db_filename, generation, "search_index")
+        if index is not None:
+            return index
+
+    token = watermark_token(db_filename)
+    with _fallback_lock:
+        cached = _fallback_indexes.get(db_filename)
+        if cached is None or cached[0] != token:
+            with STAGE_LATENCY.labels("search_index").time():
+                commitments = load_commitments_df(
+                    columns=[*HASH_FIELDS, *ADDRESS_FIELDS, "inc_block_number"]
+                )
+                cached = (token, build_search_index(commitments))
+            _fallback_indexes[db_filename] = cached
+        return cached[1]
+
+
+def search_prefix(query: str, limit: int) -> Dict:
+    """
+    Find the hashes and addresses that start with a prefix, grouped by entity.
+
+    The index keys are sorted, so the matches form one range found by two binary
+    searches. Within a group an exact match comes first, then keys with the most
+    commitments, then the most recent ones. Groups are ordered by their best match:
+    an exact match, then the share of the key covered by the prefix.
+
+    Args:
+        query (str): Hex prefix of a bidHash, txnHash, commitmentIndex,
+            commitmentDigest, bidder or committer.
+        limit (int): Maximum number of results per group.
+
+    Returns:
+        Dict: The normalized prefix, whether the scan was truncated, and the groups
+            with their total number of matches and top results.
+
+    Raises:
+        HTTPException: If the prefix is invalid, returns a 422 status code.
+    """
+    prefix = normalize_prefix(query)
+    index = get_search_index()
+
+    with STAGE_LATENCY.labels("search").time():
+        keys = index["key"]
+        # "g" sorts right after every hex digit, so it bounds the prefix range
+        lo = keys.search_sorted(prefix, side="left")
+        hi = keys.search_sorted(prefix + "g", side="left")
+        matches = index.slice(lo, min(hi - lo, MAX_SCANNED_KEYS)).with_columns(
+            (pl.col("key") == prefix).alias("exact"),
+            (len(prefix) / pl.col("key").str.len_chars()).alias("score"),
+        )
+
+        groups: List[Dict] = []
+        for entity in ENTITY_ORDER:
+            group = matches.filter(pl.col("entity") == entity)
+            if group.is_empty():
+                continue
+            ranked = group.sort(
+                "exact",
+                "preconf_count",
+                "inc_block_number",
+                "key",
+                descending=[True, True, True, False],
+            )
+            groups.append(
+                {
+                    "entity": entity,
+                    "total": group.height,
+                    "score": ranked["exact"][0] + ranked["score"].max(),
+                    "results": ranked.head(limit)
+                    .select(
+                        "key",
+                        "bidHash",
+                        "inc_block_number",
+                        "preconf_count",
+                        "exact",
+                    )
+                    .to_dicts(),
+                }
+            )
+
+    groups.sort(key=lambda group: group["score"], reverse=True)
+    return {
+        "query": query,
+        "prefix": prefix,
+        "truncated": hi - lo > MAX_SCANNED_KEYS,
+        "groups": groups,
+    }
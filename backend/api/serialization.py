@@ -0,0 +1,331 @@
+# serialization.py
+
+import gzip
+import io
+import json
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Type, Union, get_args, get_origin
+import polars as pl
+import zstandard
+from fastapi import HTTPException, Request, Response
+from pydantic import BaseModel, create_model
+from api.metrics import STAGE_LATENCY
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 1024
+
+# Supported content codings, in order of preference when the client weighs them equally
+SUPPORTED_ENCODINGS = ("zstd", "gzip")
+
+# Columnar media types a client can ask for with the Accept header
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/x-parquet"
+_MEDIA_TYPE_FORMATS = {
+    ARROW_STREAM_MEDIA_TYPE: "arrow",
+    PARQUET_MEDIA_TYPE: "parquet",
+    "application/vnd.apache.parquet": "parquet",
+    "application/json": "json",
+}
+
+# ZstdCompressor instances must not be shared between threads, and sync endpoints
+# run in a thread pool, so each thread keeps its own
+_zstd_local = threading.local()
+
+# Column types of model fields that are missing from a frame and emitted as null
+_NULL_DTYPES = {str: pl.Utf8, int: pl.Int64, float: pl.Float64, bool: pl.Boolean}
+
+
+def _unwrap_optional(annotation):
+    """Return X for Optional[X], otherwise the annotation itself."""
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def model_select_exprs(model: Type[BaseModel], schema: pl.Schema) -> List[pl.Expr]:
+    """
+    Build polars expressions that shape a frame like the JSON of a pydantic model.
+
+    Columns are selected in model field order and cast to the JSON types pydantic
+    would emit, so the output matches the documented response schema without
+    validating each row. Fields missing from the frame are emitted as null.
+
+    Args:
+        model (Type[BaseModel]): The response item model.
+        schema (pl.Schema): Schema of the frame being serialized.
+
+    Returns:
+        List[pl.Expr]: One expression per model field.
+    """
+    exprs = []
+    for name, field in model.model_fields.items():
+        annotation = _unwrap_optional(field.annotation)
+        if name not in schema:
+            # Optional fields the frame does not carry, e.g. network
+            dtype = _NULL_DTYPES.get(annotation, pl.Null)
+            exprs.append(pl.lit(None, dtype=dtype).alias(name))
+            continue
+        col = pl.col(name)
+        if annotation is datetime:
+            # pydantic drops the fractional part when there are no microseconds
+            col = (
+                pl.when(col.dt.microsecond() == 0)
+                .then(col.dt.strftime("%Y-%m-%dT%H:%M:%S"))
+                .otherwise(col.dt.strftime("%Y-%m-%dT%H:%M:%S%.6f"))
+                .alias(name)
+            )
+        elif (
+            annotation is int
+            and schema[name].is_numeric()
+            and not schema[name].is_integer()
+        ):
+            # Float and DECIMAL columns (DuckDB literals, hypermanager casts) are
+            # written as 32.0 or "32.0"; pydantic emits 32. Integer columns of any
+            # width and signedness are written as JSON integers already.
+            col = col.cast(pl.Int64)
+        elif annotation is float:
+            col = col.cast(pl.Float64)
+        elif annotation is bool:
+            col = col.cast(pl.Boolean)
+        elif annotation is str:
+            col = col.cast(pl.Utf8)
+        exprs.append(col)
+    return exprs
+
+
+@lru_cache(maxsize=256)
+def _projected_model(model: Type[BaseModel], names: Tuple[str, ...]) -> Type[BaseModel]:
+    return create_model(
+        f"{model.__name__}Projection",
+        **{
+            name: (model.model_fields[name].annotation, model.model_fields[name])
+            for name in names
+        },
+    )
+
+
+def parse_fields(
+    fields: Optional[str],
+    model: Type[BaseModel],
+    presets: Optional[Dict[str, Type[BaseModel]]] = None,
+) -> Type[BaseModel]:
+    """
+    Resolve a `fields` query parameter to the response item model to serialize.
+
+    Args:
+        fields (Optional[str]): Comma separated field names of `model`, the name of
+            one of `presets`, or None for every field.
+        model (Type[BaseModel]): The full response item model.
+        presets (Optional[Dict[str, Type[BaseModel]]]): Named subsets of `model`.
+
+    Returns:
+        Type[BaseModel]: `model`, a preset, or a model with only the requested
+            fields in the requested order. Its fields are the columns to read.
+
+    Raises:
+        HTTPException: If a field is unknown or none is given, returns a 422 status
+            code.
+    """
+    if fields is None:
+        return model
+    if presets and fields in presets:
+        return presets[fields]
+    names = tuple(
+        dict.fromkeys(name.strip() for name in fields.split(",") if name.strip())
+    )
+    unknown = [name for name in names if name not in model.model_fields]
+    if not names or unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown fields {', '.join(unknown) or repr(fields)}; expected "
+            + ", ".join([*(presets or {}), *model.model_fields]),
+        )
+    return _projected_model(model, names)
+
+
+@STAGE_LATENCY.labels("serialization").time()
+def dataframe_to_json(df: pl.DataFrame, model: Type[BaseModel]) -> bytes:
+    """Serialize a frame to a JSON array of `model` objects straight from the columns."""
+    return df.select(model_select_exprs(model, df.schema)).write_json().encode()
+
+
+def preconfs_page_json(
+    page: int, limit: int, total: int, df: pl.DataFrame, model: Type[BaseModel]
+) -> bytes:
+    """Serialize one page of preconfs in the `PreconfsResponse` layout."""
+    data = dataframe_to_json(df, model)
+    return b'{"page":%d,"limit":%d,"total":%d,"data":%s}' % (page, limit, total, data)
+
+
+def lookup_json(df: pl.DataFrame, misses: Dict, model: Type[BaseModel]) -> bytes:
+    """Serialize a batch lookup in the `LookupResponse` layout."""
+    data = dataframe_to_json(df, model)
+    return b'{"found":%d,"data":%s,"misses":%s}' % (
+        df.height,
+        data,
+        json.dumps(misses, separators=(",", ":")).encode(),
+    )
+
+
+def _header_weights(header: str) -> Dict[str, float]:
+    """Parse a comma separated header like Accept or Accept-Encoding into {value: q}."""
+    weights: Dict[str, float] = {}
+    for item in header.split(","):
+        value, *params = item.split(";")
+        q = 1.0
+        for param in params:
+            name, _, raw = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(raw)
+                except ValueError:
+                    q = 0.0
+        weights[value.strip().lower()] = q
+    return weights
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the best supported content coding from an Accept-Encoding header.
+
+    Returns None if the client accepts none of the supported codings.
+    """
+    if not accept_encoding:
+        return None
+
+    weights = _header_weights(accept_encoding)
+    best, best_q = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """
+    Pick the response format ("json", "arrow" or "parquet") from an Accept header.
+
+    JSON is the default for missing or wildcard Accept headers.
+    """
+    if not accept:
+        return "json"
+
+    best, best_q = "json", 0.0
+    for media_type, q in _header_weights(accept).items():
+        fmt = _MEDIA_TYPE_FORMATS.get(media_type)
+        if fmt is not None and q > best_q:
+            best, best_q = fmt, q
+    return best
+
+
+@STAGE_LATENCY.labels("serialization").time()
+def dataframe_to_arrow_ipc(df: pl.DataFrame) -> bytes:
+    """Serialize a frame as an Arrow IPC stream."""
+    buffer = io.BytesIO()
+    df.write_ipc_stream(buffer)
+    return buffer.getvalue()
+
+
+@STAGE_LATENCY.labels("serialization").time()
+def dataframe_to_parquet(df: pl.DataFrame) -> bytes:
+    """Serialize a frame as a zstd compressed Parquet file."""
+    buffer = io.BytesIO()
+    df.write_parquet(buffer, compression="zstd")
+    return buffer.getvalue()
+
+
+@STAGE_LATENCY.labels("compression").time()
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body with the given content coding."""
+    if encoding == "zstd":
+        compressor = getattr(_zstd_local, "compressor", None)
+        if compressor is None:
+            compressor = _zstd_local.compressor = zstandard.ZstdCompressor(level=3)
+        return compressor.compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=5)
+    raise ValueError(f"Unsupported content coding: {encoding}")
+
+
+def encoded_response(
+    body: bytes,
+    media_type: str,
+    request: Request,
+    response: Optional[Response] = None,
+    compressible: bool = True,
+) -> Response:
+    """
+    Wrap a pre-serialized body in a Response, compressed as negotiated with the client.
+
+    Headers already set on `response` (e.g. ETag) are carried over, since FastAPI does
+    not merge them into responses returned directly from an endpoint.
+    """
+    headers = dict(response.headers) if response is not None else {}
+    headers["Vary"] = "Accept, Accept-Encoding"
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if compressible and encoding and len(body) >= MIN_COMPRESS_SIZE:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def columnar_response(
+    df: pl.DataFrame,
+    fmt: str,
+    request: Request,
+    response: Optional[Response] = None,
+) -> Response:
+    """
+    Return a frame as Arrow IPC or Parquet without any per-row conversion.
+
+    Args:
+        df (pl.DataFrame): The frame to send.
+        fmt (str): Either "arrow" or "parquet", as returned by `negotiate_format`.
+        request (Request): The incoming request, used for content coding negotiation.
+        response (Optional[Response]): Response whose headers should be carried over.
+
+    Returns:
+        Response: The serialized frame.
+    """
+    if fmt == "arrow":
+        return encoded_response(
+            dataframe_to_arrow_ipc(df), ARROW_STREAM_MEDIA_TYPE, request, response
+        )
+    if fmt == "parquet":
+        # Parquet pages are already zstd compressed
+        return encoded_response(
+            dataframe_to_parquet(df),
+            PARQUET_MEDIA_TYPE,
+            request,
+            response,
+            compressible=False,
+        )
+    raise ValueError(f"Unsupported columnar format: {fmt}")
+
+
+def query_json(result: Dict) -> bytes:
+    """Serialize the result of an ad-hoc query in the `QueryResponse` layout."""
+    df = result["data"]
+    header = {
+        "columns": [
+            {"name": name, "type": str(dtype)} for name, dtype in df.schema.items()
+        ],
+        "row_count": df.height,
+        "truncated": result["truncated"],
+        "cached": result["cached"],
+        "generation": result["generation"],
+        "elapsed_seconds": round(result["elapsed_seconds"], 6),
+    }
+    with STAGE_LATENCY.labels("serialization").time():
+        data = df.write_json().encode()
+    # The rows are spliced in as written by polars, after the other fields
+    return (
+        json.dumps(header, separators=(",", ":")).encode()[:-1] + b',"data":%s}' % data
+    )
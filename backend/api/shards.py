@@ -0,0 +1,157 @@
+# shards.py
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+from fastapi import HTTPException, Query, Request
+from db_lock import LOCKFILE_PATH, shard_lockfile
+from watermark import watermark_token
+
+# Network (shard) name -> DuckDB file written by that network's ingest worker, from
+# NETWORKS="mainnet=/app/db/data/mainnet/mev_commit.duckdb,testnet=/app/db/...".
+# Without it the single database at DATABASE_URL is served as one network.
+DEFAULT_DB_FILENAME = os.getenv("DATABASE_URL", "/app/db_data/mev_commit.duckdb")
+
+
+def parse_shards(spec: str) -> Dict[str, str]:
+    """Parse a NETWORKS value of comma separated name=path pairs."""
+    shards = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, path = item.partition("=")
+        if not name.strip() or not path.strip():
+            raise ValueError(f"Invalid NETWORKS entry {item!r}, expected name=path")
+        shards[name.strip()] = path.strip()
+    return shards
+
+
+SHARDS = parse_shards(os.getenv("NETWORKS", "")) or {"default": DEFAULT_DB_FILENAME}
+
+# Network served when a request does not name one
+DEFAULT_NETWORK = os.getenv("DEFAULT_NETWORK", next(iter(SHARDS)))
+if DEFAULT_NETWORK not in SHARDS:
+    raise ValueError(f"DEFAULT_NETWORK {DEFAULT_NETWORK!r} is not one of NETWORKS")
+
+# Pseudo network that fans a request out to every shard
+ALL_NETWORKS = "all"
+
+# Routes that can fan out; every other route serves a single network
+FAN_OUT_ROUTES = {"/preconfs", "/preconfs/bulk", "/preconfs/lookup"}
+
+# Network the current request reads, set by select_network
+_current_network: ContextVar[str] = ContextVar("network", default=DEFAULT_NETWORK)
+
+# Shared by all requests so a fan-out costs no thread start-up
+_fan_out_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("FAN_OUT_WORKERS", str(4 * len(SHARDS)))),
+    thread_name_prefix="fan-out",
+)
+
+
+def current_network() -> str:
+    """Name of the network the current request reads, or ALL_NETWORKS."""
+    return _current_network.get()
+
+
+def current_db_filename() -> str:
+    """DuckDB file of the network the current request reads."""
+    return SHARDS[_current_network.get()]
+
+
+def current_lockfile() -> str:
+    """
+    Lock file guarding the current network's database.
+
+    Every shard has its own lock next to its database, so the networks are written
+    and read independently. The single network layout keeps the DUCKDB_LOCKFILE lock.
+    """
+    network = _current_network.get()
+    if network == DEFAULT_NETWORK and SHARDS[network] == DEFAULT_DB_FILENAME:
+        return LOCKFILE_PATH
+    return shard_lockfile(os.path.dirname(SHARDS[network]))
+
+
+def is_fan_out() -> bool:
+    """Whether the current request reads every network."""
+    return _current_network.get() == ALL_NETWORKS
+
+
+def data_token() -> str:
+    """Watermark token of the data the current request reads, across shards if it fans out."""
+    if is_fan_out():
+        return ",".join(watermark_token(path) for path in SHARDS.values())
+    return watermark_token(current_db_filename())
+
+
+@contextmanager
+def use_network(network: str) -> Iterator[None]:
+    """Read the given network within the block."""
+    token = _current_network.set(network)
+    try:
+        yield
+    finally:
+        _current_network.reset(token)
+
+
+async def select_network(
+    request: Request,
+    network: Optional[str] = Query(
+        None,
+        description="Network to read (default: the configured default network). "
+        "`all` merges every network on /preconfs, /preconfs/bulk and /preconfs/lookup.",
+    ),
+) -> None:
+    """
+    App-wide dependency selecting the network a request reads.
+
+    It is async so the network set here carries over into sync endpoints, which
+    run in the thread pool with a copy of this context.
+
+    Raises:
+        HTTPException: If the network is unknown, or is `all` on a route that
+            serves a single network, returns a 422 status code.
+    """
+    if network is None:
+        return
+    if network == ALL_NETWORKS:
+        if request.url.path not in FAN_OUT_ROUTES:
+            raise HTTPException(
+                status_code=422,
+                detail=f"network={ALL_NETWORKS} is only supported on "
+                + ", ".join(sorted(FAN_OUT_ROUTES)),
+            )
+    elif network not in SHARDS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown network {network!r}, expected one of "
+            + ", ".join([*SHARDS, ALL_NETWORKS]),
+        )
+    _current_network.set(network)
+
+
+def _call_in_network(network: str, fn: Callable, args: tuple) -> Any:
+    with use_network(network):
+        return fn(*args)
+
+
+def fan_out(fn: Callable, *args) -> Dict[str, Any]:
+    """
+    Call `fn(*args)` on every network in parallel.
+
+    Each call runs in its own thread with its network selected, so the shards are
+    queried concurrently and each under its own lock.
+
+    Returns:
+        Dict[str, Any]: The result of each call, by network.
+
+    Raises:
+        Exception: The first error raised by any of the calls.
+    """
+    futures = {
+        network: _fan_out_pool.submit(_call_in_network, network, fn, args)
+        for network in SHARDS
+    }
+    return {network: future.result() for network, future in futures.items()}
@@ -0,0 +1,230 @@
+"""
+Benchmark the backend database functions and endpoint handlers on synthetic fixtures.
+
+Each case runs in a fresh process so its peak memory can be measured on its own.
+Results are written as JSON with stable ordering, and `--compare` prints the change
+against a previous run.
+
+Run from the backend directory:
+    PYTHONPATH=../common python -m benchmarks.bench_queries --scales 100k 1m \\
+        --output benchmarks/results/$(git rev-parse --short HEAD).json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import duckdb
+from benchmarks.fixtures import SCALES, fixture_path, generate_fixture, today_utc
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Case name -> (kind, target). "db" cases call a function in api.database with keyword
+# arguments, "http" cases send a GET through the FastAPI app in-process. Values in
+# braces are filled in from the fixture.
+CASES = {
+    "db.load_commitments_df": ("db", ("load_commitments_df", {})),
+    "db.get_commitments.hash": ("db", ("get_commitments", {"hash": "{bid_hash}"})),
+    "db.get_commitments.block_number_l1": (
+        "db",
+        ("get_commitments", {"block_number_l1": "{block_number_l1}"}),
+    ),
+    "http.tables": ("http", "/tables"),
+    "http.table_schema": ("http", "/tables/commit_stores/schema"),
+    "http.table_stats": ("http", "/tables/stats"),
+    "http.preconfs.page1": ("http", "/preconfs?page=1&limit=50"),
+    "http.preconfs.page100": ("http", "/preconfs?page=100&limit=100"),
+    "http.preconfs.hash": ("http", "/preconfs?hash={bid_hash}"),
+    "http.preconfs.block": ("http", "/preconfs?block_number_l1={block_number_l1}"),
+    "http.aggregations": ("http", "/preconfs/aggregations"),
+    "http.aggregations.days7": ("http", "/preconfs/aggregations?days=7"),
+    "http.aggregations.bidder": ("http", "/preconfs/aggregations?bidder={bidder}"),
+    "http.aggregations.provider": (
+        "http",
+        "/preconfs/aggregations?provider={committer}&days=30",
+    ),
+}
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def fixture_params(db_filename: str) -> Dict[str, str]:
+    """Pick realistic filter values (the busiest bidder, a real hash...) from a fixture."""
+    with duckdb.connect(db_filename, read_only=True) as conn:
+        bidder, committer = conn.execute("""
+            SELECT bidder, commiter FROM commit_stores
+            GROUP BY ALL ORDER BY COUNT(*) DESC LIMIT 1
+            """).fetchone()
+        bid_hash, block_number_l1 = conn.execute("""
+            SELECT cs.bidHash, l1.block_number
+            FROM commit_stores cs
+            JOIN l1_transactions l1 ON l1.hash = '0x' || cs.txnHash
+            ORDER BY cs.block_number DESC LIMIT 1
+            """).fetchone()
+    return {
+        "bidder": bidder,
+        "committer": committer,
+        "bid_hash": bid_hash,
+        "block_number_l1": str(block_number_l1),
+    }
+
+
+def _run_case(db_filename: str, case: str, params: Dict[str, str], repeat: int) -> Dict:
+    """Run one case in the current (fresh) process and return its measurements."""
+    os.environ["DATABASE_URL"] = db_filename
+    os.environ.setdefault(
+        "DUCKDB_LOCKFILE", os.path.join(os.path.dirname(db_filename), "duckdb_lock")
+    )
+
+    from api import database
+    from api.main import app
+    from fastapi.testclient import TestClient
+
+    kind, target = CASES[case]
+    if kind == "db":
+        name, kwargs = target
+        kwargs = {
+            key: (
+                int(value.format(**params))
+                if key == "block_number_l1"
+                else value.format(**params)
+            )
+            for key, value in kwargs.items()
+        }
+        func = getattr(database, name)
+        call = lambda: func(**kwargs)
+    else:
+        client = TestClient(app)
+        url = target.format(**params)
+
+        def call():
+            response = client.get(url, headers={"Accept-Encoding": "identity"})
+            response.raise_for_status()
+            return response.content
+
+    baseline_rss = _peak_rss_mb()
+    timings = []
+    # The first call is a warm-up and is not timed
+    for _ in range(repeat + 1):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings = timings[1:]
+    peak_rss = _peak_rss_mb()
+
+    return {
+        "case": case,
+        "ms_min": round(min(timings), 3),
+        "ms_median": round(statistics.median(timings), 3),
+        "ms_max": round(max(timings), 3),
+        "peak_rss_mb": round(peak_rss, 1),
+        "peak_rss_delta_mb": round(peak_rss - baseline_rss, 1),
+    }
+
+
+def run_suite(
+    scales: List[str], cases: List[str], fixtures_dir: str, repeat: int
+) -> Dict:
+    """Run the selected cases at each scale, generating missing fixtures first."""
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for scale in scales:
+        db_filename = fixture_path(fixtures_dir, scale)
+        if not os.path.exists(db_filename):
+            print(f"Generating {scale} fixture at {db_filename}...")
+            generate_fixture(db_filename, SCALES[scale], today_utc())
+        params = fixture_params(db_filename)
+
+        for case in cases:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(
+                    _run_case, db_filename, case, params, repeat
+                ).result()
+            result["scale"] = scale
+            results.append(result)
+            print(
+                f"{scale:>5} {case:<38} median {result['ms_median']:>10.2f} ms"
+                f"  peak +{result['peak_rss_delta_mb']:>8.1f} MB"
+            )
+
+    return {"meta": _metadata(repeat), "results": results}
+
+
+def _metadata(repeat: int) -> Dict:
+    import polars
+
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+
+    return {
+        "revision": revision,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "polars": polars.__version__,
+        "duckdb": duckdb.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "repeat": repeat,
+    }
+
+
+def compare(current: Dict, previous: Dict) -> None:
+    """Print the median latency and peak memory change of each case against a previous run."""
+    before = {(r["scale"], r["case"]): r for r in previous["results"]}
+    print(f"\n{'scale':>5} {'case':<38} {'median ms':>22} {'peak MB':>20}")
+    for result in current["results"]:
+        old: Optional[Dict] = before.get((result["scale"], result["case"]))
+        if old is None:
+            continue
+        ratio = (
+            result["ms_median"] / old["ms_median"] if old["ms_median"] else float("nan")
+        )
+        print(
+            f"{result['scale']:>5} {result['case']:<38} "
+            f"{old['ms_median']:>9.2f} -> {result['ms_median']:>9.2f} "
+            f"({ratio:>5.2f}x) {old['peak_rss_delta_mb']:>8.1f} -> {result['peak_rss_delta_mb']:>8.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["100k"])
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--fixtures-dir", default=DEFAULT_FIXTURES_DIR)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="Previous results JSON to compare against.")
+    args = parser.parse_args()
+
+    report = run_suite(args.scales, args.cases, args.fixtures_dir, args.repeat)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare the pydantic response path against the columnar JSON path for /preconfs.
+
+Run from the backend directory:
+    PYTHONPATH=../common python -m benchmarks.bench_serialization --rows 50 100 1000
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+import polars as pl
+from api.models import PreconfDataItem, PreconfsResponse
+from api.serialization import compress, preconfs_page_json
+
+
+def example_frame(rows: int) -> pl.DataFrame:
+    """Build a frame of `rows` preconfs from the documented response example."""
+    example = dict(
+        PreconfsResponse.model_fields["data"].json_schema_extra["example"][0]
+    )
+    example["date"] = datetime.fromisoformat(example["date"])
+    df = pl.DataFrame([example] * rows)
+    # Vary a few columns so the encoders can't cheat on repeated values
+    return df.with_columns(
+        (pl.col("bid") + pl.int_range(rows)).alias("bid"),
+        (pl.col("bid_eth") * (1 + pl.int_range(rows) / rows)).alias("bid_eth"),
+        (pl.col("inc_block_number") + pl.int_range(rows)).alias("inc_block_number"),
+    )
+
+
+def pydantic_path(df: pl.DataFrame) -> bytes:
+    """The previous path: to_dicts, per-row model validation, stdlib JSON encoder."""
+    payload = {"page": 1, "limit": df.height, "total": df.height, "data": df.to_dicts()}
+    content = PreconfsResponse.model_validate(payload).model_dump(mode="json")
+    return json.dumps(content, separators=(",", ":")).encode()
+
+
+def columnar_path(df: pl.DataFrame) -> bytes:
+    """The columnar path used by /preconfs."""
+    return preconfs_page_json(1, df.height, df.height, df, PreconfDataItem)
+
+
+def time_it(fn: Callable[[], bytes], repeat: int) -> Dict[str, float]:
+    """Return the best wall time in milliseconds and the output size of `fn`."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - start)
+    return {"ms": best * 1000, "bytes": len(body)}
+
+
+def run(rows_list: List[int], repeat: int) -> None:
+    print(f"{'rows':>8} {'path':<18} {'ms':>10} {'bytes':>12}")
+    for rows in rows_list:
+        df = example_frame(rows)
+        body = columnar_path(df)
+        cases = {
+            "pydantic": lambda: pydantic_path(df),
+            "columnar": lambda: columnar_path(df),
+            "columnar+gzip": lambda: compress(columnar_path(df), "gzip"),
+            "columnar+zstd": lambda: compress(columnar_path(df), "zstd"),
+        }
+        for name, fn in cases.items():
+            result = time_it(fn, repeat)
+            print(f"{rows:>8} {name:<18} {result['ms']:>10.2f} {result['bytes']:>12}")
+        assert json.loads(body) == json.loads(pydantic_path(df)), "paths disagree"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Generate deterministic synthetic mev-commit DuckDB fixtures for benchmarking.
+
+Builds encrypted_stores, commit_stores, commits_processed and l1_transactions with the
+column layout produced by hypermanager. Bidders, committers and builder graffiti follow
+skewed distributions, and a small share of commitments are incomplete (not yet
+opened, processed or enriched with their L1 transaction), like in production.
+
+Run from the backend directory:
+    python -m benchmarks.fixtures --commitments 1000000 --output /tmp/mev_commit_1m.duckdb
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime, timezone
+import duckdb
+
+# Scales used by the benchmark suite, by name
+SCALES = {"100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# Builder graffiti seen on L1, most frequent first. Includes an empty graffiti and one
+# that is not valid UTF-8 to exercise both decoding paths of byte_to_string.
+GRAFFITI = [
+    b"titanbuilder.xyz",
+    b"beaverbuild.org",
+    b"rsync-builder.xyz",
+    b"preconf.builder",
+    b"",
+    b"Illuminate Dmocratize Dstribute",
+    b"\xd8\x83\x01\x0e\x02\x84geth\x88go1.22.5\x85linux",
+]
+
+BIDDER_COUNT = 500
+COMMITTER_COUNT = 25
+MS_PER_DAY = 86_400_000
+
+
+def _uniform(seed: str) -> str:
+    """SQL for a deterministic uniform value in [0, 1) per row of range(n)."""
+    return f"(hash(i, '{seed}') % 1000000007) / 1000000007.0"
+
+
+def _hex(seed: str, nbytes: int) -> str:
+    """SQL for a deterministic 0x-prefixed hex string of `nbytes` per row."""
+    parts = " || ".join(
+        f"md5(i::VARCHAR || '{seed}{k}')" for k in range(-(-nbytes // 16))
+    )
+    return f"'0x' || substr({parts}, 1, {nbytes * 2})"
+
+
+def generate_fixture(
+    db_filename: str,
+    commitments: int,
+    end_date: datetime,
+    days: int = 30,
+) -> None:
+    """
+    Write a synthetic fixture with `commitments` commitments to `db_filename`.
+
+    Args:
+        db_filename (str): Path of the DuckDB file to create (overwritten if it exists).
+        commitments (int): Number of commitments to generate.
+        end_date (datetime): Timestamp of the most recent commitment.
+        days (int): Number of days of history the commitments are spread over.
+    """
+    if os.path.exists(db_filename):
+        os.remove(db_filename)
+    os.makedirs(os.path.dirname(os.path.abspath(db_filename)), exist_ok=True)
+
+    end_ms = int(end_date.timestamp() * 1000)
+    start_ms = end_ms - days * MS_PER_DAY
+    graffiti = ", ".join(f"'0x{g.hex()}'" for g in GRAFFITI)
+
+    with duckdb.connect(db_filename) as conn:
+        # One row per commitment with everything the four tables are derived from.
+        # Skewed choices use u^k so low indexes (the big bidders/builders) dominate.
+        conn.execute(f"""
+            CREATE TEMP TABLE base AS
+            SELECT
+                i,
+                {_hex('idx', 32)} AS commitmentIndex,
+                {_hex('tx', 32)} AS l1_hash,
+                '0x' || substr(md5('bidder' || floor(pow({_uniform('b')}, 3) * {BIDDER_COUNT})::VARCHAR), 1, 40) AS bidder,
+                '0x' || substr(md5('committer' || floor(pow({_uniform('c')}, 2) * {COMMITTER_COUNT})::VARCHAR), 1, 40) AS committer,
+                ({start_ms} + (i * {end_ms - start_ms}) // {max(commitments, 1)})::UBIGINT AS ts,
+                (10000000000000 + floor(pow({_uniform('bid')}, 4) * 50000000000000000))::UBIGINT AS bid,
+                floor({_uniform('dispatch')} * 40000)::BIGINT AS dispatch_offset,
+                -- The bid targets the first L1 slot after its dispatch, and a tenth
+                -- of the commitments land one slot late
+                ((ts + dispatch_offset) // 12000 + 1)::UBIGINT AS target_slot,
+                (target_slot + ({_uniform('late')} < 0.1)::UBIGINT)::UBIGINT AS l1_slot,
+                list_extract([{graffiti}], 1 + floor(pow({_uniform('g')}, 2) * {len(GRAFFITI)})::INTEGER) AS graffiti,
+                {_uniform('slash')} < 0.02 AS isSlash,
+                {_uniform('open')} < 0.97 AS opened,
+                {_uniform('proc')} < 0.99 AS processed,
+                {_uniform('l1')} < 0.99 AS enriched
+            FROM range({commitments}) t(i)
+            """)
+
+        conn.execute(f"""
+            CREATE TABLE encrypted_stores AS
+            SELECT
+                commitmentIndex,
+                committer,
+                {_hex('digest', 32)} AS commitmentDigest,
+                {_hex('csig', 65)} AS commitmentSignature,
+                (ts + dispatch_offset)::UBIGINT AS dispatchTimestamp,
+                {_hex('estx', 32)} AS hash,
+                (1000000 + i * 2)::UBIGINT AS block_number,
+                ts::UBIGINT AS timestamp
+            FROM base
+            """)
+
+        conn.execute(f"""
+            CREATE TABLE commit_stores AS
+            SELECT
+                commitmentIndex,
+                bidder,
+                committer AS commiter,
+                bid,
+                (2000000 + target_slot - {start_ms // 12000})::UBIGINT AS blockNumber,
+                {_hex('bidhash', 32)} AS bidHash,
+                ts::UBIGINT AS decayStartTimeStamp,
+                (ts + 36000)::UBIGINT AS decayEndTimeStamp,
+                substr(l1_hash, 3) AS txnHash,
+                '' AS revertingTxHashes,
+                {_hex('chash', 32)} AS commitmentHash,
+                {_hex('bsig', 65)} AS bidSignature,
+                {_hex('csig', 65)} AS commitmentSignature,
+                (ts + dispatch_offset)::UBIGINT AS dispatchTimestamp,
+                {_hex('secret', 32)} AS sharedSecretKey,
+                {_hex('cstx', 32)} AS hash,
+                (1000000 + i * 2 + 1)::UBIGINT AS block_number,
+                '0x' AS extra_data,
+                {_hex('to', 20)} AS "to",
+                bidder AS "from",
+                i::UBIGINT AS nonce,
+                2::UBIGINT AS type,
+                {_hex('bhash', 32)} AS block_hash,
+                (ts + 1000)::UBIGINT AS timestamp,
+                7.0::DOUBLE AS base_fee_per_gas,
+                100000::UBIGINT AS gas_used_block,
+                0.0::DOUBLE AS max_priority_fee_per_gas,
+                32.0::DOUBLE AS max_fee_per_gas,
+                7.0::DOUBLE AS effective_gas_price,
+                21000::UBIGINT AS gas_used,
+                17864::UBIGINT AS chain_id
+            FROM base
+            WHERE opened
+            """)
+
+        conn.execute(f"""
+            CREATE TABLE commits_processed AS
+            SELECT
+                commitmentIndex,
+                isSlash,
+                {_hex('cptx', 32)} AS hash,
+                (1000000 + i * 2 + 7)::UBIGINT AS block_number,
+                (ts + 15000)::UBIGINT AS timestamp
+            FROM base
+            WHERE processed
+            """)
+
+        conn.execute(f"""
+            CREATE TABLE l1_transactions AS
+            SELECT
+                l1_hash AS hash,
+                (2000000 + l1_slot - {start_ms // 12000})::UBIGINT AS block_number,
+                graffiti AS extra_data,
+                {_hex('l1to', 20)} AS "to",
+                {_hex('l1from', 20)} AS "from",
+                i::UBIGINT AS nonce,
+                2::UBIGINT AS type,
+                {_hex('l1block', 32)} AS block_hash,
+                (l1_slot * 12)::UBIGINT AS timestamp,
+                (5 + floor({_uniform('base')} * 30))::DOUBLE AS base_fee_per_gas,
+                (1000000 + floor({_uniform('gasblk')} * 29000000))::UBIGINT AS gas_used_block,
+                {_hex('beacon', 32)} AS parent_beacon_block_root,
+                floor({_uniform('prio')} * 3)::DOUBLE AS max_priority_fee_per_gas,
+                32.0::DOUBLE AS max_fee_per_gas,
+                8.0::DOUBLE AS effective_gas_price,
+                21000::UBIGINT AS gas_used
+            FROM base
+            WHERE opened AND enriched
+            """)
+        conn.execute("DROP TABLE base")
+        conn.execute("CHECKPOINT")
+
+
+def fixture_path(fixtures_dir: str, scale: str) -> str:
+    """Path of the cached fixture for a named scale."""
+    return os.path.join(fixtures_dir, f"mev_commit_{scale}.duckdb")
+
+
+def today_utc() -> datetime:
+    """Midnight UTC today, so fixtures built on the same day are identical."""
+    now = datetime.now(timezone.utc)
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commitments", type=int, default=SCALES["100k"])
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument(
+        "--end-date",
+        type=lambda value: datetime.fromisoformat(value).replace(tzinfo=timezone.utc),
+        default=None,
+        help="Timestamp of the newest commitment (default: midnight UTC today).",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generate_fixture(
+        args.output, args.commitments, args.end_date or today_utc(), args.days
+    )
+    print(
+        f"Wrote {args.commitments} commitments to {args.output} in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
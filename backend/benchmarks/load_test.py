@@ -0,0 +1,272 @@
+"""
+Replay a realistic traffic mix against a running backend at a given concurrency.
+
+Filter values (bid hashes, L1 blocks, bidders, providers) are sampled from the
+backend's own /preconfs so every request hits real data, e.g. a backend serving a
+synthetic fixture from benchmarks/fixtures.py. Reports p50/p95/p99 latency,
+throughput and error rate per scenario and overall.
+
+Run from the backend directory:
+    python -m benchmarks.load_test --base-url http://localhost:8000 \\
+        --concurrency 1 8 32 --duration 30 --mix mixed
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List
+import httpx
+
+# Scenario name -> weight, per traffic mix
+MIXES = {
+    # The explorer front page: mostly the first few pages and the aggregations
+    "dashboard": {"paging": 70, "aggregations": 25, "aggregations_days": 5},
+    # Users looking up a specific preconf or block
+    "search": {"hash_search": 60, "block_search": 40},
+    # Everything, weighted like production traffic
+    "mixed": {
+        "paging": 40,
+        "hash_search": 15,
+        "block_search": 10,
+        "aggregations": 10,
+        "aggregations_days": 10,
+        "aggregations_bidder": 10,
+        "aggregations_provider": 5,
+    },
+}
+
+# Requests are successful when the status is one of these
+OK_STATUSES = (200, 304)
+
+
+def _paging(rng: random.Random, samples: Dict[str, List]) -> tuple:
+    # Most visitors stay on the first pages
+    page = int(rng.paretovariate(1.5))
+    return "/preconfs", {"page": min(page, 200), "limit": 50}
+
+
+def _hash_search(rng: random.Random, samples: Dict[str, List]) -> tuple:
+    return "/preconfs", {"hash": rng.choice(samples["hashes"])}
+
+
+def _block_search(rng: random.Random, samples: Dict[str, List]) -> tuple:
+    return "/preconfs", {"block_number_l1": rng.choice(samples["blocks"])}
+
+
+def _aggregations(rng: random.Random, samples: Dict[str, List]) -> tuple:
+    return "/preconfs/aggregations", {}
+
+
+def _aggregations_days(rng: random.Random, samples: Dict[str, List]) -> tuple:
+    return "/preconfs/aggregations", {"days": rng.choice([1, 7, 30])}
+
+
+def _aggregations_bidder(rng: random.Random, samples: Dict[str, List]) -> tuple:
+    return "/preconfs/aggregations", {
+        "bidder": rng.choice(samples["bidders"]),
+        "days": rng.choice([7, 30]),
+    }
+
+
+def _aggregations_provider(rng: random.Random, samples: Dict[str, List]) -> tuple:
+    return "/preconfs/aggregations", {"provider": rng.choice(samples["providers"])}
+
+
+SCENARIOS: Dict[str, Callable[[random.Random, Dict[str, List]], tuple]] = {
+    "paging": _paging,
+    "hash_search": _hash_search,
+    "block_search": _block_search,
+    "aggregations": _aggregations,
+    "aggregations_days": _aggregations_days,
+    "aggregations_bidder": _aggregations_bidder,
+    "aggregations_provider": _aggregations_provider,
+}
+
+
+async def sample_values(client: httpx.AsyncClient, pages: int = 20) -> Dict[str, List]:
+    """
+    Collect filter values for the scenarios from the first pages of /preconfs.
+
+    Args:
+        client (httpx.AsyncClient): Client pointed at the backend.
+        pages (int): Number of 100-row pages to sample.
+
+    Returns:
+        Dict[str, List]: Distinct hashes, L1 blocks, bidders and providers.
+    """
+    samples = defaultdict(set)
+    for page in range(1, pages + 1):
+        response = await client.get("/preconfs", params={"page": page, "limit": 100})
+        response.raise_for_status()
+        for preconf in response.json()["data"]:
+            samples["hashes"].add(preconf["bidHash"])
+            samples["blocks"].add(preconf["block_number_l1"])
+            samples["bidders"].add(preconf["bidder"])
+            samples["providers"].add(preconf["committer"])
+    if not samples["hashes"]:
+        raise RuntimeError("The backend returned no preconfs to sample from")
+    return {key: sorted(values) for key, values in samples.items()}
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    index = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    """Latency percentiles (ms), throughput (req/s) and error rate of a set of requests."""
+    latencies = sorted(latencies)
+    total = len(latencies)
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else float("nan"),
+    }
+
+
+async def run_level(
+    base_url: str,
+    mix: Dict[str, int],
+    samples: Dict[str, List],
+    concurrency: int,
+    duration: float,
+    seed: int,
+    timeout: float,
+) -> Dict:
+    """
+    Run `concurrency` closed-loop clients for `duration` seconds.
+
+    Each client picks a scenario by weight, sends the request and immediately sends
+    the next one once the response body has been read.
+
+    Returns:
+        Dict: The overall summary and one summary per scenario.
+    """
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    error_samples = []
+
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=timeout
+    ) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(worker_id: int):
+            rng = random.Random(seed * 1_000_003 + worker_id)
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                path, params = SCENARIOS[name](rng, samples)
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path, params=params)
+                    failed = response.status_code not in OK_STATUSES
+                    if failed and len(error_samples) < 5:
+                        error_samples.append(f"{response.status_code} {response.url}")
+                except httpx.HTTPError as e:
+                    failed = True
+                    if len(error_samples) < 5:
+                        error_samples.append(f"{type(e).__name__} {path} {params}")
+                latencies[name].append((time.perf_counter() - start) * 1000)
+                errors[name] += failed
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "overall": summarize(all_latencies, sum(errors.values()), elapsed),
+        "scenarios": {
+            name: summarize(latencies[name], errors[name], elapsed)
+            for name in names
+            if latencies[name]
+        },
+        "error_samples": error_samples,
+    }
+
+
+def print_level(result: Dict) -> None:
+    print(f"\nconcurrency {result['concurrency']} ({result['duration_s']}s)")
+    print(
+        f"{'scenario':<24} {'requests':>9} {'rps':>9} {'err%':>7}"
+        f" {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    )
+    rows = list(result["scenarios"].items()) + [("overall", result["overall"])]
+    for name, summary in rows:
+        print(
+            f"{name:<24} {summary['requests']:>9} {summary['throughput_rps']:>9.1f}"
+            f" {summary['error_rate'] * 100:>6.2f}% {summary['p50_ms']:>9.1f}"
+            f" {summary['p95_ms']:>9.1f} {summary['p99_ms']:>9.1f}"
+        )
+    for sample in result["error_samples"]:
+        print(f"  error: {sample}")
+
+
+async def run(args) -> Dict:
+    async with httpx.AsyncClient(
+        base_url=args.base_url, timeout=args.timeout
+    ) as client:
+        samples = await sample_values(client)
+
+    levels = []
+    for concurrency in args.concurrency:
+        result = await run_level(
+            args.base_url,
+            MIXES[args.mix],
+            samples,
+            concurrency,
+            args.duration,
+            args.seed,
+            args.timeout,
+        )
+        print_level(result)
+        levels.append(result)
+
+    return {
+        "base_url": args.base_url,
+        "mix": args.mix,
+        "seed": args.seed,
+        "levels": levels,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument(
+        "--duration", type=float, default=30, help="Seconds per concurrency level."
+    )
+    parser.add_argument("--mix", choices=list(MIXES), default="mixed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--output", help="Write results to this JSON file.")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
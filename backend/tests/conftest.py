@@ -0,0 +1,33 @@
+import os
+import shutil
+import tempfile
+import pytest
+
+# The API reads its database and lock paths when it is imported, so they are set
+# before any test module imports it
+DATA_DIR = tempfile.mkdtemp(prefix="mev-commit-tests-")
+os.environ["DATABASE_URL"] = os.path.join(DATA_DIR, "mev_commit.duckdb")
+os.environ["DUCKDB_LOCKFILE"] = os.path.join(DATA_DIR, "duckdb_lock")
+os.environ.pop("NETWORKS", None)
+
+# Small enough to build in well under a second
+FIXTURE_COMMITMENTS = 2000
+
+
+@pytest.fixture(scope="session")
+def fixture_db():
+    """The synthetic fixture of the benchmarks, as the API's database."""
+    from benchmarks.fixtures import generate_fixture, today_utc
+
+    db_filename = os.environ["DATABASE_URL"]
+    generate_fixture(db_filename, FIXTURE_COMMITMENTS, today_utc(), days=3)
+    yield db_filename
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client(fixture_db):
+    from fastapi.testclient import TestClient
+    from api.main import app
+
+    return TestClient(app)
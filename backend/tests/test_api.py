@@ -0,0 +1,156 @@
+import polars as pl
+import pytest
+
+# Routes that must answer on a database the pipeline has not post-processed yet
+GET_ROUTES = [
+    "/health/live",
+    "/tables",
+    "/tables/stats",
+    "/tables/commit_stores/stats",
+    "/tables/commit_stores/schema",
+    "/preconfs?limit=5",
+    "/preconfs?limit=5&fields=compact",
+    "/preconfs/bulk?limit=5",
+    "/preconfs/aggregations",
+    "/preconfs/aggregations?group_by_field=committer",
+    "/leaderboards/providers",
+    "/blocks?limit=5",
+    "/pipeline/runs/summary",
+]
+
+
+@pytest.mark.parametrize("route", GET_ROUTES)
+def test_get_routes(client, route):
+    response = client.get(route)
+    assert response.status_code == 200, response.text
+
+
+def test_preconfs_page(client):
+    body = client.get("/preconfs", params={"limit": 5}).json()
+    assert body["total"] > 0
+    assert len(body["data"]) == 5
+    row = body["data"][0]
+    assert isinstance(row["gas_used_l1"], int)
+    assert isinstance(row["bid_eth"], float)
+
+
+def test_preconfs_conditional_request(client):
+    response = client.get("/preconfs", params={"limit": 5})
+    etag = response.headers["etag"]
+    assert (
+        client.get(
+            "/preconfs", params={"limit": 5}, headers={"If-None-Match": etag}
+        ).status_code
+        == 304
+    )
+
+
+def test_preconfs_arrow(client):
+    import io
+    import polars as pl
+
+    response = client.get(
+        "/preconfs/bulk",
+        params={"limit": 5},
+        headers={"Accept": "application/vnd.apache.arrow.stream"},
+    )
+    assert response.status_code == 200
+    assert pl.read_ipc_stream(io.BytesIO(response.content)).height == 5
+
+
+def test_lookup_and_search(client):
+    row = client.get("/preconfs", params={"limit": 1}).json()["data"][0]
+    lookup = client.post("/preconfs/lookup", json={"bid_hashes": [row["bidHash"]]})
+    assert lookup.status_code == 200
+    assert lookup.json()["found"] >= 1
+
+    search = client.get("/search", params={"q": row["bidHash"][:10]})
+    assert search.status_code == 200
+
+
+def test_export_csv(client):
+    response = client.get("/preconfs/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.text.count("\n") > 1
+
+
+def test_export_chunks_and_cursor(client):
+    from api.database import iter_commitment_chunks
+
+    chunks = list(iter_commitment_chunks(chunk_size=300))
+    assert all(chunk.height <= 300 for chunk in chunks)
+    rows = pl.concat(chunks)
+    keys = rows.select("block_number", "commitmentIndex")
+    assert keys.equals(keys.sort("block_number", "commitmentIndex"))
+
+    # Resuming after a row returns exactly the rows after it
+    cursor = keys.row(rows.height // 2)
+    rest = pl.concat(list(iter_commitment_chunks(cursor=cursor, chunk_size=300)))
+    assert rest.height == rows.height - rows.height // 2 - 1
+    assert rest.row(0, named=True) == rows.row(rows.height // 2 + 1, named=True)
+
+
+@pytest.mark.parametrize(
+    "route, status",
+    [
+        ("/tables/nosuch/stats", 404),
+        ("/preconfs?fields=nosuch", 422),
+        ("/search?q=zz", 422),
+        ("/preconfs/aggregations/distribution", 503),
+        ("/providers/performance", 503),
+    ],
+)
+def test_errors(client, route, status):
+    assert client.get(route).status_code == status
+
+
+def test_new_commitments_include_late_l1_transactions(client):
+    from api.database import get_new_commitments
+
+    _, blocks = get_new_commitments()
+    assert get_new_commitments(blocks)[0].is_empty()
+
+    # Events already seen, L1 transactions merged since: the commitments they
+    # complete are new
+    since = {**blocks, "l1_transactions": blocks["l1_transactions"] - 5}
+    df, _ = get_new_commitments(since)
+    assert not df.is_empty()
+    assert (df["block_number_l1"] > since["l1_transactions"]).all()
+
+
+def test_load_test_samples_match_their_filters(client):
+    import asyncio
+    import httpx
+    from api.main import app
+    from benchmarks.load_test import sample_values
+
+    async def sample():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await sample_values(c, pages=1)
+
+    samples = asyncio.run(sample())
+    for block in samples["blocks"]:
+        body = client.get("/preconfs", params={"block_number_l1": block}).json()
+        assert body["total"] > 0
+
+
+def test_aggregations_window_is_whole_days(client):
+    every_day = {
+        row["group_by_value"]: row["preconf_count"]
+        for row in client.get("/preconfs/aggregations").json()
+    }
+    window = client.get("/preconfs/aggregations", params={"days": 2}).json()
+    assert 0 < len(window) < len(every_day)
+    # The first day of the window is counted in full, as its sketch is
+    for row in window:
+        assert row["preconf_count"] == every_day[row["group_by_value"]]
+
+
+def test_network_only_projection(client):
+    # The network is not stored, so a single network has nothing to project
+    assert client.get("/preconfs?fields=network").status_code == 422
+
+    body = client.get("/preconfs?network=all&limit=5&fields=network").json()
+    assert body["total"] > 0
+    assert body["data"] == [{"network": "default"}] * 5
@@ -0,0 +1,112 @@
+import polars as pl
+import pytest
+from search_index import build_search_index
+from api import lookup
+from api.lookup import _resolve_hashes, lookup_all_networks, lookup_commitments
+
+
+def commitments():
+    # The txnHash of the second commitment is the bidHash of the first, and the
+    # last two share their L1 transaction
+    return pl.DataFrame(
+        {
+            "bidHash": ["0xaa01", "0xaa02", "0xaa03"],
+            "txnHash": ["0xbb01", "0xaa01", "0xaa01"],
+            "commitmentIndex": ["0xcc01", "0xcc02", "0xcc03"],
+            "commitmentDigest": ["0xdd01", "0xdd02", "0xdd03"],
+            "bidder": ["0xb1", "0xb1", "0xb2"],
+            "committer": ["0xc1", "0xc2", "0xc2"],
+            "inc_block_number": pl.Series([10, 11, 12], dtype=pl.UInt64),
+            "block_number_l1": pl.Series([10, 11, 13], dtype=pl.UInt64),
+            "date": pl.datetime_range(
+                pl.datetime(2024, 1, 1), pl.datetime(2024, 1, 3), "1d", eager=True
+            ),
+        }
+    )
+
+
+def resolved(index, entity, hashes):
+    return (
+        _resolve_hashes(index, entity, hashes)
+        .group_by("position")
+        .agg(pl.col("bidHash").drop_nulls().sort())
+        .sort("position")["bidHash"]
+        .to_list()
+    )
+
+
+def test_resolve_hashes():
+    index = build_search_index(commitments())
+
+    # Keys are normalized, duplicates each get their row, and keys of another
+    # entity do not match
+    assert resolved(index, "bidHash", ["AA01", "0xaa01", "0xbb01", "0xff"]) == [
+        ["0xaa01"],
+        ["0xaa01"],
+        [],
+        [],
+    ]
+    # A transaction hash maps to every commitment it carries
+    assert resolved(index, "txnHash", ["0xaa01", "0xBB01"]) == [
+        ["0xaa02", "0xaa03"],
+        ["0xaa01"],
+    ]
+
+
+def test_resolve_hashes_in_an_empty_index():
+    index = build_search_index(commitments().clear())
+    assert resolved(index, "bidHash", ["0xaa01", "0xaa01"]) == [[], []]
+
+
+@pytest.fixture
+def network(monkeypatch):
+    df = commitments()
+    monkeypatch.setattr(lookup, "load_commitments_df", lambda: df)
+    monkeypatch.setattr(lookup, "get_search_index", lambda: build_search_index(df))
+
+
+def test_lookup_misses(network):
+    result = lookup_commitments(["0xAA01", "0xbb01", "0xaa09"], ["aa01"], [13, 14])
+    assert sorted(result["data"]["bidHash"].to_list()) == [
+        "0xaa01",
+        "0xaa02",
+        "0xaa03",
+    ]
+    assert result["misses"] == {
+        "bid_hashes": ["0xbb01", "0xaa09"],
+        "txn_hashes": [],
+        "block_numbers_l1": [14],
+    }
+
+
+def test_lookup_all_networks_misses_what_every_network_misses(monkeypatch):
+    empty = commitments().clear()
+    results = {
+        "mainnet": {
+            "data": commitments().head(1),
+            "misses": {
+                "bid_hashes": ["0xaa02", "0xaa09"],
+                "txn_hashes": ["0xbb01"],
+                "block_numbers_l1": [11, 14],
+            },
+        },
+        "testnet": {
+            "data": empty,
+            "misses": {
+                "bid_hashes": ["0xaa01", "0xaa02", "0xaa09"],
+                "txn_hashes": [],
+                "block_numbers_l1": [10, 11, 14],
+            },
+        },
+    }
+    monkeypatch.setattr(lookup, "fan_out", lambda *args: results)
+
+    merged = lookup_all_networks(
+        ["0xaa01", "0xaa02", "0xaa09"], ["0xbb01"], [10, 11, 14]
+    )
+    assert merged["data"]["network"].to_list() == ["mainnet"]
+    assert merged["misses"] == {
+        "bid_hashes": ["0xaa02", "0xaa09"],
+        "txn_hashes": [],
+        "block_numbers_l1": [11, 14],
+    }
@@ -0,0 +1,150 @@
+import threading
+from collections import OrderedDict
+import polars as pl
+import pytest
+from fastapi import HTTPException
+from snapshot import publish_snapshot
+from watermark import write_watermark
+from api import query
+
+SLOW_SQL = "SELECT sum(a.range * b.range) FROM range(1000000) a, range(1000000) b"
+
+
+def commitments(n):
+    return pl.DataFrame(
+        {
+            "committer": [f"0xprovider{i % 3}" for i in range(n)],
+            "bid_eth": [i / 10 for i in range(n)],
+        }
+    )
+
+
+def publish(db_filename, n):
+    """Publish the next watermark generation with a snapshot of `n` commitments."""
+    generation = write_watermark(db_filename, {"commit_stores": n})["generation"]
+    publish_snapshot(db_filename, {"commitments": commitments(n)}, generation)
+    return generation
+
+
+@pytest.fixture
+def snapshot_db(tmp_path, monkeypatch):
+    """A database with a published snapshot, as the shard queries run against."""
+    db_filename = str(tmp_path / "mev_commit.duckdb")
+    monkeypatch.setattr(query, "current_db_filename", lambda: db_filename)
+    monkeypatch.setattr(query, "_cache", OrderedDict())
+    monkeypatch.setattr(query, "_cache_bytes", 0)
+    monkeypatch.setattr(query, "_tables", {})
+    publish(db_filename, 10)
+    return db_filename
+
+
+def post_query(client, sql, **params):
+    return client.post("/query", json={"sql": sql, **params})
+
+
+def test_query(client, snapshot_db):
+    response = post_query(
+        client,
+        "SELECT committer, count(*) AS n FROM commitments GROUP BY 1 ORDER BY 1",
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["data"] == [
+        {"committer": "0xprovider0", "n": 4},
+        {"committer": "0xprovider1", "n": 3},
+        {"committer": "0xprovider2", "n": 3},
+    ]
+    assert body["generation"] == 1
+    assert not body["truncated"]
+    assert not body["cached"]
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "DELETE FROM commitments",
+        "CREATE TABLE t AS SELECT 1",
+        "COPY commitments TO 'out.csv'",
+        "ATTACH 'other.duckdb'",
+        "SET threads = 64",
+        "PRAGMA database_list",
+        "SELECT 1; SELECT 2",
+        "SELEC 1",
+    ],
+)
+def test_only_a_single_select_is_allowed(client, snapshot_db, sql):
+    response = post_query(client, sql)
+    assert response.status_code == 422, response.text
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT * FROM read_csv('/etc/passwd')",
+        "SELECT * FROM read_text('/etc/hostname')",
+        "SELECT * FROM read_parquet('https://example.com/data.parquet')",
+    ],
+)
+def test_external_access_is_denied(client, snapshot_db, sql):
+    response = post_query(client, sql)
+    assert response.status_code == 422, response.text
+    assert "Permission Error" in response.json()["detail"]
+
+
+def test_configuration_is_locked():
+    # normalize_sql rejects SET already; the sandbox refuses it on its own as well
+    with pytest.raises(HTTPException) as e:
+        query._execute({}, "SET memory_limit = '100GB'", 10, 5)
+    assert e.value.status_code == 422
+    assert "lock" in e.value.detail.lower()
+
+
+def test_timeout_interrupts_the_query(client, snapshot_db):
+    response = post_query(client, SLOW_SQL, timeout_seconds=0.2)
+    assert response.status_code == 408, response.text
+
+
+def test_rows_are_truncated(client, snapshot_db):
+    body = post_query(client, "SELECT * FROM commitments", max_rows=4).json()
+    assert len(body["data"]) == 4
+    assert body["truncated"]
+
+
+def test_full_queue_is_turned_away(client, snapshot_db, monkeypatch):
+    monkeypatch.setattr(query, "_waiting", query.QUERY_QUEUE_SIZE)
+    response = post_query(client, "SELECT 1")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+
+
+def test_busy_slots_time_out(client, snapshot_db, monkeypatch):
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    monkeypatch.setattr(query, "_slots", slots)
+    monkeypatch.setattr(query, "QUERY_QUEUE_TIMEOUT_SECONDS", 0.05)
+    response = post_query(client, "SELECT 1")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+
+
+def test_no_snapshot_of_the_current_generation(client, snapshot_db):
+    write_watermark(snapshot_db, {"commit_stores": 20})
+    response = post_query(client, "SELECT count(*) AS n FROM commitments")
+    assert response.status_code == 503
+
+
+def test_cache_follows_the_generation(client, snapshot_db):
+    sql = "SELECT count(*) AS n FROM commitments"
+    first = post_query(client, sql).json()
+    assert first["data"] == [{"n": 10}] and not first["cached"]
+
+    # Whitespace, comments and keyword case do not change the syntax tree
+    second = post_query(client, "select   count(*) as n -- rows\nfrom commitments")
+    assert second.json()["cached"]
+    assert post_query(client, sql, max_rows=1).json()["cached"] is False
+
+    generation = publish(snapshot_db, 20)
+    third = post_query(client, sql).json()
+    assert third["data"] == [{"n": 20}] and not third["cached"]
+    assert third["generation"] == generation
+    assert {key[1] for key in query._cache} == {generation}
@@ -0,0 +1,68 @@
+import os
+import duckdb
+import polars as pl
+import pytest
+from changelog import ChangeSet, prune_outbox, publish_changes, set_position
+from api import replica, shards
+
+
+@pytest.fixture
+def replica_db(tmp_path, monkeypatch):
+    """A replica database fed from the outbox of a primary in tmp_path/primary."""
+    db_filename = str(tmp_path / "replica" / "mev_commit.duckdb")
+    monkeypatch.setattr(replica, "REPLICA_SOURCE", str(tmp_path / "primary"))
+    monkeypatch.setitem(shards.SHARDS, "default", db_filename)
+    return db_filename
+
+
+def publish(tmp_path, ids, position):
+    changes = ChangeSet()
+    changes.insert(
+        "commit_stores",
+        pl.DataFrame({"commitmentIndex": ids, "block_number": range(len(ids))}),
+        ["commitmentIndex"],
+    )
+    primary = str(tmp_path / "primary" / "mev_commit.duckdb")
+    return publish_changes(primary, changes, position + 1, position)
+
+
+def commitment_indexes(db_filename):
+    with duckdb.connect(db_filename, read_only=True) as conn:
+        rows = conn.execute("SELECT commitmentIndex FROM commit_stores ORDER BY 1")
+        return [row[0] for row in rows.fetchall()]
+
+
+def test_entries_are_applied_once(tmp_path, replica_db):
+    publish(tmp_path, ["0x1", "0x2"], 0)
+    publish(tmp_path, ["0x2", "0x3"], 1)
+
+    assert replica.apply_pending("default") == 2
+    assert commitment_indexes(replica_db) == ["0x1", "0x2", "0x3"]
+    assert replica.apply_pending("default") == 0
+
+    # A replica that lost its position applies the entries again without duplicates
+    with duckdb.connect(replica_db) as conn:
+        set_position(conn, 0)
+    assert replica.apply_pending("default") == 2
+    assert commitment_indexes(replica_db) == ["0x1", "0x2", "0x3"]
+    status = replica.replica_status("default")
+    assert status["applied_seq"] == 2 and status["lag_entries"] == 0
+
+
+def test_pruned_entries_leave_a_gap(tmp_path, replica_db):
+    publish(tmp_path, ["0x1"], 0)
+    assert replica.apply_pending("default") == 1
+
+    for position, ids in ((1, ["0x2"]), (2, ["0x3"]), (3, ["0x4"])):
+        publish(tmp_path, ids, position)
+    primary = str(tmp_path / "primary" / "mev_commit.duckdb")
+    assert prune_outbox(primary, -1) == 3
+    assert sorted(os.listdir(replica.replica_outbox("default"))) == [
+        "000000000004.0.arrow",
+        "000000000004.json",
+    ]
+
+    status = replica.replica_status("default")
+    assert status["gap"] and status["applied_seq"] == 1 and status["latest_seq"] == 4
+    assert replica.apply_pending("default") == 0
+    assert commitment_indexes(replica_db) == ["0x1"]
@@ -0,0 +1,55 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+import polars as pl
+from pydantic import BaseModel
+from api.models import PreconfDataItem
+from api.serialization import model_select_exprs, parse_fields
+
+
+class Item(BaseModel):
+    name: str
+    gas_used: int
+    max_fee: int
+    block_number: int
+    bid: float
+    date: datetime
+    nonce: Optional[int] = None
+
+
+def test_model_select_exprs_matches_pydantic():
+    df = pl.DataFrame(
+        {
+            "name": ["a", "b"],
+            "gas_used": pl.Series([Decimal("21000.0"), Decimal("42000.0")]),
+            "max_fee": [32.0, 7.0],
+            "block_number": pl.Series([2**63 + 5, 1], dtype=pl.UInt64),
+            "bid": pl.Series([Decimal("0.5"), Decimal("2")]),
+            "date": [
+                datetime(2024, 10, 21, 19, 25, 44, 211000),
+                datetime(2024, 10, 21),
+            ],
+        }
+    )
+    assert isinstance(df.schema["gas_used"], pl.Decimal)
+
+    written = json.loads(df.select(model_select_exprs(Item, df.schema)).write_json())
+    expected = [json.loads(Item(**row).model_dump_json()) for row in df.to_dicts()]
+    assert written == expected
+
+
+def test_model_select_exprs_matches_pydantic_for_preconf_fields():
+    model = parse_fields("gas_used_l1,max_fee_per_gas_l1,timestamp_l1", PreconfDataItem)
+    df = pl.DataFrame(
+        {
+            "gas_used_l1": pl.Series([Decimal("21000.0")]),
+            "max_fee_per_gas_l1": pl.Series([Decimal("32.0")]),
+            "timestamp_l1": pl.Series([1729551300], dtype=pl.UInt64),
+        }
+    )
+    written = json.loads(df.select(model_select_exprs(model, df.schema)).write_json())
+    assert written == [
+        {"gas_used_l1": 21000, "max_fee_per_gas_l1": 32, "timestamp_l1": 1729551300}
+    ]
+    assert written == [json.loads(model(**df.row(0, named=True)).model_dump_json())]
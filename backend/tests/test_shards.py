@@ -0,0 +1,16 @@
+import os
+from db_lock import LOCKFILE_PATH, shard_lockfile
+from api import shards
+
+
+def test_default_network_uses_shared_lock():
+    assert shards.current_lockfile() == LOCKFILE_PATH
+
+
+def test_shard_lock_is_next_to_its_database(monkeypatch):
+    # The ingest worker of NETWORK=mainnet locks shard_lockfile("db/data/mainnet")
+    db_filename = "/app/db/data/mainnet/mev_commit.duckdb"
+    monkeypatch.setitem(shards.SHARDS, "mainnet", db_filename)
+    with shards.use_network("mainnet"):
+        assert shards.current_lockfile() == shard_lockfile(os.path.dirname(db_filename))
+        assert shards.current_lockfile() == "/app/db/data/mainnet/duckdb_lock"
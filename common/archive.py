@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+# Directory next to the DuckDB database file holding the cold tier: the joined
+# commitments older than the tiering horizon, as zstd Parquet partitioned by day
+ARCHIVE_DIRNAME = "archive"
+
+# Manifest of the archive, replaced atomically by the tiering job
+MANIFEST_FILENAME = "MANIFEST.json"
+
+# Columns whose range is recorded per partition, so queries can skip partitions
+RANGE_COLUMNS = ("timestamp", "block_number", "block_number_l1")
+
+# Parsed manifest cached by path and mtime so readers only pay for a stat()
+_manifest_cache: Dict[str, tuple] = {}
+
+
+def archive_dir(db_filename: str) -> str:
+    """Return the archive directory that belongs to the given database file."""
+    return os.path.join(os.path.dirname(db_filename), ARCHIVE_DIRNAME)
+
+
+def read_manifest(db_filename: str) -> Dict:
+    """
+    Read the archive manifest.
+
+    The manifest holds its version, the highest block number of each source table
+    that was archived, and per day partition ("2024-10-21") its files, row count and
+    the range of each of RANGE_COLUMNS. Returns an empty dict if nothing has been
+    archived yet.
+    """
+    path = os.path.join(archive_dir(db_filename), MANIFEST_FILENAME)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+
+    cached = _manifest_cache.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not read archive manifest {path}: {e}")
+        return {}
+
+    _manifest_cache[path] = (mtime_ns, manifest)
+    return manifest
+
+
+def write_manifest(db_filename: str, manifest: Dict) -> None:
+    """Replace the archive manifest atomically."""
+    path = os.path.join(archive_dir(db_filename), MANIFEST_FILENAME)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f"{path}.tmp", path)
+
+
+def archive_files(
+    db_filename: str,
+    ranges: Optional[Dict[str, Tuple[Optional[int], Optional[int]]]] = None,
+) -> List[str]:
+    """
+    List the archive files that may hold rows within the given column ranges.
+
+    Args:
+        db_filename (str): Path of the DuckDB database.
+        ranges (Optional[Dict[str, Tuple[Optional[int], Optional[int]]]]): Inclusive
+            (low, high) bounds by column of RANGE_COLUMNS; None leaves a side open.
+
+    Returns:
+        List[str]: Paths of the files of every partition overlapping all the ranges.
+            Files whose rows are still being deleted from DuckDB are left out, so
+            callers holding the database lock never see a commitment twice.
+    """
+    manifest = read_manifest(db_filename)
+    directory = archive_dir(db_filename)
+    pending = set(manifest.get("pending", []))
+    files = []
+    for day, partition in sorted(manifest.get("partitions", {}).items()):
+        overlaps = True
+        for column, (low, high) in (ranges or {}).items():
+            lowest, highest = partition["ranges"][column]
+            if (low is not None and highest < low) or (
+                high is not None and lowest > high
+            ):
+                overlaps = False
+                break
+        if overlaps:
+            files += [
+                os.path.join(directory, f"day={day}", name)
+                for name in partition["files"]
+                if f"day={day}/{name}" not in pending
+            ]
+    return files
+
+
+def archived_max_block(db_filename: str, table_name: str) -> int:
+    """Highest block number of a source table that was moved to the archive."""
+    return read_manifest(db_filename).get("max_blocks", {}).get(table_name, 0)
@@ -0,0 +1,286 @@
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import duckdb
+import polars as pl
+
+# Directory next to the DuckDB database file holding the change log entries that
+# replicas apply to their own copy
+OUTBOX_DIRNAME = "outbox"
+
+# Table recording the sequence number of the last entry in a database: published by
+# the pipeline, or applied by a replica
+POSITION_TABLE = "changelog_position"
+
+# Entry manifests, written last so a manifest means the whole entry is present
+_MANIFEST_RE = re.compile(r"^(\d{12})\.json$")
+
+
+def outbox_dir(db_filename: str) -> str:
+    """Return the outbox directory that belongs to the given database file."""
+    return os.path.join(os.path.dirname(db_filename), OUTBOX_DIRNAME)
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"datetime": value.isoformat()}
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict) and "datetime" in value:
+        return datetime.fromisoformat(value["datetime"])
+    return value
+
+
+class ChangeSet:
+    """
+    The changes of one ingest cycle, shipped to replicas as one change log entry.
+
+    Operations are applied in the order they were recorded:
+    - insert: append rows, skipping those whose key is already present
+    - replace: delete the rows with `column >= since`, then append rows (if any)
+    - delete: delete the rows with `column < before` that match `where`
+    """
+
+    def __init__(self):
+        self.ops: List[Dict] = []
+        self.frames: List[pl.DataFrame] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.ops)
+
+    def _add(self, op: Dict, df: Optional[pl.DataFrame] = None) -> None:
+        if df is not None:
+            op["frame"] = len(self.frames)
+            op["rows"] = df.height
+            self.frames.append(df)
+        self.ops.append(op)
+
+    def insert(self, table: str, df: pl.DataFrame, key: List[str]) -> None:
+        if not df.is_empty():
+            self._add({"op": "insert", "table": table, "key": key}, df)
+
+    def replace(
+        self, table: str, column: str, since: Any, df: Optional[pl.DataFrame]
+    ) -> None:
+        self._add(
+            {
+                "op": "replace",
+                "table": table,
+                "column": column,
+                "since": _encode(since),
+            },
+            df if df is not None and not df.is_empty() else None,
+        )
+
+    def delete(
+        self, table: str, column: str, before: Any, where: Optional[Dict] = None
+    ) -> None:
+        self._add(
+            {
+                "op": "delete",
+                "table": table,
+                "column": column,
+                "before": _encode(before),
+                "where": where or {},
+            }
+        )
+
+
+def list_entries(directory: str, after: int = 0) -> List[int]:
+    """Sequence numbers of the complete entries in an outbox after `after`, in order."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    seqs = []
+    for name in names:
+        match = _MANIFEST_RE.match(name)
+        if match and int(match.group(1)) > after:
+            seqs.append(int(match.group(1)))
+    return sorted(seqs)
+
+
+def read_entry(directory: str, seq: int) -> Dict:
+    """Read the manifest of an entry."""
+    with open(os.path.join(directory, f"{seq:012d}.json")) as f:
+        return json.load(f)
+
+
+def _remove_entry(directory: str, seq: int) -> None:
+    """Delete an entry, manifest first so a half deleted entry is never taken as complete."""
+    manifest = read_entry(directory, seq)
+    os.remove(os.path.join(directory, f"{seq:012d}.json"))
+    for name in manifest["files"]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def publish_changes(
+    db_filename: str, changes: ChangeSet, generation: int, position: int
+) -> Optional[int]:
+    """
+    Append a change log entry to the outbox of a database.
+
+    The entry follows `position`, the last entry the database records as published,
+    so the sequence carries on from the database even if the outbox was emptied and
+    replicas see the missing entries as a gap. Entries already in the outbox past
+    the position were published by a run that stopped before the database recorded
+    them; they are removed and the changes published again in their place.
+
+    The frames are written as Arrow IPC files first and the manifest last, each to a
+    temporary name renamed into place, so readers never see a partial entry.
+
+    Args:
+        db_filename (str): Path of the DuckDB database the changes were written to.
+        changes (ChangeSet): The changes of the cycle.
+        generation (int): Watermark generation the changes lead to.
+        position (int): The database's changelog_position.
+
+    Returns:
+        Optional[int]: The sequence number of the entry, or None if there were no
+            changes.
+    """
+    if not changes:
+        return None
+    directory = outbox_dir(db_filename)
+    os.makedirs(directory, exist_ok=True)
+    for stale in reversed(list_entries(directory, position)):
+        logging.warning(
+            f"Replacing change log entry {stale}, not recorded as published"
+        )
+        _remove_entry(directory, stale)
+    seq = position + 1
+
+    files = []
+    for i, df in enumerate(changes.frames):
+        name = f"{seq:012d}.{i}.arrow"
+        path = os.path.join(directory, name)
+        df.write_ipc(f"{path}.tmp", compression="zstd")
+        os.replace(f"{path}.tmp", path)
+        files.append(name)
+
+    manifest = {
+        "seq": seq,
+        "generation": generation,
+        "created_at": time.time(),
+        "files": files,
+        "ops": changes.ops,
+    }
+    path = os.path.join(directory, f"{seq:012d}.json")
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f"{path}.tmp", path)
+    return seq
+
+
+def prune_outbox(db_filename: str, retention_seconds: float) -> int:
+    """
+    Delete the entries older than the retention, always keeping the newest one.
+
+    Returns:
+        int: The number of entries deleted.
+    """
+    directory = outbox_dir(db_filename)
+    seqs = list_entries(directory)
+    cutoff = time.time() - retention_seconds
+    deleted = 0
+    for seq in seqs[:-1]:
+        if read_entry(directory, seq)["created_at"] >= cutoff:
+            break
+        _remove_entry(directory, seq)
+        deleted += 1
+    return deleted
+
+
+def get_position(conn: duckdb.DuckDBPyConnection) -> int:
+    """Sequence number of the last entry published to or applied to a database."""
+    tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+    if POSITION_TABLE not in tables:
+        return 0
+    row = conn.execute(f"SELECT MAX(seq) FROM {POSITION_TABLE}").fetchone()
+    return int(row[0] or 0)
+
+
+def set_position(conn: duckdb.DuckDBPyConnection, seq: int) -> None:
+    """Record the sequence number of the last entry published to or applied to a database."""
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {POSITION_TABLE} (seq BIGINT)")
+    conn.execute(f"DELETE FROM {POSITION_TABLE}")
+    conn.execute(f"INSERT INTO {POSITION_TABLE} VALUES (?)", [seq])
+
+
+def apply_entry(
+    conn: duckdb.DuckDBPyConnection, directory: str, manifest: Dict
+) -> Tuple[int, int]:
+    """
+    Apply one change log entry to a database in a single transaction.
+
+    The entry's sequence number is recorded in the same transaction, and inserts
+    skip rows whose key is already present, so applying an entry twice is harmless.
+    Rows are inserted by column name, so a frame may order its columns differently
+    from the table.
+
+    Returns:
+        Tuple[int, int]: The rows inserted and deleted.
+    """
+    inserted = deleted = 0
+    conn.begin()
+    try:
+        for op in manifest["ops"]:
+            table = op["table"]
+            tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+            if "frame" in op:
+                df = pl.read_ipc(
+                    os.path.join(directory, manifest["files"][op["frame"]])
+                )
+                conn.register("delta", df.to_arrow())
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM delta LIMIT 0"
+                )
+
+            if op["op"] == "insert":
+                on = " AND ".join(f"t.{c} = d.{c}" for c in op["key"])
+                inserted += conn.execute(f"""
+                    INSERT INTO {table} BY NAME SELECT * FROM delta d
+                    WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE {on})
+                    """).fetchone()[0]
+            elif op["op"] == "replace":
+                if table in tables or "frame" in op:
+                    deleted += conn.execute(
+                        f"DELETE FROM {table} WHERE {op['column']} >= ?",
+                        [_decode(op["since"])],
+                    ).fetchone()[0]
+                if "frame" in op:
+                    inserted += conn.execute(
+                        f"INSERT INTO {table} BY NAME SELECT * FROM delta"
+                    ).fetchone()[0]
+            elif op["op"] == "delete":
+                if table in tables:
+                    predicates = [f"{op['column']} < ?"]
+                    params = [_decode(op["before"])]
+                    for column, value in op["where"].items():
+                        predicates.append(f"{column} = ?")
+                        params.append(value)
+                    deleted += conn.execute(
+                        f"DELETE FROM {table} WHERE " + " AND ".join(predicates),
+                        params,
+                    ).fetchone()[0]
+
+            if "frame" in op:
+                conn.unregister("delta")
+        set_position(conn, manifest["seq"])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    logging.debug(f"Applied change log entry {manifest['seq']}")
+    return inserted, deleted
@@ -0,0 +1,236 @@
+import polars as pl
+from typing import List, Optional, Sequence
+
+# Joins encrypted_stores, commit_stores, commits_processed and l1_transactions into a
+# unified view of preconfirmation data. Derived columns are added by enrich_commitments.
+COMMITMENTS_SQL = """
+SELECT
+    es.commitmentIndex,
+    es.committer,
+    es.commitmentDigest,
+    cs.bidder,
+    cp.isSlash,
+    cs.commitmentSignature,
+    cs.bid,
+    cs.blockNumber AS inc_block_number,
+    cs.bidHash,
+    cs.decayStartTimeStamp,
+    cs.decayEndTimeStamp,
+    '0x' || cs.txnHash AS txnHash,
+    cs.revertingTxHashes,
+    cs.bidSignature,
+    cs.sharedSecretKey,
+    cs.block_number,
+    es.block_number AS block_number_encrypted,
+    cp.block_number AS block_number_processed,
+    cs.timestamp,
+    cs.dispatchTimestamp,
+    l1.block_number AS block_number_l1,
+    l1.extra_data AS extra_data_l1,
+    l1."to" AS to_l1,
+    l1."from" AS from_l1,
+    l1.nonce AS nonce_l1,
+    l1.type AS type_l1,
+    l1.block_hash AS block_hash_l1,
+    l1.timestamp AS timestamp_l1,
+    l1.base_fee_per_gas AS base_fee_per_gas_l1,
+    l1.gas_used_block AS gas_used_block_l1,
+    l1.parent_beacon_block_root,
+    l1.max_priority_fee_per_gas AS max_priority_fee_per_gas_l1,
+    l1.max_fee_per_gas AS max_fee_per_gas_l1,
+    l1.effective_gas_price AS effective_gas_price_l1,
+    l1.gas_used AS gas_used_l1
+FROM encrypted_stores es
+JOIN commit_stores cs ON cs.commitmentIndex = es.commitmentIndex
+JOIN commits_processed cp ON cp.commitmentIndex = es.commitmentIndex
+JOIN l1_transactions l1 ON l1.hash = '0x' || cs.txnHash
+"""
+
+
+def byte_to_string(hex_string):
+    """
+    Convert builder grafiti to utf string
+    """
+    if hex_string == "0x":
+        return ""
+    # Remove the "0x" prefix and decode the hex string
+    bytes_object = bytes.fromhex(hex_string[2:])
+    try:
+        human_readable_string = bytes_object.decode("utf-8")
+    except UnicodeDecodeError:
+        human_readable_string = bytes_object.decode("latin-1")
+    return human_readable_string
+
+
+def add_builder_graffiti(df: pl.DataFrame) -> pl.DataFrame:
+    """Decodes the L1 block extra data of joined commitments into builder_graffiti."""
+    return df.with_columns(
+        pl.col("extra_data_l1")
+        .map_elements(byte_to_string, return_dtype=str)
+        .alias("builder_graffiti"),
+    )
+
+
+# Enriched commitment columns exposed by the API, in order
+ENRICHED_COLUMNS = (
+    "commitmentIndex",
+    "committer",
+    "commitmentDigest",
+    "bidder",
+    "isSlash",
+    "commitmentSignature",
+    "bid",
+    "inc_block_number",
+    "bidHash",
+    "decayStartTimeStamp",
+    "decayEndTimeStamp",
+    "txnHash",
+    "revertingTxHashes",
+    "bidSignature",
+    "sharedSecretKey",
+    "block_number",  # mev-commit block number
+    # the l1 transaction data
+    "block_number_l1",
+    "extra_data_l1",
+    "to_l1",
+    "from_l1",
+    "nonce_l1",
+    "type_l1",
+    "block_hash_l1",
+    "timestamp_l1",
+    "base_fee_per_gas_l1",
+    "gas_used_block_l1",
+    "parent_beacon_block_root",
+    "max_priority_fee_per_gas_l1",
+    "max_fee_per_gas_l1",
+    "effective_gas_price_l1",
+    "gas_used_l1",
+    "date",
+    "bid_eth",
+    "decayed_bid_eth",
+    "dispatch_range",
+    "decay_multiplier",
+    "builder_graffiti",
+)
+
+# Columns of the commitments join each derived column is computed from; every other
+# enriched column is a join column of the same name
+_DECAY_SOURCES = ("decayStartTimeStamp", "decayEndTimeStamp", "dispatchTimestamp")
+DERIVED_COLUMN_SOURCES = {
+    "date": ("timestamp",),
+    "bid_eth": ("bid",),
+    "decayed_bid_eth": ("bid", *_DECAY_SOURCES),
+    "dispatch_range": _DECAY_SOURCES,
+    "decay_multiplier": _DECAY_SOURCES,
+    "builder_graffiti": ("extra_data_l1",),
+}
+
+
+def join_columns(columns: Sequence[str]) -> List[str]:
+    """Columns of the commitments join needed to build the given enriched columns."""
+    needed = []
+    for column in columns:
+        needed.extend(DERIVED_COLUMN_SOURCES.get(column, (column,)))
+    return list(dict.fromkeys(needed))
+
+
+def derive_commitment_columns(
+    df: pl.DataFrame, columns: Optional[Sequence[str]] = None
+) -> pl.DataFrame:
+    """
+    Adds the derived bid, date and decay columns to joined commitments that already
+    have builder_graffiti, and selects the columns exposed by the API.
+
+    If `columns` is given, only those columns are derived and selected, and `df`
+    only needs the join columns they are built from (see `join_columns`).
+    """
+    columns = ENRICHED_COLUMNS if columns is None else columns
+    wanted = set(columns)
+    commitments_lf = df.lazy()
+    if wanted & {"bid_eth", "decayed_bid_eth"}:
+        commitments_lf = commitments_lf.with_columns(
+            (pl.col("bid") / 10**18).alias("bid_eth")
+        )
+    if "date" in wanted:
+        commitments_lf = commitments_lf.with_columns(
+            pl.from_epoch("timestamp", time_unit="ms").alias("date")
+        )
+    # need to change type from uint to int to account for negative numbers
+    commitments_lf = commitments_lf.with_columns(
+        pl.col(column).cast(pl.Int64) for column in _DECAY_SOURCES if column in df
+    )
+    if wanted & {"decayed_bid_eth", "dispatch_range", "decay_multiplier"}:
+        commitments_lf = (
+            # bid decay calculations
+            # the formula to calculate the bid decay = (decayEndTimeStamp - decayStartTimeStamp) / (dispatchTimestamp - decayEndTimeStamp). If it's a negative number, then bid would have decayed to 0
+            commitments_lf.with_columns(
+                (pl.col("decayEndTimeStamp") - pl.col("decayStartTimeStamp")).alias(
+                    "decay_range"
+                ),
+                (pl.col("decayEndTimeStamp") - pl.col("dispatchTimestamp")).alias(
+                    "dispatch_range"
+                ),
+            )
+            .with_columns(
+                (pl.col("dispatch_range") / pl.col("decay_range")).alias(
+                    "decay_multiplier"
+                )
+            )
+            .with_columns(
+                pl.when(pl.col("decay_multiplier") < 0)
+                .then(0)
+                .otherwise(pl.col("decay_multiplier"))
+            )
+        )
+    if "decayed_bid_eth" in wanted:
+        # calculate decayed bid. The decay multiplier is the amount that the bid decays by.
+        commitments_lf = commitments_lf.with_columns(
+            (pl.col("decay_multiplier") * pl.col("bid_eth")).alias("decayed_bid_eth")
+        )
+
+    # Select desired columns
+    return commitments_lf.select(columns).collect()
+
+
+def enrich_commitments(
+    df: pl.DataFrame, columns: Optional[Sequence[str]] = None
+) -> pl.DataFrame:
+    """
+    Adds the derived bid, date, decay and builder graffiti columns to joined
+    commitments and selects the columns exposed by the API (or only `columns`).
+    """
+    if columns is None or "builder_graffiti" in columns:
+        df = add_builder_graffiti(df)
+    return derive_commitment_columns(df, columns)
+
+
+def commitments_query(
+    predicates: Optional[List[str]] = None,
+    order_by: Optional[str] = None,
+    limit: Optional[int] = None,
+    archive_files: Optional[List[str]] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> str:
+    """
+    Build the SQL for the commitments join with optional predicates, ordering and limit.
+
+    If `archive_files` are given, the archived (cold tier) commitments in those
+    Parquet files are included as well. If `columns` are given, only those join
+    columns are selected, and DuckDB reads only them (and the predicate and join
+    keys) from the tables and Parquet files.
+    """
+    source = COMMITMENTS_SQL
+    if archive_files:
+        paths = ", ".join("'" + path.replace("'", "''") + "'" for path in archive_files)
+        source = (
+            f"{COMMITMENTS_SQL} UNION ALL BY NAME SELECT * FROM read_parquet([{paths}])"
+        )
+    select = ", ".join(f'"{column}"' for column in columns) if columns else "*"
+    query = f"SELECT {select} FROM ({source}) AS commitments"
+    if predicates:
+        query += " WHERE " + " AND ".join(predicates)
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    if limit is not None:
+        query += f" LIMIT {int(limit)}"
+    return query
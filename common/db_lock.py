@@ -3,7 +3,20 @@ import logging
 import os
 
 # Define a global lock file path within the shared volume
-LOCKFILE_PATH = "/app/db/data/duckdb_lock"
+LOCKFILE_PATH = os.getenv("DUCKDB_LOCKFILE", "/app/db/data/duckdb_lock")
+
+# Name of the lock file next to each network's database when storage is sharded
+SHARD_LOCKFILE_NAME = "duckdb_lock"
+
+
+def shard_lockfile(db_dir: str) -> str:
+    """
+    Lock file guarding the database of one network in the sharded layout.
+
+    The ingest worker of the network and the backend both derive it from the
+    directory of the network's database, so they exclude each other per shard.
+    """
+    return os.path.join(db_dir, SHARD_LOCKFILE_NAME)
 
 
 def acquire_lock(file_path: str = LOCKFILE_PATH):
@@ -0,0 +1,56 @@
+import polars as pl
+
+# Searchable hex fields of the enriched commitments. Hashes get one index entry per
+# commitment, addresses one entry per distinct address.
+HASH_FIELDS = ("bidHash", "txnHash", "commitmentIndex", "commitmentDigest")
+ADDRESS_FIELDS = ("bidder", "committer")
+
+
+def build_search_index(commitments: pl.DataFrame) -> pl.DataFrame:
+    """
+    Build the prefix search index of the enriched commitments.
+
+    Every searchable hash and address becomes a lowercase key, sorted so that all
+    keys starting with a prefix form one contiguous range that can be found by
+    binary search.
+
+    Args:
+        commitments (pl.DataFrame): The enriched commitments.
+
+    Returns:
+        pl.DataFrame: One row per key with its entity (the field it came from), the
+            bidHash of the commitment it points to (null for addresses), the latest
+            inc_block_number it appears in, and its number of commitments.
+    """
+    parts = [
+        commitments.select(
+            pl.col(field).str.to_lowercase().alias("key"),
+            pl.lit(field).alias("entity"),
+            pl.col("bidHash"),
+            pl.col("inc_block_number").cast(pl.Int64),
+            pl.lit(1, dtype=pl.UInt32).alias("preconf_count"),
+        )
+        for field in HASH_FIELDS
+    ]
+    parts += [
+        commitments.group_by(pl.col(field).str.to_lowercase().alias("key"))
+        .agg(
+            pl.col("inc_block_number").cast(pl.Int64).max(),
+            pl.len().cast(pl.UInt32).alias("preconf_count"),
+        )
+        .select(
+            "key",
+            pl.lit(field).alias("entity"),
+            pl.lit(None, dtype=pl.String).alias("bidHash"),
+            "inc_block_number",
+            "preconf_count",
+        )
+        for field in ADDRESS_FIELDS
+    ]
+    return (
+        pl.concat(parts)
+        .filter(pl.col("key").is_not_null())
+        .sort(
+            "key", "entity", pl.col("inc_block_number"), descending=[False, False, True]
+        )
+    )
@@ -0,0 +1,183 @@
+import math
+from datetime import datetime, timedelta
+from typing import List, Sequence
+import polars as pl
+
+# Quantile sketches are logarithmic histograms (as in DDSketch): a positive value x
+# falls in bin ceil(log_gamma(x)), and every value in a bin is within
+# RELATIVE_ACCURACY of the bin's estimate. Sketches merge by adding bin counts.
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+
+# Bin holding zero
+ZERO_BIN = -(2**31)
+
+# Negative values are mirrored, as in DDSketch: -x falls in bin
+# -NEGATIVE_BIN_OFFSET - ceil(log_gamma(x)). Bins of float64 values are within
+# +-40000, so the two ranges never overlap.
+NEGATIVE_BIN_OFFSET = 2**20
+
+# Columns of the enriched commitments that get a quantile sketch
+SKETCH_METRICS = ("bid_eth", "decayed_bid_eth", "decay_multiplier")
+
+# Per-commitment inclusion metrics sketched per day and provider: seconds from
+# dispatch and from the start of the decay to the L1 block, blocks past the target
+# block and past the L1 block current at dispatch, and the decay multiplier
+PROVIDER_METRICS = (
+    "dispatch_latency_s",
+    "decay_start_latency_s",
+    "block_gap",
+    "dispatch_block_gap",
+    "decay_multiplier",
+)
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+# Day a commitment is counted in, the same key /preconfs/aggregations groups by
+DAY_BUCKET = pl.col("date").dt.round("1d")
+
+
+def sketch_bin(value: pl.Expr) -> pl.Expr:
+    """Bin of each value of a float expression."""
+    return (
+        pl.when(value > 0)
+        .then((value.log() / math.log(GAMMA)).ceil())
+        .when(value < 0)
+        .then(-NEGATIVE_BIN_OFFSET - (value.neg().log() / math.log(GAMMA)).ceil())
+        .otherwise(ZERO_BIN)
+        .cast(pl.Int32)
+    )
+
+
+def bin_value(index: pl.Expr) -> pl.Expr:
+    """Estimate of the values in each bin, within RELATIVE_ACCURACY."""
+    return (
+        pl.when(index == ZERO_BIN)
+        .then(0.0)
+        .when(index <= -NEGATIVE_BIN_OFFSET // 2)
+        .then(-2 * pl.lit(GAMMA).pow(-NEGATIVE_BIN_OFFSET - index) / (GAMMA + 1))
+        .otherwise(2 * pl.lit(GAMMA).pow(index) / (GAMMA + 1))
+    )
+
+
+def sketch_metrics(
+    df: pl.DataFrame, keys: Sequence[str], metrics: Sequence[str]
+) -> pl.DataFrame:
+    """
+    Sketch metrics per day and key columns.
+
+    Args:
+        df (pl.DataFrame): Rows with a date column, the keys and the metrics.
+        keys (Sequence[str]): Columns to sketch separately besides the day.
+        metrics (Sequence[str]): Numeric columns to sketch.
+
+    Returns:
+        pl.DataFrame: Columns day, the keys, metric, bin and count. Null and NaN
+            values are left out.
+    """
+    return pl.concat(
+        [
+            df.filter(
+                pl.col(metric).is_not_null()
+                & pl.col(metric).cast(pl.Float64).is_not_nan()
+            )
+            .group_by(
+                DAY_BUCKET.cast(pl.Datetime("us")).alias("day"),
+                *keys,
+                sketch_bin(pl.col(metric).cast(pl.Float64)).alias("bin"),
+            )
+            .agg(pl.len().cast(pl.Int64).alias("count"))
+            .select(
+                "day",
+                *keys,
+                pl.lit(metric).alias("metric"),
+                "bin",
+                "count",
+            )
+            for metric in metrics
+        ]
+    )
+
+
+def build_sketch_bins(commitments: pl.DataFrame) -> pl.DataFrame:
+    """
+    Sketch the metrics of enriched commitments per day, bidder and committer.
+
+    Args:
+        commitments (pl.DataFrame): Enriched commitments.
+
+    Returns:
+        pl.DataFrame: Columns day, bidder, committer, metric, bin and count. Null and
+            NaN values are left out.
+    """
+    return sketch_metrics(commitments, ["bidder", "committer"], SKETCH_METRICS)
+
+
+def estimate_quantiles(
+    bins: pl.DataFrame,
+    by: List[str],
+    quantiles: Sequence[float] = QUANTILES,
+    metrics: Sequence[str] = SKETCH_METRICS,
+) -> pl.DataFrame:
+    """
+    Merge sketch bins and estimate quantiles of every metric.
+
+    Args:
+        bins (pl.DataFrame): Rows of metric, bin and count, plus the `by` columns.
+        by (List[str]): Columns to estimate separately, e.g. ["day"]. May be empty.
+        quantiles (Sequence[float]): Quantiles to estimate, between 0 and 1.
+        metrics (Sequence[str]): Metrics of the bins, which name the output columns.
+
+    Returns:
+        pl.DataFrame: One row per `by` group with a `<metric>_p<q>` column for every
+            metric and quantile, e.g. bid_eth_p99.
+    """
+    groups = [*by, "metric"]
+    # Bin numbers do not follow the order of values across zero, so sort by estimate
+    merged = (
+        bins.group_by(*groups, "bin")
+        .agg(pl.col("count").sum())
+        .with_columns(bin_value(pl.col("bin")).alias("value"))
+        .sort(*groups, "value")
+        .with_columns(
+            pl.col("count").cum_sum().over(groups).alias("rank"),
+            pl.col("count").sum().over(groups).alias("total"),
+        )
+    )
+
+    estimates = []
+    for q in quantiles:
+        # The value of rank q * (n - 1), counting from 0, is in the first bin whose
+        # cumulative count exceeds it
+        estimates.append(
+            merged.filter(pl.col("rank") > q * (pl.col("total") - 1))
+            .group_by(groups)
+            .agg(pl.col("value").first())
+            .select(
+                *groups,
+                pl.format("{}_p{}", "metric", pl.lit(f"{q * 100:g}")).alias("column"),
+                "value",
+            )
+        )
+
+    long = pl.concat(estimates).drop("metric")
+    columns = [f"{metric}_p{q * 100:g}" for metric in metrics for q in quantiles]
+    if by:
+        wide = long.pivot(on="column", index=by, values="value")
+    else:
+        wide = (
+            long.with_columns(pl.lit(0).alias("_all"))
+            .pivot(on="column", index="_all", values="value")
+            .drop("_all")
+        )
+    missing = [
+        pl.lit(None, dtype=pl.Float64).alias(c)
+        for c in columns
+        if c not in wide.columns
+    ]
+    return wide.with_columns(missing).select(*by, *columns)
+
+
+def day_of(ts: datetime) -> datetime:
+    """The DAY_BUCKET of a timestamp: the nearest midnight."""
+    return (ts + timedelta(hours=12)).replace(hour=0, minute=0, second=0, microsecond=0)
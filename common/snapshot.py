@@ -0,0 +1,170 @@
+import glob
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+import polars as pl
+
+# Directory next to the DuckDB database file holding the enriched commitment snapshots
+SNAPSHOT_DIRNAME = "snapshots"
+
+# Pointer to the current snapshot, replaced atomically after each new snapshot
+CURRENT_FILENAME = "CURRENT"
+
+# Older snapshots are kept for a while so workers still mapping them are unaffected
+KEEP_SNAPSHOTS = 2
+
+# Current snapshot mapped by this process: (pointer mtime, pointer, frames by name)
+_mapped: Dict[str, tuple] = {}
+_map_lock = threading.Lock()
+
+
+def snapshot_dir(db_filename: str) -> str:
+    """Return the snapshot directory that belongs to the given database file."""
+    return os.path.join(os.path.dirname(db_filename), SNAPSHOT_DIRNAME)
+
+
+def read_snapshot_pointer(db_filename: str) -> Dict:
+    """
+    Read the pointer to the current snapshot.
+
+    Returns an empty dict if no snapshot has been published yet.
+    """
+    path = os.path.join(snapshot_dir(db_filename), CURRENT_FILENAME)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not read snapshot pointer {path}: {e}")
+        return {}
+
+
+def snapshot_files(pointer: Dict) -> Dict[str, str]:
+    """Return the file of each frame in a snapshot pointer, by frame name."""
+    if "file" in pointer:
+        # Pointers written before snapshots held several frames
+        return {"commitments": pointer["file"]}
+    return pointer.get("files", {})
+
+
+def _generation_of(path: str) -> int:
+    return int(os.path.basename(path).rsplit("-g", 1)[1][: -len(".arrow")])
+
+
+def publish_snapshot(
+    db_filename: str, frames: Dict[str, pl.DataFrame], generation: int
+) -> Dict[str, str]:
+    """
+    Publish frames derived from the database (the enriched commitments, the search
+    index...) as the snapshot of a watermark generation.
+
+    Each frame is written as an uncompressed Arrow IPC file so readers can
+    memory-map it without copying, then the CURRENT pointer is replaced atomically.
+    Snapshots older than the last KEEP_SNAPSHOTS generations are removed; processes
+    that still map them keep their pages until they swap to the new one.
+
+    Args:
+        db_filename (str): Path of the DuckDB database the snapshot was built from.
+        frames (Dict[str, pl.DataFrame]): The frames to publish, by name.
+        generation (int): Watermark generation the snapshot belongs to.
+
+    Returns:
+        Dict[str, str]: Path of each published file, by frame name.
+    """
+    directory = snapshot_dir(db_filename)
+    os.makedirs(directory, exist_ok=True)
+
+    paths = {}
+    for name, df in frames.items():
+        path = os.path.join(directory, f"{name}-g{generation}.arrow")
+        tmp_path = f"{path}.tmp"
+        # One contiguous record batch, so readers can map it without rechunking
+        df.rechunk().write_ipc(tmp_path, compression="uncompressed")
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        paths[name] = path
+
+    pointer = {
+        "generation": generation,
+        "files": {name: os.path.basename(path) for name, path in paths.items()},
+        "rows": {name: df.height for name, df in frames.items()},
+    }
+    pointer_path = os.path.join(directory, CURRENT_FILENAME)
+    with open(f"{pointer_path}.tmp", "w") as f:
+        json.dump(pointer, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f"{pointer_path}.tmp", pointer_path)
+
+    published = sorted(
+        glob.glob(os.path.join(directory, "*-g*.arrow")), key=_generation_of
+    )
+    generations = sorted({_generation_of(path) for path in published})
+    for old in published:
+        if _generation_of(old) in generations[:-KEEP_SNAPSHOTS]:
+            os.remove(old)
+    return paths
+
+
+def load_snapshot(
+    db_filename: str, generation: int, name: str = "commitments"
+) -> Optional[pl.DataFrame]:
+    """
+    Return a frame of the snapshot of a watermark generation, memory-mapped.
+
+    The mapping is shared by every caller in the process and swapped when a newer
+    snapshot is published; a frame handed out earlier stays valid until dropped.
+
+    Args:
+        db_filename (str): Path of the DuckDB database.
+        generation (int): Watermark generation the caller is serving.
+        name (str): Name of the frame, e.g. "commitments" or "search_index".
+
+    Returns:
+        Optional[pl.DataFrame]: The frame, or None if the current snapshot does not
+            belong to `generation`, has no such frame, or cannot be read.
+    """
+    directory = snapshot_dir(db_filename)
+    try:
+        mtime_ns = os.stat(os.path.join(directory, CURRENT_FILENAME)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    mapped = _mapped.get(directory)
+    if mapped is not None and mapped[0] == mtime_ns and name in mapped[2]:
+        pointer, frames = mapped[1], mapped[2]
+        return frames[name] if pointer.get("generation") == generation else None
+
+    with _map_lock:
+        mapped = _mapped.get(directory)
+        if mapped is not None and mapped[0] == mtime_ns:
+            pointer, frames = mapped[1], mapped[2]
+        else:
+            pointer, frames = read_snapshot_pointer(db_filename), {}
+            if not pointer:
+                return None
+            _mapped[directory] = (mtime_ns, pointer, frames)
+
+        if pointer.get("generation") != generation:
+            return None
+        if name not in frames:
+            filename = snapshot_files(pointer).get(name)
+            if filename is None:
+                return None
+            try:
+                # read_ipc memory-maps uncompressed files, and the file holds a
+                # single record batch, so nothing is copied
+                frames[name] = pl.read_ipc(os.path.join(directory, filename))
+            except (OSError, pl.exceptions.ComputeError) as e:
+                logging.warning(f"Could not map snapshot {filename}: {e}")
+                return None
+            logging.info(
+                f"Mapped snapshot {name} generation {generation} "
+                f"({frames[name].height} rows)"
+            )
+
+    return frames[name]
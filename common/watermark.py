@@ -0,0 +1,84 @@
+import json
+import logging
+import os
+import time
+from typing import Dict
+
+# Name of the watermark file written next to the DuckDB database file
+WATERMARK_FILENAME = "watermark.json"
+
+# Parsed watermark cached by path and mtime so readers only pay for a stat()
+_watermark_cache: Dict[str, tuple] = {}
+
+
+def watermark_path(db_filename: str) -> str:
+    """Return the watermark file path that belongs to the given database file."""
+    return os.path.join(os.path.dirname(db_filename), WATERMARK_FILENAME)
+
+
+def read_watermark(db_filename: str) -> Dict:
+    """
+    Read the data watermark published by the ingestion pipeline.
+
+    Returns an empty dict if the pipeline has not published a watermark yet.
+    """
+    path = watermark_path(db_filename)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+
+    cached = _watermark_cache.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    try:
+        with open(path) as f:
+            watermark = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not read watermark {path}: {e}")
+        return {}
+
+    _watermark_cache[path] = (mtime_ns, watermark)
+    return watermark
+
+
+def write_watermark(db_filename: str, blocks: Dict[str, int]) -> Dict:
+    """
+    Publish a new watermark generation for the given per-table block numbers.
+
+    The file is written to a temporary path and renamed into place so readers
+    never observe a partially written watermark.
+    """
+    previous = read_watermark(db_filename)
+    watermark = {
+        "generation": previous.get("generation", 0) + 1,
+        "updated_at": time.time(),
+        "blocks": blocks,
+    }
+
+    path = watermark_path(db_filename)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(watermark, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return watermark
+
+
+def watermark_token(db_filename: str) -> str:
+    """
+    Return a short token that changes whenever the underlying data changes.
+
+    Uses the published watermark generation, falling back to the database file's
+    modification time and size for databases written before watermarks existed.
+    """
+    watermark = read_watermark(db_filename)
+    if watermark:
+        return f"g{watermark['generation']}"
+    try:
+        st = os.stat(db_filename)
+    except FileNotFoundError:
+        return "empty"
+    return f"m{st.st_mtime_ns:x}-{st.st_size:x}"
@@ -0,0 +1,156 @@
+import logging
+from typing import Dict, Optional
+import duckdb
+import polars as pl
+from db_lock import acquire_lock, release_lock
+from archive import archive_files
+from changelog import ChangeSet
+from commitments import commitments_query, enrich_commitments, join_columns
+from data_processing import CHANGE_TABLES, LOCKFILE_PATH, earliest_changed_block
+
+# One row per L1 block holding preconfirmed transactions, so the backend's block
+# views read a single row instead of joining and grouping the block's commitments.
+L1_BLOCK_SUMMARY_DDL = """
+CREATE TABLE IF NOT EXISTS l1_block_summary (
+    block_number_l1 BIGINT PRIMARY KEY,
+    block_hash_l1 VARCHAR,
+    timestamp_l1 BIGINT,
+    builder_graffiti VARCHAR,
+    base_fee_per_gas_l1 DOUBLE,
+    gas_used_block_l1 BIGINT,
+    preconf_count BIGINT,
+    txn_count BIGINT,
+    preconf_gas_used BIGINT,
+    total_bid_eth DOUBLE,
+    total_decayed_bid_eth DOUBLE,
+    slash_count BIGINT,
+    bidder_count BIGINT,
+    provider_count BIGINT
+)
+"""
+
+# Enriched commitment columns the summaries are built from
+SUMMARY_COLUMNS = (
+    "block_number_l1",
+    "block_hash_l1",
+    "timestamp_l1",
+    "builder_graffiti",
+    "base_fee_per_gas_l1",
+    "gas_used_block_l1",
+    "txnHash",
+    "gas_used_l1",
+    "bid_eth",
+    "decayed_bid_eth",
+    "isSlash",
+    "bidder",
+    "committer",
+)
+
+
+def summarize_blocks(commitments: pl.DataFrame) -> pl.DataFrame:
+    """
+    Group enriched commitments into one summary row per L1 block.
+
+    Args:
+        commitments (pl.DataFrame): Enriched commitments with SUMMARY_COLUMNS.
+
+    Returns:
+        pl.DataFrame: The block summaries, in the column order of l1_block_summary.
+    """
+    return (
+        commitments.group_by("block_number_l1")
+        .agg(
+            # Block level fields are the same on every commitment of the block
+            pl.col("block_hash_l1").first(),
+            pl.col("timestamp_l1").first().cast(pl.Int64),
+            pl.col("builder_graffiti").first(),
+            pl.col("base_fee_per_gas_l1").first().cast(pl.Float64),
+            pl.col("gas_used_block_l1").first().cast(pl.Int64),
+            pl.len().cast(pl.Int64).alias("preconf_count"),
+            pl.col("txnHash").n_unique().cast(pl.Int64).alias("txn_count"),
+            # Several commitments can preconfirm the same transaction
+            pl.col("gas_used_l1")
+            .filter(pl.col("txnHash").is_first_distinct())
+            .sum()
+            .cast(pl.Int64)
+            .alias("preconf_gas_used"),
+            pl.col("bid_eth").sum().alias("total_bid_eth"),
+            pl.col("decayed_bid_eth").sum().alias("total_decayed_bid_eth"),
+            pl.col("isSlash").cast(pl.Int64).sum().alias("slash_count"),
+            pl.col("bidder").n_unique().cast(pl.Int64).alias("bidder_count"),
+            pl.col("committer").n_unique().cast(pl.Int64).alias("provider_count"),
+        )
+        .with_columns(pl.col("block_number_l1").cast(pl.Int64))
+        .sort("block_number_l1")
+    )
+
+
+def update_block_summary(
+    db_filename: str,
+    dataframes: Dict[str, pl.DataFrame],
+    changes: Optional[ChangeSet] = None,
+) -> int:
+    """
+    Bring the L1 block summaries up to date with the rows written this cycle.
+
+    The summaries from the lowest L1 block touched by the new rows onwards are
+    rebuilt, which is usually just the latest few blocks. An empty table is
+    backfilled from every commitment, including the archived ones.
+
+    Args:
+        db_filename (str): Path of the DuckDB database.
+        dataframes (Dict[str, pl.DataFrame]): The rows written this cycle, by table.
+        changes (Optional[ChangeSet]): If given, the rebuilt blocks are recorded in
+            it for replicas.
+
+    Returns:
+        int: The number of block summaries written.
+    """
+    written = 0
+    lockfile = acquire_lock(LOCKFILE_PATH)
+    try:
+        with duckdb.connect(db_filename) as conn:
+            tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+            if not {*CHANGE_TABLES, "l1_transactions"} <= tables:
+                return 0
+            conn.execute(L1_BLOCK_SUMMARY_DDL)
+
+            if not conn.execute("SELECT 1 FROM l1_block_summary LIMIT 1").fetchone():
+                since = 0
+            else:
+                since = earliest_changed_block(conn, dataframes)
+            if since is None:
+                return 0
+
+            commitments = conn.execute(
+                commitments_query(
+                    [f"block_number_l1 >= {since}"],
+                    archive_files=archive_files(
+                        db_filename, {"block_number_l1": (since, None)}
+                    ),
+                    columns=join_columns(SUMMARY_COLUMNS),
+                )
+            ).pl()
+            summaries = (
+                summarize_blocks(enrich_commitments(commitments, SUMMARY_COLUMNS))
+                if not commitments.is_empty()
+                else None
+            )
+
+            conn.begin()
+            conn.execute(
+                "DELETE FROM l1_block_summary WHERE block_number_l1 >= ?", [since]
+            )
+            if summaries is not None:
+                conn.register("new_summaries", summaries.to_arrow())
+                conn.execute("INSERT INTO l1_block_summary SELECT * FROM new_summaries")
+                conn.unregister("new_summaries")
+                written = summaries.height
+            conn.commit()
+            if changes is not None:
+                changes.replace("l1_block_summary", "block_number_l1", since, summaries)
+    except Exception as e:
+        logging.error(f"Error updating L1 block summaries: {e}")
+    finally:
+        release_lock(lockfile)
+    return written
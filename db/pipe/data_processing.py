@@ -2,13 +2,34 @@ import fcntl
 import os
 import polars as pl
 import duckdb
-from typing import Dict, List
+from typing import Dict, List, Optional
 import time
 import logging
-from db_lock import acquire_lock, release_lock
+from db_lock import LOCKFILE_PATH as SHARED_LOCKFILE_PATH
+from db_lock import acquire_lock, release_lock, shard_lockfile
+from archive import archive_files, archived_max_block
+from changelog import get_position
+from commitments import COMMITMENTS_SQL, commitments_query, enrich_commitments
 
-# Define a global lock file path
-LOCKFILE_PATH = "/tmp/duckdb_lock"
+# Network this worker indexes. Each network gets its own worker and database under
+# db/data/<NETWORK>; without NETWORK the database is db/data/mev_commit.duckdb.
+NETWORK = os.getenv("NETWORK", "")
+DB_DIR = os.path.join("db/data", NETWORK) if NETWORK else "db/data"
+
+# Lock shared with the backend's readers: the shard's own lock next to its database
+# when NETWORK is set (see backend/api/shards.py), otherwise DUCKDB_LOCKFILE
+LOCKFILE_PATH = shard_lockfile(DB_DIR) if NETWORK else SHARED_LOCKFILE_PATH
+
+
+def _acquire_lock_timed(stats: Optional[Dict] = None):
+    """Acquire the DuckDB lock, adding the time spent waiting to stats["lock_wait_seconds"]."""
+    start = time.perf_counter()
+    lockfile = acquire_lock(LOCKFILE_PATH)
+    if stats is not None:
+        stats["lock_wait_seconds"] = (
+            stats.get("lock_wait_seconds", 0.0) + time.perf_counter() - start
+        )
+    return lockfile
 
 
 def load_and_join_data(db_filename: str, tables: List[str]) -> pl.DataFrame:
@@ -107,13 +128,16 @@ def join_dataframes(dataframes: Dict[str, pl.DataFrame]) -> pl.DataFrame:
 
 
 def get_latest_block_number(
-    table_name: str, block_column: str, db_filename: str
+    table_name: str, block_column: str, db_filename: str, stats: Optional[Dict] = None
 ) -> int:
     """
-    Retrieves the latest (maximum) block number from the specified table and column.
+    Retrieves the latest (maximum) block number from the specified table and column,
+    including the rows moved to the archive. If `stats` is given, the time spent
+    waiting for the lock is added to it.
     """
+    archived = archived_max_block(db_filename, table_name)
     # Acquire lock before accessing DuckDB
-    lockfile = acquire_lock(LOCKFILE_PATH)
+    lockfile = _acquire_lock_timed(stats)
     try:
         if os.path.exists(db_filename):
             conn = duckdb.connect(db_filename, read_only=True)
@@ -127,61 +151,166 @@ def get_latest_block_number(
 
         if not table_exists:
             conn.close()
-            return 0  # Table doesn't exist yet
+            return archived  # Table doesn't exist yet
 
         result = conn.execute(
             f"SELECT MAX({block_column}) FROM {table_name}"
         ).fetchone()[0]
         conn.close()
-        return int(result) if result is not None else 0
+        return max(int(result), archived) if result is not None else archived
 
     finally:
         # Release the lock after operation is done
         release_lock(lockfile)
 
 
-def write_to_duckdb(df: pl.DataFrame, table_name: str, db_filename: str) -> str:
-    """
-    Writes a Polars DataFrame to a DuckDB table.
-    Returns a string indicating the action taken for logging purposes.
+# Enriched archived commitments, reused until the archive files change
+_cold_cache: Dict[str, tuple] = {}
+
+
+def _load_enriched_archive(db_filename: str) -> Optional[pl.DataFrame]:
+    files = archive_files(db_filename)
+    if not files:
+        return None
+    cached = _cold_cache.get(db_filename)
+    if cached is not None and cached[0] == files:
+        return cached[1]
+    df = enrich_commitments(pl.read_parquet(files))
+    _cold_cache[db_filename] = (files, df)
+    return df
+
+
+def load_enriched_commitments(db_filename: str) -> Optional[pl.DataFrame]:
     """
-    if df.is_empty():
-        # No new data to write
-        return f"{table_name}: no new data"
+    Runs the commitments join and enrichment served by the backend, newest
+    commitments first. Returns None if some of the source tables do not exist yet.
 
-    action = ""
-    # Acquire lock before writing to DuckDB
+    Archived commitments are included; they only change when the tiering job runs,
+    so their enrichment is cached by archive file list and only the hot tier is
+    joined every cycle.
+    """
     lockfile = acquire_lock(LOCKFILE_PATH)
     try:
-        with duckdb.connect(db_filename) as conn:
-            # Register the Polars DataFrame as a DuckDB view using Arrow
-            conn.register("df_temp", df.to_arrow())
-
-            # Check if the table exists
-            table_exists = conn.execute(
-                "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?",
-                [table_name],
-            ).fetchone()[0]
-
-            if not table_exists:
-                # Create table and insert data
-                conn.execute(f"CREATE TABLE {table_name} AS SELECT * FROM df_temp")
-                action = f"{table_name}: created table with {len(df)} records"
-            else:
-                # Append data without checking for duplicates
-                conn.execute(f"INSERT INTO {table_name} SELECT * FROM df_temp")
-                action = f"{table_name}: inserted {len(df)} new records"
-
-            # Unregister the temporary view
-            conn.unregister("df_temp")
-    except Exception as e:
-        logging.error(f"Error writing to DuckDB table {table_name}: {e}")
-        return f"{table_name}: Failed to write records."
+        with duckdb.connect(db_filename, read_only=True) as conn:
+            tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+            required = {
+                "encrypted_stores",
+                "commit_stores",
+                "commits_processed",
+                "l1_transactions",
+            }
+            if not required <= tables:
+                return None
+            df = conn.execute(commitments_query()).pl()
     finally:
-        # Release the lock after writing
         release_lock(lockfile)
 
-    return action
+    df = enrich_commitments(df)
+    cold = _load_enriched_archive(db_filename)
+    if cold is not None:
+        df = pl.concat([df, cold], how="vertical_relaxed")
+    return df.sort("inc_block_number", descending=True, maintain_order=True)
+
+
+# A commitment joins the enriched view once all of these tables have its row
+CHANGE_TABLES = ("encrypted_stores", "commit_stores", "commits_processed")
+
+
+def earliest_changed_timestamp(
+    conn: duckdb.DuckDBPyConnection,
+    dataframes: Dict[str, pl.DataFrame],
+    since_ms: int = 0,
+) -> Optional[int]:
+    """
+    Returns the oldest timestamp (ms) of the joined commitments that rows written
+    this cycle added or changed, including those completed by newly fetched L1
+    transactions, ignoring commitments older than `since_ms`. Returns None if the
+    new rows touched no such commitment.
+    """
+    changed = [
+        dataframes[table].select(pl.col("commitmentIndex").cast(pl.String))
+        for table in CHANGE_TABLES
+        if table in dataframes and not dataframes[table].is_empty()
+    ]
+    l1_transactions = dataframes.get("l1_transactions")
+    if l1_transactions is None or l1_transactions.is_empty():
+        l1_transactions = pl.DataFrame(schema={"hash": pl.String})
+    if not changed and l1_transactions.is_empty():
+        return None
+    changed = (
+        pl.concat(changed)
+        if changed
+        else pl.DataFrame(schema={"commitmentIndex": pl.String})
+    )
+    conn.register("changed_commitments", changed.to_arrow())
+    conn.register(
+        "changed_l1_transactions",
+        l1_transactions.select(pl.col("hash").cast(pl.String)).to_arrow(),
+    )
+    try:
+        return conn.execute(
+            f"""
+            SELECT MIN(timestamp) FROM ({COMMITMENTS_SQL}) AS commitments
+            WHERE timestamp >= ? AND (
+                commitmentIndex IN (SELECT commitmentIndex FROM changed_commitments)
+                OR txnHash IN (SELECT hash FROM changed_l1_transactions)
+            )
+            """,
+            [since_ms],
+        ).fetchone()[0]
+    finally:
+        conn.unregister("changed_commitments")
+        conn.unregister("changed_l1_transactions")
+
+
+def earliest_changed_block(
+    conn: duckdb.DuckDBPyConnection, dataframes: Dict[str, pl.DataFrame]
+) -> Optional[int]:
+    """
+    Returns the lowest L1 block number of the joined commitments that rows written
+    this cycle added or changed, including those completed by newly fetched L1
+    transactions. Returns None if the new rows touched no commitment.
+    """
+    blocks = []
+    changed = [
+        dataframes[table].select(pl.col("commitmentIndex").cast(pl.String))
+        for table in CHANGE_TABLES
+        if table in dataframes and not dataframes[table].is_empty()
+    ]
+    if changed:
+        conn.register("changed_commitments", pl.concat(changed).to_arrow())
+        try:
+            query = f"""
+                SELECT MIN(block_number_l1) FROM ({COMMITMENTS_SQL}) AS commitments
+                WHERE commitmentIndex IN (
+                    SELECT commitmentIndex FROM changed_commitments
+                )
+                """
+            blocks.append(conn.execute(query).fetchone()[0])
+        finally:
+            conn.unregister("changed_commitments")
+
+    l1_transactions = dataframes.get("l1_transactions")
+    if l1_transactions is not None and not l1_transactions.is_empty():
+        blocks.append(l1_transactions["block_number"].min())
+
+    blocks = [int(block) for block in blocks if block is not None]
+    return min(blocks) if blocks else None
+
+
+def get_changelog_position(db_filename: str) -> int:
+    """
+    Sequence number of the last change log entry recorded as published for the
+    database, or 0. The next entry takes the number after it.
+    """
+    if not os.path.exists(db_filename):
+        return 0
+    lockfile = acquire_lock(LOCKFILE_PATH)
+    try:
+        with duckdb.connect(db_filename, read_only=True) as conn:
+            return get_position(conn)
+    finally:
+        release_lock(lockfile)
 
 
 def read_db(
@@ -0,0 +1,324 @@
+import logging
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+import duckdb
+import polars as pl
+from db_lock import acquire_lock, release_lock
+from changelog import set_position
+from data_processing import LOCKFILE_PATH
+
+# Directory next to the DuckDB database file holding the fetched batches that have
+# not been merged into the database yet
+LANDING_DIRNAME = "landing"
+
+# Table recording the sequence number of the last segment merged into the database
+CHECKPOINT_TABLE = "landing_checkpoint"
+
+# Table recording the sequence number of the last merged segment that the derived
+# tables and the change log have taken in. Segments are kept until then, so a crash
+# in between is recovered by replaying them.
+PUBLISHED_TABLE = "landing_published"
+
+# A compaction stops adding segments once it holds this many rows; the rest are
+# merged by the next one
+COMPACT_MAX_ROWS = int(os.getenv("LANDING_COMPACT_MAX_ROWS", "1000000"))
+
+# Segment files: <seq>.<table>.arrow, renamed into place once fully written
+_SEGMENT_RE = re.compile(r"^(\d{12})\.(\w+)\.arrow$")
+
+
+def landing_dir(db_filename: str) -> str:
+    """Return the landing directory that belongs to the given database file."""
+    return os.path.join(os.path.dirname(db_filename), LANDING_DIRNAME)
+
+
+def _fsync_dir(directory: str) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def list_segments(db_filename: str, after: int = 0) -> List[Tuple[int, str, str]]:
+    """
+    Complete segments of the landing log after `after`, oldest first.
+
+    Returns:
+        List[Tuple[int, str, str]]: The sequence number, table and path of each segment.
+    """
+    directory = landing_dir(db_filename)
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    segments = []
+    for name in names:
+        match = _SEGMENT_RE.match(name)
+        if match and int(match.group(1)) > after:
+            segments.append(
+                (int(match.group(1)), match.group(2), os.path.join(directory, name))
+            )
+    return sorted(segments)
+
+
+def land_batch(db_filename: str, table_name: str, df: pl.DataFrame) -> Optional[int]:
+    """
+    Append a fetched batch to the landing log.
+
+    The batch is written as an Arrow IPC file under a temporary name, flushed to disk
+    and renamed into place, so once this returns the batch survives a crash and a
+    segment is never seen half written.
+
+    Args:
+        db_filename (str): Path of the DuckDB database the batch is bound for.
+        table_name (str): Table the batch is merged into.
+        df (pl.DataFrame): The fetched rows.
+
+    Returns:
+        Optional[int]: The sequence number of the segment, or None if the batch is empty.
+    """
+    if df is None or df.is_empty():
+        return None
+    directory = landing_dir(db_filename)
+    os.makedirs(directory, exist_ok=True)
+    # Only the fetch loop appends, so the next number cannot be taken concurrently.
+    # Merged segments that could not be deleted are below the checkpoint.
+    existing = list_segments(db_filename)
+    seq = max(existing[-1][0] if existing else 0, get_checkpoint(db_filename)) + 1
+
+    path = os.path.join(directory, f"{seq:012d}.{table_name}.arrow")
+    with open(f"{path}.tmp", "wb") as f:
+        df.write_ipc(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f"{path}.tmp", path)
+    _fsync_dir(directory)
+    return seq
+
+
+def landed_max_block(db_filename: str, table_name: str) -> int:
+    """
+    Highest block_number of a table's segments still in the landing log, or 0.
+
+    Callers that also read the database must call this first: the compactor commits
+    segments to the database before deleting them, so a segment missed here is then
+    found in the database.
+    """
+    highest = 0
+    for _, table, path in list_segments(db_filename):
+        if table != table_name:
+            continue
+        try:
+            block = pl.read_ipc(path, columns=["block_number"])["block_number"].max()
+        except FileNotFoundError:
+            # Merged and deleted by the compactor since it was listed
+            continue
+        if block is not None:
+            highest = max(highest, int(block))
+    return highest
+
+
+def _read_seq(conn: duckdb.DuckDBPyConnection, table_name: str) -> int:
+    tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+    if table_name not in tables:
+        return 0
+    row = conn.execute(f"SELECT MAX(seq) FROM {table_name}").fetchone()
+    return int(row[0] or 0)
+
+
+def _read_checkpoints(db_filename: str) -> Tuple[int, int]:
+    """The merge checkpoint and the published checkpoint of a database, or zeros."""
+    if not os.path.exists(db_filename):
+        return 0, 0
+    lockfile = acquire_lock(LOCKFILE_PATH)
+    try:
+        with duckdb.connect(db_filename, read_only=True) as conn:
+            return _read_seq(conn, CHECKPOINT_TABLE), _read_seq(conn, PUBLISHED_TABLE)
+    finally:
+        release_lock(lockfile)
+
+
+def get_checkpoint(db_filename: str) -> int:
+    """Sequence number of the last segment merged into the database, or 0."""
+    return _read_checkpoints(db_filename)[0]
+
+
+def get_published(db_filename: str) -> int:
+    """Sequence number of the last merged segment that was published, or 0."""
+    return _read_checkpoints(db_filename)[1]
+
+
+def _remove_merged(db_filename: str, through: int) -> None:
+    """Delete the published segments, up to and including `through`."""
+    try:
+        for seq, _, path in list_segments(db_filename):
+            if seq <= through:
+                os.remove(path)
+    except OSError as e:
+        # They are skipped by the checkpoints and deleted by the next compaction
+        logging.warning(f"Error deleting merged landing segments: {e}")
+
+
+def mark_published(db_filename: str, changelog_seq: Optional[int] = None) -> None:
+    """
+    Record that the derived tables and the change log have taken in every merged
+    segment, and delete those segments.
+
+    Call once the rows returned by compact_landed are published; until then a
+    failure or a crash makes the next compaction return them again. The sequence
+    number of the change log entry published with them, if any, is recorded as the
+    database's changelog_position in the same transaction.
+    """
+    if not os.path.exists(db_filename):
+        return
+    lockfile = acquire_lock(LOCKFILE_PATH)
+    try:
+        with duckdb.connect(db_filename) as conn:
+            through = _read_seq(conn, CHECKPOINT_TABLE)
+            conn.begin()
+            try:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {PUBLISHED_TABLE} (seq BIGINT)"
+                )
+                conn.execute(f"DELETE FROM {PUBLISHED_TABLE}")
+                conn.execute(f"INSERT INTO {PUBLISHED_TABLE} VALUES (?)", [through])
+                if changelog_seq is not None:
+                    set_position(conn, changelog_seq)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    finally:
+        release_lock(lockfile)
+    _remove_merged(db_filename, through)
+
+
+def discard_partial_segments(db_filename: str) -> int:
+    """
+    Delete the segments a crash left half written. Call before fetching starts.
+
+    Returns:
+        int: The number of files deleted.
+    """
+    directory = landing_dir(db_filename)
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return 0
+    partial = [name for name in names if name.endswith(".tmp")]
+    for name in partial:
+        os.remove(os.path.join(directory, name))
+    return len(partial)
+
+
+def _concat_sorted(batches: Dict[str, List[pl.DataFrame]]) -> Dict[str, pl.DataFrame]:
+    return {
+        table_name: pl.concat(dfs, how="vertical_relaxed").sort(
+            "block_number", maintain_order=True
+        )
+        for table_name, dfs in batches.items()
+    }
+
+
+def compact_landed(
+    db_filename: str, stats: Optional[Dict[str, Dict]] = None
+) -> Dict[str, pl.DataFrame]:
+    """
+    Merge the oldest segments of the landing log into DuckDB.
+
+    The segments of each table are concatenated and sorted by block_number, and all
+    tables are inserted in one transaction together with the new checkpoint. The
+    merged segments are kept until mark_published is called, so a crash at any point
+    is recovered by running the compaction again: segments at or below the
+    checkpoint are not inserted again, but those not yet published are returned
+    again with the new rows, for the derived tables and the change log to take in.
+
+    Args:
+        db_filename (str): Path of the DuckDB database.
+        stats (Optional[Dict[str, Dict]]): If given, filled with the lock wait and
+            write durations and the rows and bytes (Arrow size) written, by table, in
+            the form taken by CycleTelemetry.add_write.
+
+    Returns:
+        Dict[str, pl.DataFrame]: The rows merged and the rows merged earlier but not
+            yet published, by table; empty if there was nothing to merge or publish.
+    """
+    checkpoint, published = _read_checkpoints(db_filename)
+    # Segments above the checkpoint are inserted; all of them are returned
+    merged: Dict[str, List[pl.DataFrame]] = {}
+    pending: Dict[str, List[pl.DataFrame]] = {}
+    rows = replayed = 0
+    through = checkpoint
+    for seq, table_name, path in list_segments(db_filename, published):
+        if seq > checkpoint and rows and rows >= COMPACT_MAX_ROWS:
+            break
+        df = pl.read_ipc(path)
+        pending.setdefault(table_name, []).append(df)
+        if seq > checkpoint:
+            merged.setdefault(table_name, []).append(df)
+            rows += df.height
+            through = seq
+        else:
+            replayed += 1
+    if not pending:
+        _remove_merged(db_filename, published)
+        return {}
+    if replayed:
+        logging.info(
+            f"Replaying {replayed} landing segments up to {checkpoint}, merged but "
+            "not published yet"
+        )
+    dataframes = _concat_sorted(merged)
+    if not dataframes:
+        return _concat_sorted(pending)
+
+    start = time.perf_counter()
+    lockfile = acquire_lock(LOCKFILE_PATH)
+    lock_wait = time.perf_counter() - start
+    start = time.perf_counter()
+    try:
+        with duckdb.connect(db_filename) as conn:
+            conn.begin()
+            try:
+                for table_name, df in dataframes.items():
+                    conn.register("landed", df.to_arrow())
+                    conn.execute(
+                        f"CREATE TABLE IF NOT EXISTS {table_name} AS "
+                        "SELECT * FROM landed LIMIT 0"
+                    )
+                    conn.execute(f"INSERT INTO {table_name} SELECT * FROM landed")
+                    conn.unregister("landed")
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (seq BIGINT)"
+                )
+                conn.execute(f"DELETE FROM {CHECKPOINT_TABLE}")
+                conn.execute(f"INSERT INTO {CHECKPOINT_TABLE} VALUES (?)", [through])
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    finally:
+        release_lock(lockfile)
+    write_seconds = time.perf_counter() - start
+
+    if stats is not None:
+        total_rows = sum(df.height for df in dataframes.values())
+        for table_name, df in dataframes.items():
+            # The lock wait and the transaction are shared by the tables, so they are
+            # split in proportion to the rows of each
+            share = df.height / total_rows if total_rows else 0.0
+            stats[table_name] = {
+                "lock_wait_seconds": lock_wait * share,
+                "write_seconds": write_seconds * share,
+                "rows_written": df.height,
+                "bytes_written": df.estimated_size(),
+            }
+
+    logging.info(
+        f"Compacted landing segments {checkpoint + 1}-{through} into "
+        f"{len(dataframes)} tables ({rows} rows)"
+    )
+    return _concat_sorted(pending)
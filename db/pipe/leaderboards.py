@@ -0,0 +1,188 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+import duckdb
+import polars as pl
+from db_lock import acquire_lock, release_lock
+from archive import archive_files
+from changelog import ChangeSet
+from commitments import commitments_query, enrich_commitments
+from data_processing import CHANGE_TABLES, LOCKFILE_PATH, earliest_changed_timestamp
+
+# Per-bucket totals of every bidder and provider. The backend's leaderboards sum the
+# buckets of a window instead of regrouping the commitments.
+LEADERBOARD_BUCKETS_DDL = """
+CREATE TABLE IF NOT EXISTS leaderboard_buckets (
+    resolution VARCHAR,
+    bucket_start TIMESTAMP,
+    role VARCHAR,
+    address VARCHAR,
+    preconf_count BIGINT,
+    total_bid_eth DOUBLE,
+    total_decayed_bid_eth DOUBLE,
+    slash_count BIGINT
+)
+"""
+
+# Resolution -> (bucket width, retention). Each retention covers the longest
+# leaderboard window served from that resolution (24h and 30d).
+BUCKET_RESOLUTIONS = {
+    "minute": ("1m", timedelta(hours=24)),
+    "hour": ("1h", timedelta(days=30)),
+}
+
+# Leaderboard role -> commitments column holding its address
+ROLES = {"bidder": "bidder", "provider": "committer"}
+
+
+def _truncate(ts: datetime, width: str) -> datetime:
+    if width == "1m":
+        return ts.replace(second=0, microsecond=0)
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def bucket_commitments(commitments: pl.DataFrame, now: datetime) -> pl.DataFrame:
+    """
+    Group enriched commitments into leaderboard buckets of every resolution and role.
+
+    Commitments older than the retention of a resolution are left out of it.
+
+    Args:
+        commitments (pl.DataFrame): Enriched commitments.
+        now (datetime): Current time (naive UTC) the retention is measured from.
+
+    Returns:
+        pl.DataFrame: One row per resolution, bucket, role and address.
+    """
+    frames = []
+    for resolution, (width, retention) in BUCKET_RESOLUTIONS.items():
+        recent = commitments.filter(pl.col("date") >= _truncate(now - retention, width))
+        for role, column in ROLES.items():
+            frames.append(
+                recent.group_by(
+                    pl.col("date").dt.truncate(width).alias("bucket_start"),
+                    pl.col(column).alias("address"),
+                )
+                .agg(
+                    pl.len().cast(pl.Int64).alias("preconf_count"),
+                    pl.col("bid_eth").sum().alias("total_bid_eth"),
+                    pl.col("decayed_bid_eth").sum().alias("total_decayed_bid_eth"),
+                    pl.col("isSlash").cast(pl.Int64).sum().alias("slash_count"),
+                )
+                .select(
+                    pl.lit(resolution).alias("resolution"),
+                    pl.col("bucket_start").cast(pl.Datetime("us")),
+                    pl.lit(role).alias("role"),
+                    "address",
+                    "preconf_count",
+                    "total_bid_eth",
+                    "total_decayed_bid_eth",
+                    "slash_count",
+                )
+            )
+    return pl.concat(frames)
+
+
+def update_leaderboard_buckets(
+    db_filename: str,
+    dataframes: Dict[str, pl.DataFrame],
+    changes: Optional[ChangeSet] = None,
+) -> Dict[str, int]:
+    """
+    Bring the leaderboard buckets up to date with the rows written this cycle, and
+    drop the buckets that slid out of their retention.
+
+    Only buckets from the hour of the oldest commitment touched by the new rows
+    onwards are recomputed, which is usually just the current hour. An empty bucket
+    table is backfilled over the longest retention.
+
+    Args:
+        db_filename (str): Path of the DuckDB database.
+        dataframes (Dict[str, pl.DataFrame]): The rows written this cycle, by table.
+        changes (Optional[ChangeSet]): If given, the bucket changes are recorded in
+            it for replicas.
+
+    Returns:
+        Dict[str, int]: The number of buckets written and expired.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    oldest = now - max(retention for _, retention in BUCKET_RESOLUTIONS.values())
+    stats = {"buckets_written": 0, "buckets_expired": 0}
+
+    lockfile = acquire_lock(LOCKFILE_PATH)
+    try:
+        with duckdb.connect(db_filename) as conn:
+            tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+            if not {*CHANGE_TABLES, "l1_transactions"} <= tables:
+                return stats
+            conn.execute(LEADERBOARD_BUCKETS_DDL)
+
+            oldest_ms = int(oldest.replace(tzinfo=timezone.utc).timestamp() * 1000)
+            if not conn.execute("SELECT 1 FROM leaderboard_buckets LIMIT 1").fetchone():
+                since_ms = oldest_ms
+            else:
+                # Changes to commitments older than every retention affect no bucket
+                since_ms = earliest_changed_timestamp(conn, dataframes, oldest_ms)
+
+            if since_ms is not None:
+                # Recompute whole hours so the minute and hour buckets stay aligned
+                since = _truncate(
+                    datetime.fromtimestamp(since_ms / 1000, timezone.utc).replace(
+                        tzinfo=None
+                    ),
+                    "1h",
+                )
+                since_ms = int(since.replace(tzinfo=timezone.utc).timestamp() * 1000)
+                commitments = conn.execute(
+                    commitments_query(
+                        [f"timestamp >= {since_ms}"],
+                        archive_files=archive_files(
+                            db_filename, {"timestamp": (since_ms, None)}
+                        ),
+                    )
+                ).pl()
+                buckets = (
+                    bucket_commitments(enrich_commitments(commitments), now)
+                    if not commitments.is_empty()
+                    else None
+                )
+
+                conn.begin()
+                conn.execute(
+                    "DELETE FROM leaderboard_buckets WHERE bucket_start >= ?", [since]
+                )
+                if buckets is not None and not buckets.is_empty():
+                    conn.register("new_buckets", buckets.to_arrow())
+                    conn.execute(
+                        "INSERT INTO leaderboard_buckets SELECT * FROM new_buckets"
+                    )
+                    conn.unregister("new_buckets")
+                    stats["buckets_written"] = buckets.height
+                conn.commit()
+                if changes is not None:
+                    changes.replace(
+                        "leaderboard_buckets", "bucket_start", since, buckets
+                    )
+
+            for resolution, (width, retention) in BUCKET_RESOLUTIONS.items():
+                expiry = _truncate(now - retention, width)
+                expired = conn.execute(
+                    """
+                    DELETE FROM leaderboard_buckets
+                    WHERE resolution = ? AND bucket_start < ?
+                    """,
+                    [resolution, expiry],
+                ).fetchone()[0]
+                stats["buckets_expired"] += expired
+                if changes is not None and expired:
+                    changes.delete(
+                        "leaderboard_buckets",
+                        "bucket_start",
+                        expiry,
+                        {"resolution": resolution},
+                    )
+    except Exception as e:
+        logging.error(f"Error updating leaderboard buckets: {e}")
+    finally:
+        release_lock(lockfile)
+    return stats
@@ -0,0 +1,80 @@
+import os
+import logging
+import duckdb
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from db_lock import acquire_lock, release_lock
+from data_processing import LOCKFILE_PATH
+
+# Port the ingestion daemon serves /metrics on
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+
+CYCLE_DURATION = Histogram(
+    "pipeline_cycle_duration_seconds",
+    "Duration of a full get_events cycle.",
+    buckets=(1, 2.5, 5, 10, 20, 30, 60, 120, 300),
+)
+
+CYCLE_RECORDS = Gauge(
+    "pipeline_cycle_records",
+    "Records fetched for each stream in the last cycle.",
+    ["stream"],
+)
+
+RECORDS_TOTAL = Counter(
+    "pipeline_records_total",
+    "Records fetched for each stream since the daemon started.",
+    ["stream"],
+)
+
+HYPERSYNC_LATENCY = Histogram(
+    "hypersync_request_seconds",
+    "Latency of hypersync calls.",
+    ["call"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+L1_ENRICHMENT_BACKLOG = Gauge(
+    "pipeline_l1_enrichment_backlog",
+    "Opened commitments whose L1 transaction has not been fetched yet.",
+)
+
+BLOCK_LAG = Gauge(
+    "pipeline_block_lag",
+    "Blocks between the chain head and the latest ingested block for each stream.",
+    ["stream"],
+)
+
+CHAIN_HEAD = Gauge(
+    "pipeline_chain_head_block",
+    "Latest block reported by hypersync.",
+)
+
+
+def start_metrics_server() -> None:
+    """Serve the pipeline metrics over HTTP in a background thread."""
+    start_http_server(METRICS_PORT)
+    logging.info(f"Serving pipeline metrics on port {METRICS_PORT}")
+
+
+def count_l1_enrichment_backlog(db_filename: str) -> int:
+    """
+    Count opened commitments that have no matching row in l1_transactions.
+    """
+    if not os.path.exists(db_filename):
+        return 0
+
+    lockfile = acquire_lock(LOCKFILE_PATH)
+    try:
+        with duckdb.connect(db_filename, read_only=True) as conn:
+            tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+            if "commit_stores" not in tables:
+                return 0
+            if "l1_transactions" not in tables:
+                return conn.execute("SELECT COUNT(*) FROM commit_stores").fetchone()[0]
+            return conn.execute("""
+                SELECT COUNT(*)
+                FROM commit_stores cs
+                ANTI JOIN l1_transactions l1 ON l1.hash = '0x' || cs.txnHash
+                """).fetchone()[0]
+    finally:
+        release_lock(lockfile)
@@ -0,0 +1,244 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+import duckdb
+import polars as pl
+from db_lock import acquire_lock, release_lock
+from archive import archive_files
+from changelog import ChangeSet
+from commitments import commitments_query, enrich_commitments, join_columns
+from data_processing import CHANGE_TABLES, LOCKFILE_PATH, earliest_changed_timestamp
+from sketches import DAY_BUCKET, PROVIDER_METRICS, day_of, sketch_metrics
+
+# Per day and provider totals. /providers/performance sums the days of a window and
+# divides, so rates and means are exact over any range.
+PROVIDER_PERFORMANCE_DAYS_DDL = """
+CREATE TABLE IF NOT EXISTS provider_performance_days (
+    day TIMESTAMP,
+    committer VARCHAR,
+    preconf_count BIGINT,
+    slash_count BIGINT,
+    on_target_count BIGINT,
+    total_bid_eth DOUBLE,
+    total_decayed_bid_eth DOUBLE,
+    dispatch_latency_sum DOUBLE,
+    decay_start_latency_sum DOUBLE,
+    block_gap_sum BIGINT
+)
+"""
+
+# Quantile sketch bins of PROVIDER_METRICS per day and provider (see
+# common/sketches.py), merged by summing the counts of each bin
+PROVIDER_PERFORMANCE_BINS_DDL = """
+CREATE TABLE IF NOT EXISTS provider_performance_bins (
+    day TIMESTAMP,
+    committer VARCHAR,
+    metric VARCHAR,
+    bin INTEGER,
+    count BIGINT
+)
+"""
+
+# Enriched commitment columns the metrics are computed from
+PERFORMANCE_COLUMNS = (
+    "date",
+    "committer",
+    "isSlash",
+    "bid_eth",
+    "decayed_bid_eth",
+    "decay_multiplier",
+    "inc_block_number",
+    "dispatchTimestamp",
+    "decayStartTimeStamp",
+    "block_number_l1",
+    "timestamp_l1",
+)
+
+# Seconds between L1 slots, to extrapolate block numbers past the last known block
+SLOT_SECONDS = 12
+
+# The L1 block timeline starts this long before the oldest commitment rebuilt, so
+# the first dispatches of the range still find the block current at the time
+TIMELINE_MARGIN = timedelta(hours=1)
+
+
+def inclusion_metrics(
+    commitments: pl.DataFrame, timeline: pl.DataFrame
+) -> pl.DataFrame:
+    """
+    Compute the inclusion metrics of enriched commitments.
+
+    The L1 block current at dispatch is found with an as-of join of the dispatch
+    times on the L1 block timeline: the latest known block at or before the dispatch,
+    plus the slots elapsed since. All metrics are vectorized expressions.
+
+    Args:
+        commitments (pl.DataFrame): Enriched commitments with PERFORMANCE_COLUMNS.
+        timeline (pl.DataFrame): L1 block_number and timestamp (seconds) of known blocks.
+
+    Returns:
+        pl.DataFrame: The commitments with the PROVIDER_METRICS columns added.
+    """
+    timeline = (
+        timeline.select(
+            pl.col("block_number").cast(pl.Int64).alias("dispatch_head_block"),
+            pl.col("timestamp").cast(pl.Int64).alias("dispatch_head_ts"),
+        )
+        .unique("dispatch_head_ts", keep="last")
+        .sort("dispatch_head_ts")
+    )
+    return (
+        commitments.with_columns(
+            pl.col("timestamp_l1").cast(pl.Int64),
+            pl.col("block_number_l1").cast(pl.Int64),
+            pl.col("inc_block_number").cast(pl.Int64),
+            (pl.col("dispatchTimestamp").cast(pl.Int64) // 1000).alias("dispatch_s"),
+        )
+        .sort("dispatch_s")
+        .join_asof(
+            timeline,
+            left_on="dispatch_s",
+            right_on="dispatch_head_ts",
+            strategy="backward",
+        )
+        .with_columns(
+            (
+                pl.col("timestamp_l1")
+                - pl.col("dispatchTimestamp").cast(pl.Int64) / 1000
+            ).alias("dispatch_latency_s"),
+            (
+                pl.col("timestamp_l1")
+                - pl.col("decayStartTimeStamp").cast(pl.Int64) / 1000
+            ).alias("decay_start_latency_s"),
+            (pl.col("block_number_l1") - pl.col("inc_block_number")).alias("block_gap"),
+            (
+                pl.col("block_number_l1")
+                - pl.col("dispatch_head_block")
+                - (pl.col("dispatch_s") - pl.col("dispatch_head_ts")) // SLOT_SECONDS
+            ).alias("dispatch_block_gap"),
+        )
+        .drop("dispatch_s", "dispatch_head_block", "dispatch_head_ts")
+    )
+
+
+def summarize_provider_days(metrics: pl.DataFrame) -> pl.DataFrame:
+    """Group commitments with inclusion metrics into per day and provider totals."""
+    return (
+        metrics.group_by(DAY_BUCKET.cast(pl.Datetime("us")).alias("day"), "committer")
+        .agg(
+            pl.len().cast(pl.Int64).alias("preconf_count"),
+            pl.col("isSlash").cast(pl.Int64).sum().alias("slash_count"),
+            (pl.col("block_gap") == 0).sum().cast(pl.Int64).alias("on_target_count"),
+            pl.col("bid_eth").sum().alias("total_bid_eth"),
+            pl.col("decayed_bid_eth").sum().alias("total_decayed_bid_eth"),
+            pl.col("dispatch_latency_s").sum().alias("dispatch_latency_sum"),
+            pl.col("decay_start_latency_s").sum().alias("decay_start_latency_sum"),
+            pl.col("block_gap").sum().cast(pl.Int64).alias("block_gap_sum"),
+        )
+        .sort("day", "committer")
+    )
+
+
+def update_provider_performance(
+    db_filename: str,
+    dataframes: Dict[str, pl.DataFrame],
+    changes: Optional[ChangeSet] = None,
+) -> int:
+    """
+    Rebuild the provider performance rows of the days touched by the rows written
+    this cycle.
+
+    Days from the one of the oldest commitment touched by the new rows onwards are
+    rebuilt, usually just today. Empty tables are backfilled from the full history,
+    archive included.
+
+    Args:
+        db_filename (str): Path of the DuckDB database.
+        dataframes (Dict[str, pl.DataFrame]): The rows written this cycle, by table.
+        changes (Optional[ChangeSet]): If given, the rebuilt days are recorded in it
+            for replicas.
+
+    Returns:
+        int: The number of day and bin rows written.
+    """
+    written = 0
+    lockfile = acquire_lock(LOCKFILE_PATH)
+    try:
+        with duckdb.connect(db_filename) as conn:
+            tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+            if not {*CHANGE_TABLES, "l1_transactions"} <= tables:
+                return 0
+            conn.execute(PROVIDER_PERFORMANCE_DAYS_DDL)
+            conn.execute(PROVIDER_PERFORMANCE_BINS_DDL)
+
+            if not conn.execute(
+                "SELECT 1 FROM provider_performance_days LIMIT 1"
+            ).fetchone():
+                since_ms = 0
+            else:
+                since_ms = earliest_changed_timestamp(conn, dataframes)
+            if since_ms is None:
+                return 0
+
+            # Days are rounded, so day D holds commitments from 12 hours before it
+            first_day = day_of(datetime.fromtimestamp(since_ms / 1000, timezone.utc))
+            from_ms = int((first_day - timedelta(hours=12)).timestamp() * 1000)
+            commitments = conn.execute(
+                commitments_query(
+                    [f"timestamp >= {from_ms}"],
+                    archive_files=archive_files(
+                        db_filename, {"timestamp": (from_ms, None)}
+                    ),
+                    columns=join_columns(PERFORMANCE_COLUMNS),
+                )
+            ).pl()
+
+            days = bins = None
+            if not commitments.is_empty():
+                # The blocks of the commitments themselves (archived ones included)
+                # and every hot L1 block from shortly before the range
+                from_s = int(from_ms / 1000 - TIMELINE_MARGIN.total_seconds())
+                timeline = pl.concat(
+                    [
+                        commitments.select(
+                            pl.col("block_number_l1").alias("block_number"),
+                            pl.col("timestamp_l1").alias("timestamp"),
+                        ).cast(pl.Int64),
+                        conn.execute(
+                            """
+                            SELECT DISTINCT block_number, timestamp
+                            FROM l1_transactions WHERE timestamp >= ?
+                            """,
+                            [from_s],
+                        )
+                        .pl()
+                        .cast(pl.Int64),
+                    ]
+                )
+                metrics = inclusion_metrics(
+                    enrich_commitments(commitments, PERFORMANCE_COLUMNS), timeline
+                )
+                days = summarize_provider_days(metrics)
+                bins = sketch_metrics(metrics, ["committer"], PROVIDER_METRICS)
+
+            first_day = first_day.replace(tzinfo=None)
+            conn.begin()
+            for table, rows in (
+                ("provider_performance_days", days),
+                ("provider_performance_bins", bins),
+            ):
+                conn.execute(f"DELETE FROM {table} WHERE day >= ?", [first_day])
+                if rows is not None and not rows.is_empty():
+                    conn.register("new_rows", rows.to_arrow())
+                    conn.execute(f"INSERT INTO {table} SELECT * FROM new_rows")
+                    conn.unregister("new_rows")
+                    written += rows.height
+            conn.commit()
+            if changes is not None:
+                changes.replace("provider_performance_days", "day", first_day, days)
+                changes.replace("provider_performance_bins", "day", first_day, bins)
+    except Exception as e:
+        logging.error(f"Error updating provider performance: {e}")
+    finally:
+        release_lock(lockfile)
+    return written
@@ -1,16 +1,49 @@
 import asyncio
 import os
 import polars as pl
+import threading
 import time
 import logging
 from typing import Dict, Union, Optional
 from hypermanager.events import EventConfig
 from hypermanager.manager import HyperManager
 from hypermanager.protocols.mev_commit import mev_commit_config
+from changelog import ChangeSet, prune_outbox, publish_changes
 from data_processing import (
+    DB_DIR,
+    get_changelog_position,
     get_latest_block_number,
-    write_to_duckdb,
+    load_enriched_commitments,
 )
+from block_summary import update_block_summary
+from landing import (
+    compact_landed,
+    discard_partial_segments,
+    get_checkpoint,
+    land_batch,
+    landed_max_block,
+    list_segments,
+    mark_published,
+)
+from leaderboards import update_leaderboard_buckets
+from provider_performance import update_provider_performance
+from search_index import build_search_index
+from sketch_buckets import update_sketch_bins
+from snapshot import publish_snapshot, read_snapshot_pointer, snapshot_files
+from tiering import tier_cold_data
+from watermark import read_watermark, write_watermark
+from metrics import (
+    BLOCK_LAG,
+    CHAIN_HEAD,
+    CYCLE_DURATION,
+    CYCLE_RECORDS,
+    HYPERSYNC_LATENCY,
+    L1_ENRICHMENT_BACKLOG,
+    RECORDS_TOTAL,
+    count_l1_enrichment_backlog,
+    start_metrics_server,
+)
+from telemetry import CycleTelemetry, record_pipeline_run
 
 # Configure logging
 logging.basicConfig(
@@ -20,6 +53,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+MEV_COMMIT_HYPERSYNC_URL = os.getenv(
+    "MEV_COMMIT_HYPERSYNC_URL", "https://mev-commit.hypersync.xyz"
+)
+L1_HYPERSYNC_URL = os.getenv("L1_HYPERSYNC_URL", "https://holesky.hypersync.xyz")
+
+DB_FILENAME = os.path.join(DB_DIR, "mev_commit.duckdb")
+
+# Key of each source table, used by replicas to skip rows they already have
+CHANGE_LOG_KEYS = {
+    "commit_stores": ["commitmentIndex"],
+    "encrypted_stores": ["commitmentIndex"],
+    "commits_processed": ["commitmentIndex"],
+    "l1_transactions": ["hash"],
+}
+
+# Change log entries older than this are deleted from the outbox
+OUTBOX_RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS", "168"))
+
+# Seconds between runs of the job moving old commitments to the Parquet archive
+TIERING_INTERVAL_SECONDS = int(os.getenv("TIERING_INTERVAL_SECONDS", "3600"))
+
+# Longest the compactor waits for the fetch loop before merging the landing log anyway
+COMPACT_INTERVAL_SECONDS = float(os.getenv("COMPACT_INTERVAL_SECONDS", "30"))
+
+# Set by the fetch loop after it lands new segments, to wake the compactor
+_landed = threading.Event()
+
+# Telemetry of the compactions finished since the last cycle was recorded
+_compactions = CycleTelemetry()
+_compactions_lock = threading.Lock()
+
 # Define your event configurations globally
 opened_commits_config = EventConfig(
     name=mev_commit_config["OpenedCommitmentStored"].name,
@@ -39,6 +103,25 @@ commits_processed_config = EventConfig(
     column_mapping=mev_commit_config["CommitmentProcessed"].column_mapping,
 )
 
+# Tables with their event configurations and block number column names
+EVENT_TABLES = [
+    {
+        "table_name": "commit_stores",
+        "block_column": "block_number",
+        "event_config": opened_commits_config,
+    },
+    {
+        "table_name": "encrypted_stores",
+        "block_column": "block_number",
+        "event_config": unopened_commits_config,
+    },
+    {
+        "table_name": "commits_processed",
+        "block_column": "block_number",
+        "event_config": commits_processed_config,
+    },
+]
+
 
 async def fetch_l1_txs(l1_tx_list: Union[str, list[str]]) -> Optional[pl.DataFrame]:
     """
@@ -52,7 +135,7 @@ async def fetch_l1_txs(l1_tx_list: Union[str, list[str]]) -> Optional[pl.DataFra
     if isinstance(l1_tx_list, str):
         l1_tx_list = [l1_tx_list]
 
-    manager = HyperManager(url="https://holesky.hypersync.xyz")
+    manager = HyperManager(url=L1_HYPERSYNC_URL)
     dataframes = []
 
     def chunked(iterable, n):
@@ -62,7 +145,8 @@ async def fetch_l1_txs(l1_tx_list: Union[str, list[str]]) -> Optional[pl.DataFra
 
     for chunk in chunked(l1_tx_list, 3000):
         try:
-            l1_txs_chunk = await asyncio.wait_for(manager.search_txs(txs=chunk), 30)
+            with HYPERSYNC_LATENCY.labels("search_txs").time():
+                l1_txs_chunk = await asyncio.wait_for(manager.search_txs(txs=chunk), 30)
             if l1_txs_chunk is not None and not l1_txs_chunk.is_empty():
                 dataframes.append(l1_txs_chunk)
         except asyncio.TimeoutError as e:
@@ -84,67 +168,84 @@ async def fetch_l1_txs(l1_tx_list: Union[str, list[str]]) -> Optional[pl.DataFra
 
 async def get_events():
     """
-    Fetch event logs from the MEV-Commit system and store them in DuckDB tables.
-    Then load the data from DuckDB, perform joins, and return the commitments DataFrame.
+    Run one ingestion cycle and record its telemetry in the pipeline_runs table,
+    whether it succeeds or fails, together with that of the compactions finished
+    during the cycle.
     """
-    manager = HyperManager(url="https://mev-commit.hypersync.xyz")
+    global _compactions
+    if not os.path.exists(DB_DIR):
+        os.makedirs(DB_DIR)
+        logging.info(f"Created directory: {DB_DIR}")
+
+    telemetry = CycleTelemetry()
+    try:
+        await ingest_events(DB_FILENAME, telemetry)
+    except Exception as e:
+        telemetry.fail(e)
+        raise
+    finally:
+        with _compactions_lock:
+            telemetry.merge(_compactions)
+            _compactions = CycleTelemetry()
+        record_pipeline_run(DB_FILENAME, telemetry)
 
-    db_dir = "db/data"
-    if not os.path.exists(db_dir):
-        os.makedirs(db_dir)
-        logging.info(f"Created directory: {db_dir}")
 
-    db_filename = os.path.join(db_dir, "mev_commit.duckdb")
+async def ingest_events(db_filename: str, telemetry: CycleTelemetry):
+    """
+    Fetch event logs from the MEV-Commit system and append them to the landing log,
+    from which the compactor merges them into the DuckDB tables.
+    """
+    manager = HyperManager(url=MEV_COMMIT_HYPERSYNC_URL)
 
     # Get the latest block numbers from each table
     latest_blocks = {}
 
-    # List of tables with their event configurations and block number column names
-    tables = [
-        {
-            "table_name": "commit_stores",
-            "block_column": "block_number",
-            "event_config": opened_commits_config,
-        },
-        {
-            "table_name": "encrypted_stores",
-            "block_column": "block_number",
-            "event_config": unopened_commits_config,
-        },
-        {
-            "table_name": "commits_processed",
-            "block_column": "block_number",
-            "event_config": commits_processed_config,
-        },
-    ]
-
-    # Get the latest block numbers and aggregate logs
+    # Get the latest block numbers and aggregate logs. Blocks still in the landing
+    # log count as fetched; they are looked up before the database so a segment
+    # merged in between is found there.
     latest_blocks_info = []
-    for table in tables:
-        latest_block = get_latest_block_number(
-            table["table_name"], table["block_column"], db_filename
-        )
-        latest_blocks[table["table_name"]] = latest_block
-        latest_blocks_info.append(f"{table['table_name']}: {latest_block}")
+    lock_stats = {}
+    with telemetry.stage("watermark_lookup"):
+        for table in EVENT_TABLES:
+            landed_block = landed_max_block(db_filename, table["table_name"])
+            latest_block = get_latest_block_number(
+                table["table_name"], table["block_column"], db_filename, lock_stats
+            )
+            latest_block = max(latest_block, landed_block)
+            latest_blocks[table["table_name"]] = latest_block
+            latest_blocks_info.append(f"{table['table_name']}: {latest_block}")
+    telemetry.add_stage("lock_wait", lock_stats.get("lock_wait_seconds", 0.0))
     logging.info("Latest blocks - " + "; ".join(latest_blocks_info))
 
     # Query events and get Polars DataFrames
     fetched_records_info = []
     dataframes: Dict[str, pl.DataFrame] = {}
 
-    for table in tables:
+    for table in EVENT_TABLES:
         table_name = table["table_name"]
         event_config = table["event_config"]
         from_block = latest_blocks.get(table_name, 0) + 1
 
         try:
-            df: pl.DataFrame = await manager.execute_event_query(
-                event_config,
-                tx_data=True,
-                from_block=from_block,
-            )
+            with telemetry.stage(f"fetch:{table_name}"):
+                with HYPERSYNC_LATENCY.labels(f"events:{table_name}").time():
+                    df: pl.DataFrame = await manager.execute_event_query(
+                        event_config,
+                        tx_data=True,
+                        from_block=from_block,
+                    )
             record_count = len(df)
             dataframes[table_name] = df
+            with telemetry.stage(f"land:{table_name}"):
+                land_batch(db_filename, table_name, df)
+            telemetry.add_fetch(
+                table_name,
+                record_count,
+                from_block,
+                int(df["block_number"].max()) if record_count else from_block,
+            )
+            CYCLE_RECORDS.labels(table_name).set(record_count)
+            RECORDS_TOTAL.labels(table_name).inc(record_count)
             fetched_records_info.append(f"{table_name}: {record_count} new records")
 
             # For 'commit_stores', fetch l1_transactions and store them in a separate table
@@ -156,11 +257,21 @@ async def get_events():
                     .to_list()
                 )
 
-                l1_txs_df = await fetch_l1_txs(l1_txs_list)
+                with telemetry.stage("l1_enrichment"):
+                    l1_txs_df = await fetch_l1_txs(l1_txs_list)
                 if l1_txs_df is not None and not l1_txs_df.is_empty():
                     # Store l1_txs_df in dataframes with key 'l1_transactions'
                     dataframes["l1_transactions"] = l1_txs_df
+                    with telemetry.stage("land:l1_transactions"):
+                        land_batch(db_filename, "l1_transactions", l1_txs_df)
                     l1_record_count = len(l1_txs_df)
+                    telemetry.add_fetch(
+                        "l1_transactions",
+                        l1_record_count,
+                        int(l1_txs_df["block_number"].min()),
+                        int(l1_txs_df["block_number"].max()),
+                    )
+                    RECORDS_TOTAL.labels("l1_transactions").inc(l1_record_count)
                     fetched_records_info.append(
                         f"l1_transactions: {l1_record_count} new records"
                     )
@@ -170,23 +281,191 @@ async def get_events():
         except ValueError as e:
             dataframes[table_name] = pl.DataFrame()  # Empty DataFrame
             fetched_records_info.append(f"{table_name}: 0 new records")
+            telemetry.add_fetch(table_name, 0, from_block, from_block)
+            CYCLE_RECORDS.labels(table_name).set(0)
 
+    CYCLE_RECORDS.labels("l1_transactions").set(
+        len(dataframes["l1_transactions"]) if "l1_transactions" in dataframes else 0
+    )
     logging.info("Fetched records - " + "; ".join(fetched_records_info))
+    # Wake the compactor even without new records, so buckets expire on time
+    _landed.set()
+
+    # Report how far ingestion is behind the chain head and the L1 backlog
+    try:
+        with HYPERSYNC_LATENCY.labels("get_height").time():
+            head = await manager.client.get_height()
+        CHAIN_HEAD.set(head)
+        for table in EVENT_TABLES:
+            table_name = table["table_name"]
+            df = dataframes.get(table_name)
+            latest_block = latest_blocks.get(table_name, 0)
+            if df is not None and not df.is_empty():
+                latest_block = max(latest_block, int(df["block_number"].max()))
+            BLOCK_LAG.labels(table_name).set(max(head - latest_block, 0))
+    except Exception as e:
+        logging.error(f"Error fetching chain head: {e}")
+    L1_ENRICHMENT_BACKLOG.set(count_l1_enrichment_backlog(db_filename))
+
 
-    # Write each DataFrame to its own DuckDB table
-    write_info = []
+def compact_and_publish(db_filename: str, telemetry: CycleTelemetry) -> None:
+    """
+    Merge the landing log into the DuckDB tables, then bring the derived tables up
+    to date and publish the change log entry, snapshot and watermark of the new rows.
+    """
+    # Merge the landed batches, collecting what was written for the change log
+    # shipped to replicas
+    changes = ChangeSet()
+    write_stats: Dict[str, Dict] = {}
+    # The rows of segments merged by an earlier pass that failed or crashed before
+    # publishing them are returned again, so nothing below misses them
+    dataframes = compact_landed(db_filename, write_stats)
+    for table_name, stats in write_stats.items():
+        telemetry.add_write(table_name, stats)
     for table_name, df in dataframes.items():
-        # Added error handling to skip None or empty DataFrames
-        if df is None or df.is_empty():
-            write_info.append(f"{table_name}: No new data to write.")
+        changes.insert(table_name, df, CHANGE_LOG_KEYS[table_name])
+    if write_stats:
+        logging.info(
+            "Write to DuckDB - "
+            + "; ".join(
+                f"{table_name}: inserted {stats['rows_written']} new records"
+                for table_name, stats in write_stats.items()
+            )
+        )
+
+    # Refresh the leaderboard buckets touched by the new rows, even in cycles without
+    # new data, since buckets expire as the windows slide
+    with telemetry.stage("leaderboards"):
+        bucket_stats = update_leaderboard_buckets(db_filename, dataframes, changes)
+    logging.info(
+        f"Leaderboard buckets - {bucket_stats['buckets_written']} written, "
+        f"{bucket_stats['buckets_expired']} expired"
+    )
+    with telemetry.stage("sketches"):
+        sketch_rows = update_sketch_bins(db_filename, dataframes, changes)
+    logging.info(f"Aggregation sketches - {sketch_rows} bin rows written")
+    with telemetry.stage("block_summary"):
+        summary_rows = update_block_summary(db_filename, dataframes, changes)
+    logging.info(f"L1 block summaries - {summary_rows} written")
+    with telemetry.stage("provider_performance"):
+        performance_rows = update_provider_performance(db_filename, dataframes, changes)
+    logging.info(f"Provider performance - {performance_rows} rows written")
+
+    wrote_data = bool(dataframes)
+    generation = read_watermark(db_filename).get("generation", 0)
+
+    # Ship the cycle's changes to replicas. A failure here fails the pass: the
+    # merged segments stay unpublished, so the next pass rebuilds the entry under
+    # the same sequence number.
+    with telemetry.stage("change_log"):
+        seq = publish_changes(
+            db_filename,
+            changes,
+            generation + 1 if wrote_data else generation,
+            get_changelog_position(db_filename),
+        )
+    if seq is not None:
+        logging.info(f"Published change log entry {seq}")
+
+    # Publish the enriched snapshot for the next watermark generation before the
+    # watermark itself, so readers never see a generation without its snapshot. A
+    # missing or failed snapshot for the current generation is retried every cycle.
+    pointer = read_snapshot_pointer(db_filename)
+    if wrote_data or (
+        generation
+        and (
+            pointer.get("generation") != generation
+            or "search_index" not in snapshot_files(pointer)
+        )
+    ):
+        snapshot_generation = generation + 1 if wrote_data else generation
+        try:
+            with telemetry.stage("snapshot"):
+                snapshot_df = load_enriched_commitments(db_filename)
+                if snapshot_df is not None:
+                    publish_snapshot(
+                        db_filename,
+                        {
+                            "commitments": snapshot_df,
+                            "search_index": build_search_index(snapshot_df),
+                        },
+                        snapshot_generation,
+                    )
+                    logging.info(
+                        f"Published snapshot generation {snapshot_generation} "
+                        f"({snapshot_df.height} commitments)"
+                    )
+        except Exception as e:
+            logging.error(f"Error publishing snapshot: {e}")
+
+    # Publish a new watermark so readers can tell that the data has changed
+    if wrote_data:
+        watermark_blocks = {
+            table["table_name"]: get_latest_block_number(
+                table["table_name"], table["block_column"], db_filename
+            )
+            for table in EVENT_TABLES
+        }
+        watermark_blocks["l1_transactions"] = get_latest_block_number(
+            "l1_transactions", "block_number", db_filename
+        )
+        watermark = write_watermark(db_filename, watermark_blocks)
+        logging.info(f"Published watermark generation {watermark['generation']}")
+
+    # Only now may the merged segments go, and the entry count as published
+    if wrote_data or seq is not None:
+        mark_published(db_filename, seq)
+    try:
+        prune_outbox(db_filename, OUTBOX_RETENTION_HOURS * 3600)
+    except Exception as e:
+        logging.error(f"Error pruning the change log: {e}")
+
+
+def run_compactor(db_filename: str) -> None:
+    """
+    Merge the landing log into DuckDB whenever the fetch loop lands new segments, and
+    at least every COMPACT_INTERVAL_SECONDS, until the process exits.
+
+    The first pass runs at once, so segments left by a crash are replayed as soon as
+    the pipeline starts. Each pass's telemetry is added to the next cycle's row.
+    """
+    while True:
+        _landed.clear()
+        telemetry = CycleTelemetry()
+        try:
+            compact_and_publish(db_filename, telemetry)
+        except Exception as e:
+            telemetry.fail(e)
+            logging.error(f"Error compacting the landing log: {e}")
+        with _compactions_lock:
+            _compactions.merge(telemetry)
+        # Segments over the size of one compaction are merged right away
+        if telemetry.status == "ok" and list_segments(
+            db_filename, get_checkpoint(db_filename)
+        ):
             continue
-        write_result = write_to_duckdb(df, table_name, db_filename)
-        write_info.append(write_result)
-    logging.info("Write to DuckDB - " + "; ".join(write_info))
+        _landed.wait(COMPACT_INTERVAL_SECONDS)
 
 
 if __name__ == "__main__":
+    start_metrics_server()
+
+    # Replay what a crash left in the landing log before fetching more
+    os.makedirs(DB_DIR, exist_ok=True)
+    discard_partial_segments(DB_FILENAME)
+    threading.Thread(
+        target=run_compactor, args=(DB_FILENAME,), name="compactor", daemon=True
+    ).start()
+
     # Run the async function in a loop every 30 seconds
+    last_tiered = float("-inf")
     while True:
-        asyncio.run(get_events())
+        with CYCLE_DURATION.time():
+            asyncio.run(get_events())
+        if time.monotonic() - last_tiered >= TIERING_INTERVAL_SECONDS:
+            try:
+                tier_cold_data(DB_FILENAME)
+            except Exception as e:
+                logging.error(f"Error archiving cold data: {e}")
+            last_tiered = time.monotonic()
         time.sleep(30)  # Wait for 30 seconds before fetching new data
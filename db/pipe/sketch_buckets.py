@@ -0,0 +1,103 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+import duckdb
+import polars as pl
+from db_lock import acquire_lock, release_lock
+from archive import archive_files
+from changelog import ChangeSet
+from commitments import commitments_query, enrich_commitments
+from data_processing import CHANGE_TABLES, LOCKFILE_PATH, earliest_changed_timestamp
+from sketches import build_sketch_bins, day_of
+
+# Quantile sketch bins of bid_eth, decayed_bid_eth and decay_multiplier per day,
+# bidder and committer (see common/sketches.py). /preconfs/aggregations merges the
+# rows matching its filters by summing the counts of each bin.
+AGGREGATION_SKETCH_BINS_DDL = """
+CREATE TABLE IF NOT EXISTS aggregation_sketch_bins (
+    day TIMESTAMP,
+    bidder VARCHAR,
+    committer VARCHAR,
+    metric VARCHAR,
+    bin INTEGER,
+    count BIGINT
+)
+"""
+
+
+def update_sketch_bins(
+    db_filename: str,
+    dataframes: Dict[str, pl.DataFrame],
+    changes: Optional[ChangeSet] = None,
+) -> int:
+    """
+    Rebuild the sketch bins of the days touched by the rows written this cycle.
+
+    Days from the one of the oldest commitment touched by the new rows onwards are
+    rebuilt, usually just today. An empty table is backfilled from the full history,
+    archive included.
+
+    Args:
+        db_filename (str): Path of the DuckDB database.
+        dataframes (Dict[str, pl.DataFrame]): The rows written this cycle, by table.
+        changes (Optional[ChangeSet]): If given, the rebuilt days are recorded in it
+            for replicas.
+
+    Returns:
+        int: The number of bin rows written.
+    """
+    written = 0
+    lockfile = acquire_lock(LOCKFILE_PATH)
+    try:
+        with duckdb.connect(db_filename) as conn:
+            tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+            if not {*CHANGE_TABLES, "l1_transactions"} <= tables:
+                return 0
+            conn.execute(AGGREGATION_SKETCH_BINS_DDL)
+
+            if not conn.execute(
+                "SELECT 1 FROM aggregation_sketch_bins LIMIT 1"
+            ).fetchone():
+                since_ms = 0
+            else:
+                since_ms = earliest_changed_timestamp(conn, dataframes)
+            if since_ms is None:
+                return 0
+
+            # Days are rounded, so day D holds commitments from 12 hours before it
+            first_day = day_of(datetime.fromtimestamp(since_ms / 1000, timezone.utc))
+            from_ms = int((first_day - timedelta(hours=12)).timestamp() * 1000)
+            commitments = conn.execute(
+                commitments_query(
+                    [f"timestamp >= {from_ms}"],
+                    archive_files=archive_files(
+                        db_filename, {"timestamp": (from_ms, None)}
+                    ),
+                )
+            ).pl()
+            bins = (
+                build_sketch_bins(enrich_commitments(commitments))
+                if not commitments.is_empty()
+                else None
+            )
+
+            first_day = first_day.replace(tzinfo=None)
+            conn.begin()
+            conn.execute(
+                "DELETE FROM aggregation_sketch_bins WHERE day >= ?", [first_day]
+            )
+            if bins is not None and not bins.is_empty():
+                conn.register("new_bins", bins.to_arrow())
+                conn.execute(
+                    "INSERT INTO aggregation_sketch_bins SELECT * FROM new_bins"
+                )
+                conn.unregister("new_bins")
+                written = bins.height
+            conn.commit()
+            if changes is not None:
+                changes.replace("aggregation_sketch_bins", "day", first_day, bins)
+    except Exception as e:
+        logging.error(f"Error updating aggregation sketches: {e}")
+    finally:
+        release_lock(lockfile)
+    return written
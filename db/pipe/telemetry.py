@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional
+import duckdb
+from db_lock import acquire_lock, release_lock
+from data_processing import LOCKFILE_PATH
+
+# One row per get_events cycle. Totals have their own columns so trends are easy to
+# query; the per-stream and per-table breakdowns are stored as JSON objects. The
+# write and derived table stages are those of the compactions finished during the
+# cycle. from_block and to_block are mev-commit chain blocks; the L1 block range of
+# l1_transactions is only in block_ranges.
+PIPELINE_RUNS_DDL = """
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    status VARCHAR,
+    error VARCHAR,
+    duration_seconds DOUBLE,
+    watermark_lookup_seconds DOUBLE,
+    fetch_seconds DOUBLE,
+    l1_enrichment_seconds DOUBLE,
+    lock_wait_seconds DOUBLE,
+    write_seconds DOUBLE,
+    rows_fetched BIGINT,
+    rows_written BIGINT,
+    bytes_written BIGINT,
+    from_block UBIGINT,
+    to_block UBIGINT,
+    history_rows BIGINT,
+    db_size_bytes BIGINT,
+    stage_seconds VARCHAR,
+    stream_rows VARCHAR,
+    table_bytes VARCHAR,
+    block_ranges VARCHAR
+)
+"""
+
+
+# Streams whose block numbers are L1 blocks, left out of from_block and to_block
+L1_STREAMS = ("l1_transactions",)
+
+
+class CycleTelemetry:
+    """
+    Collects stage durations, row counts, bytes written and the block range covered
+    by one ingestion cycle.
+
+    Stage names are either a single stage ("watermark_lookup", "l1_enrichment",
+    "lock_wait") or a stage and a stream or table ("fetch:commit_stores",
+    "write:l1_transactions").
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        self._start = time.perf_counter()
+        self.stage_seconds: Dict[str, float] = {}
+        self.stream_rows: Dict[str, int] = {}
+        self.rows_written: Dict[str, int] = {}
+        self.table_bytes: Dict[str, int] = {}
+        self.block_ranges: Dict[str, list] = {}
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block and add it to stage `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def stage_total(self, stage: str) -> float:
+        """Total seconds of a stage across all its streams or tables."""
+        return sum(
+            seconds
+            for name, seconds in self.stage_seconds.items()
+            if name == stage or name.startswith(f"{stage}:")
+        )
+
+    def add_fetch(self, stream: str, rows: int, from_block: int, to_block: int) -> None:
+        self.stream_rows[stream] = rows
+        if rows:
+            self.block_ranges[stream] = [from_block, to_block]
+
+    def add_write(self, table_name: str, stats: Dict) -> None:
+        """Record the lock wait, duration, rows and bytes written to one table."""
+        self.add_stage("lock_wait", stats.get("lock_wait_seconds", 0.0))
+        self.add_stage(f"write:{table_name}", stats.get("write_seconds", 0.0))
+        self.rows_written[table_name] = stats.get("rows_written", 0)
+        self.table_bytes[table_name] = stats.get("bytes_written", 0)
+
+    def merge(self, other: "CycleTelemetry") -> None:
+        """Add the stages, writes and failure of another run to this one."""
+        for name, seconds in other.stage_seconds.items():
+            self.add_stage(name, seconds)
+        for table_name, rows in other.rows_written.items():
+            self.rows_written[table_name] = self.rows_written.get(table_name, 0) + rows
+        for table_name, size in other.table_bytes.items():
+            self.table_bytes[table_name] = self.table_bytes.get(table_name, 0) + size
+        if other.status != "ok" and self.status == "ok":
+            self.status, self.error = other.status, other.error
+
+    def fail(self, error: BaseException) -> None:
+        self.status = "failed"
+        self.error = f"{type(error).__name__}: {error}"
+
+    def row(self) -> list:
+        """The values of this cycle's pipeline_runs row, minus the database totals."""
+        ranges = [
+            block_range
+            for stream, block_range in self.block_ranges.items()
+            if stream not in L1_STREAMS
+        ]
+        return [
+            self.started_at,
+            datetime.now(timezone.utc).replace(tzinfo=None),
+            self.status,
+            self.error,
+            time.perf_counter() - self._start,
+            self.stage_total("watermark_lookup"),
+            self.stage_total("fetch"),
+            self.stage_total("l1_enrichment"),
+            self.stage_total("lock_wait"),
+            self.stage_total("write"),
+            sum(self.stream_rows.values()),
+            sum(self.rows_written.values()),
+            sum(self.table_bytes.values()),
+            min(r[0] for r in ranges) if ranges else None,
+            max(r[1] for r in ranges) if ranges else None,
+            json.dumps(self.stage_seconds),
+            json.dumps(self.stream_rows),
+            json.dumps(self.table_bytes),
+            json.dumps(self.block_ranges),
+        ]
+
+
+def record_pipeline_run(db_filename: str, telemetry: CycleTelemetry) -> None:
+    """
+    Append the telemetry of a finished cycle to the pipeline_runs table.
+
+    Failures are logged and never interrupt ingestion.
+    """
+    values = telemetry.row()
+    lockfile = acquire_lock(LOCKFILE_PATH)
+    try:
+        with duckdb.connect(db_filename) as conn:
+            conn.execute(PIPELINE_RUNS_DDL)
+            tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+            history_rows = (
+                conn.execute("SELECT COUNT(*) FROM commit_stores").fetchone()[0]
+                if "commit_stores" in tables
+                else 0
+            )
+            db_size_bytes = os.path.getsize(db_filename)
+            conn.execute(
+                """
+                INSERT INTO pipeline_runs (
+                    started_at, finished_at, status, error, duration_seconds,
+                    watermark_lookup_seconds, fetch_seconds, l1_enrichment_seconds,
+                    lock_wait_seconds, write_seconds, rows_fetched, rows_written,
+                    bytes_written, from_block, to_block, stage_seconds, stream_rows,
+                    table_bytes, block_ranges, history_rows, db_size_bytes
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                values + [history_rows, db_size_bytes],
+            )
+    except Exception as e:
+        logging.error(f"Error recording pipeline run: {e}")
+    finally:
+        release_lock(lockfile)
@@ -0,0 +1,253 @@
+"""
+Move commitments older than the tiering horizon from DuckDB into the Parquet archive.
+
+Run on a schedule by query_commits.py, or once by hand from the db directory:
+    PYTHONPATH=../common python pipe/tiering.py --db data/mev_commit.duckdb --horizon-days 90
+
+By hand it takes the lock next to the database (data/mainnet/duckdb_lock for
+--db data/mainnet/mev_commit.duckdb), which the pipeline and the backend take for
+that database; pass --lockfile if DUCKDB_LOCKFILE points elsewhere.
+"""
+
+import argparse
+import copy
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+import duckdb
+import polars as pl
+from db_lock import acquire_lock, release_lock, shard_lockfile
+from archive import RANGE_COLUMNS, archive_dir, read_manifest, write_manifest
+from commitments import commitments_query
+from data_processing import CHANGE_TABLES, LOCKFILE_PATH
+
+# Commitments older than this many days are moved to the archive
+ARCHIVE_HORIZON_DAYS = int(os.getenv("ARCHIVE_HORIZON_DAYS", "90"))
+
+# Source table -> column of the joined commitments holding its block number
+SOURCE_BLOCK_COLUMNS = {
+    "commit_stores": "block_number",
+    "encrypted_stores": "block_number_encrypted",
+    "commits_processed": "block_number_processed",
+    "l1_transactions": "block_number_l1",
+}
+
+
+def _write_partitions(
+    db_filename: str, commitments: pl.DataFrame, version: int
+) -> Dict[str, Dict]:
+    """Write joined commitments as one zstd Parquet file per day partition."""
+    directory = archive_dir(db_filename)
+    written = {}
+    days = commitments.with_columns(
+        pl.from_epoch("timestamp", time_unit="ms").dt.strftime("%Y-%m-%d").alias("_day")
+    )
+    for (day,), partition in days.group_by("_day"):
+        partition = partition.drop("_day").sort("timestamp")
+        path = os.path.join(directory, f"day={day}", f"part-v{version}.parquet")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partition.write_parquet(f"{path}.tmp", compression="zstd", statistics=True)
+        os.replace(f"{path}.tmp", path)
+        written[day] = {
+            "file": os.path.basename(path),
+            "rows": partition.height,
+            "ranges": {
+                column: [int(partition[column].min()), int(partition[column].max())]
+                for column in RANGE_COLUMNS
+            },
+        }
+    return written
+
+
+def _add_partition(manifest: Dict, day: str, file: str, rows: int, ranges: Dict):
+    partition = manifest["partitions"].setdefault(
+        day, {"files": [], "rows": 0, "ranges": ranges}
+    )
+    partition["files"].append(file)
+    partition["rows"] += rows
+    for column, (low, high) in ranges.items():
+        current = partition["ranges"][column]
+        partition["ranges"][column] = [min(current[0], low), max(current[1], high)]
+
+
+def _delete_archived(db_filename: str, manifest: Dict, lockfile_path: str) -> None:
+    """
+    Delete the hot rows of the commitments stored in the pending archive files, and
+    publish the files to readers.
+
+    L1 transactions are only deleted once no remaining commitment references them.
+    The manifest is written while the lock is still held, and the backend takes the
+    same lock to list the archive, so readers see every commitment exactly once. Idempotent, so an interrupted run is completed by the
+    next one.
+    """
+    directory = archive_dir(db_filename)
+    files = [os.path.join(directory, name) for name in manifest["pending"]]
+    archived = pl.read_parquet(files, columns=["commitmentIndex", "txnHash"])
+    lockfile = acquire_lock(lockfile_path)
+    try:
+        with duckdb.connect(db_filename) as conn:
+            conn.register("archived", archived.to_arrow())
+            conn.begin()
+            for table in CHANGE_TABLES:
+                conn.execute(f"""
+                    DELETE FROM {table}
+                    WHERE commitmentIndex IN (SELECT commitmentIndex FROM archived)
+                    """)
+            conn.execute("""
+                DELETE FROM l1_transactions
+                WHERE hash IN (SELECT txnHash FROM archived)
+                AND hash NOT IN (SELECT '0x' || txnHash FROM commit_stores)
+                """)
+            conn.commit()
+            conn.unregister("archived")
+            # Make the freed blocks reusable by the next writes
+            conn.execute("CHECKPOINT")
+        manifest["pending"] = []
+        write_manifest(db_filename, manifest)
+    finally:
+        release_lock(lockfile)
+
+
+def compact_archive(db_filename: str) -> int:
+    """
+    Merge the partitions that hold several files into a single file each.
+
+    Replaced files are retired and only removed by the next run, so queries that
+    listed them before the manifest changed can still read them.
+
+    Returns:
+        int: The number of partitions compacted.
+    """
+    manifest = copy.deepcopy(read_manifest(db_filename))
+    directory = archive_dir(db_filename)
+    for name in manifest.get("retired", []):
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+    manifest["retired"] = []
+
+    compacted = 0
+    for day, partition in manifest.get("partitions", {}).items():
+        if len(partition["files"]) < 2:
+            continue
+        paths = [
+            os.path.join(directory, f"day={day}", name) for name in partition["files"]
+        ]
+        merged = pl.read_parquet(paths).sort("timestamp")
+        name = f"part-v{manifest['version']}-compacted.parquet"
+        path = os.path.join(directory, f"day={day}", name)
+        merged.write_parquet(f"{path}.tmp", compression="zstd", statistics=True)
+        os.replace(f"{path}.tmp", path)
+        manifest["retired"] += [f"day={day}/{old}" for old in partition["files"]]
+        partition["files"] = [name]
+        compacted += 1
+
+    if manifest:
+        write_manifest(db_filename, manifest)
+    return compacted
+
+
+def tier_cold_data(
+    db_filename: str,
+    horizon_days: int = ARCHIVE_HORIZON_DAYS,
+    lockfile_path: str = LOCKFILE_PATH,
+) -> Dict:
+    """
+    Move the commitments older than `horizon_days` from DuckDB to the archive.
+
+    The joined rows are written as zstd Parquet partitioned by day, the manifest is
+    published with the new files marked pending, and then the source rows are
+    deleted from DuckDB. A run interrupted before the deletion finishes it on the
+    next run. Commitments that are not complete yet (missing one of the joined
+    events) stay in DuckDB.
+
+    Args:
+        db_filename (str): Path of the DuckDB database.
+        horizon_days (int): Age in days after which commitments are archived.
+        lockfile_path (str): Lock guarding the database (default: the pipeline's).
+
+    Returns:
+        Dict: The rows archived and the partitions written and compacted.
+    """
+    start = time.perf_counter()
+    manifest = copy.deepcopy(read_manifest(db_filename)) or {
+        "version": 0,
+        "max_blocks": {},
+        "partitions": {},
+        "pending": [],
+        "retired": [],
+    }
+    directory = archive_dir(db_filename)
+    os.makedirs(directory, exist_ok=True)
+
+    if manifest["pending"]:
+        logging.info(f"Completing archive of {len(manifest['pending'])} files")
+        _delete_archived(db_filename, manifest, lockfile_path)
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=horizon_days)
+    cutoff_ms = int(cutoff.timestamp() * 1000)
+    lockfile = acquire_lock(lockfile_path)
+    try:
+        with duckdb.connect(db_filename, read_only=True) as conn:
+            tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+            if not {*CHANGE_TABLES, "l1_transactions"} <= tables:
+                return {"rows_archived": 0, "partitions_written": 0, "compacted": 0}
+            cold = conn.execute(commitments_query([f"timestamp < {cutoff_ms}"])).pl()
+    finally:
+        release_lock(lockfile)
+
+    written = {}
+    if not cold.is_empty():
+        manifest["version"] += 1
+        written = _write_partitions(db_filename, cold, manifest["version"])
+        for day, partition in written.items():
+            _add_partition(
+                manifest,
+                day,
+                partition["file"],
+                partition["rows"],
+                partition["ranges"],
+            )
+        for table, column in SOURCE_BLOCK_COLUMNS.items():
+            manifest["max_blocks"][table] = max(
+                manifest["max_blocks"].get(table, 0), int(cold[column].max())
+            )
+        manifest["pending"] = [
+            f"day={day}/{partition['file']}" for day, partition in written.items()
+        ]
+        write_manifest(db_filename, manifest)
+
+        _delete_archived(db_filename, manifest, lockfile_path)
+
+    compacted = compact_archive(db_filename)
+    logging.info(
+        f"Archived {cold.height} commitments older than {cutoff:%Y-%m-%d %H:%M} "
+        f"into {len(written)} partitions, compacted {compacted} partitions "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+    return {
+        "rows_archived": cold.height,
+        "partitions_written": len(written),
+        "compacted": compacted,
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--db", default=os.getenv("DATABASE_URL", "db/data/mev_commit.duckdb")
+    )
+    parser.add_argument("--horizon-days", type=int, default=ARCHIVE_HORIZON_DAYS)
+    parser.add_argument(
+        "--lockfile", help="Lock guarding the database (default: next to --db)"
+    )
+    args = parser.parse_args()
+    tier_cold_data(
+        args.db,
+        args.horizon_days,
+        args.lockfile or shard_lockfile(os.path.dirname(os.path.abspath(args.db))),
+    )
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import duckdb
+import polars as pl
+import pytest
+
+# The pipeline modules read the lock path when they are imported
+os.environ["DUCKDB_LOCKFILE"] = os.path.join(
+    tempfile.mkdtemp(prefix="mev-commit-tests-"), "duckdb_lock"
+)
+os.environ.pop("NETWORK", None)
+
+
+@pytest.fixture
+def db_filename(tmp_path):
+    """Path of a DuckDB database in a fresh directory; the file does not exist yet."""
+    return str(tmp_path / "mev_commit.duckdb")
+
+
+def u64(values):
+    return pl.Series(values, dtype=pl.UInt64)
+
+
+def commitment_frames(first, count, timestamp_ms):
+    """The four source tables of commitments first..first+count-1, one frame each."""
+    n = list(range(first, first + count))
+    index = [f"0x{i:064x}" for i in n]
+    txn_hash = [f"{i + 10**6:064x}" for i in n]
+    return {
+        "encrypted_stores": pl.DataFrame(
+            {
+                "commitmentIndex": index,
+                "committer": [f"0xprovider{i % 2}" for i in n],
+                "commitmentDigest": [f"0xdigest{i}" for i in n],
+                "block_number": u64([1000 + 3 * i for i in n]),
+                "timestamp": u64([timestamp_ms] * count),
+            }
+        ),
+        "commit_stores": pl.DataFrame(
+            {
+                "commitmentIndex": index,
+                "bidder": [f"0xbidder{i % 3}" for i in n],
+                "commitmentSignature": [f"0xcsig{i}" for i in n],
+                "bid": u64([10**15 * (i + 1) for i in n]),
+                "blockNumber": u64([20_000_000 + i for i in n]),
+                "bidHash": [f"0xbid{i}" for i in n],
+                "decayStartTimeStamp": u64([timestamp_ms] * count),
+                "decayEndTimeStamp": u64([timestamp_ms + 36_000] * count),
+                "txnHash": txn_hash,
+                "revertingTxHashes": [""] * count,
+                "bidSignature": [f"0xbsig{i}" for i in n],
+                "sharedSecretKey": [f"0xsecret{i}" for i in n],
+                "block_number": u64([1001 + 3 * i for i in n]),
+                "timestamp": u64([timestamp_ms] * count),
+                "dispatchTimestamp": u64([timestamp_ms + 500] * count),
+            }
+        ),
+        "commits_processed": pl.DataFrame(
+            {
+                "commitmentIndex": index,
+                "isSlash": [False] * count,
+                "block_number": u64([1002 + 3 * i for i in n]),
+                "timestamp": u64([timestamp_ms] * count),
+            }
+        ),
+        "l1_transactions": pl.DataFrame(
+            {
+                "hash": [f"0x{h}" for h in txn_hash],
+                "block_number": u64([20_000_000 + i for i in n]),
+                "extra_data": ["0x"] * count,
+                "to": ["0xto"] * count,
+                "from": ["0xfrom"] * count,
+                "nonce": u64(n),
+                "type": u64([2] * count),
+                "block_hash": [f"0xblock{i}" for i in n],
+                "timestamp": u64([timestamp_ms // 1000 + 12] * count),
+                "base_fee_per_gas": [7.0] * count,
+                "gas_used_block": u64([100_000] * count),
+                "parent_beacon_block_root": ["0xroot"] * count,
+                "max_priority_fee_per_gas": [1.0] * count,
+                "max_fee_per_gas": [32.0] * count,
+                "effective_gas_price": [8.0] * count,
+                "gas_used": u64([21_000] * count),
+            }
+        ),
+    }
+
+
+@pytest.fixture
+def add_commitments():
+    """Insert complete commitments into a database, creating the tables if needed."""
+
+    def add(db_filename, first, count, timestamp_ms, tables=None):
+        frames = commitment_frames(first, count, timestamp_ms)
+        with duckdb.connect(db_filename) as conn:
+            for table, df in frames.items():
+                if tables is not None and table not in tables:
+                    continue
+                conn.register("new_rows", df.to_arrow())
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} AS "
+                    "SELECT * FROM new_rows LIMIT 0"
+                )
+                conn.execute(f"INSERT INTO {table} SELECT * FROM new_rows")
+                conn.unregister("new_rows")
+        return frames
+
+    return add
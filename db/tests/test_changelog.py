@@ -0,0 +1,103 @@
+import os
+import shutil
+from datetime import datetime
+import duckdb
+import polars as pl
+from changelog import (
+    ChangeSet,
+    apply_entry,
+    get_position,
+    list_entries,
+    outbox_dir,
+    publish_changes,
+    read_entry,
+)
+
+
+def changes(ids):
+    change_set = ChangeSet()
+    change_set.insert(
+        "commit_stores", pl.DataFrame({"commitmentIndex": ids}), ["commitmentIndex"]
+    )
+    return change_set
+
+
+def test_sequence_follows_the_database_position(db_filename):
+    directory = outbox_dir(db_filename)
+    assert publish_changes(db_filename, ChangeSet(), 1, 0) is None
+    assert publish_changes(db_filename, changes(["0x1"]), 1, 0) == 1
+
+    # An entry the database never recorded is published again in its place
+    assert publish_changes(db_filename, changes(["0x1", "0x2"]), 1, 0) == 1
+    assert list_entries(directory) == [1]
+    assert read_entry(directory, 1)["ops"][0]["rows"] == 2
+    assert sorted(os.listdir(directory)) == [
+        "000000000001.0.arrow",
+        "000000000001.json",
+    ]
+
+    # An emptied outbox carries on from the database, leaving a gap for replicas
+    shutil.rmtree(directory)
+    assert publish_changes(db_filename, changes(["0x3"]), 2, 7) == 8
+    assert list_entries(directory) == [8]
+
+
+def apply(db_filename, directory, seq):
+    with duckdb.connect(db_filename) as conn:
+        return apply_entry(conn, directory, read_entry(directory, seq))
+
+
+def table_rows(db_filename, table_name):
+    with duckdb.connect(db_filename, read_only=True) as conn:
+        return conn.execute(f"SELECT * FROM {table_name} ORDER BY ALL").fetchall()
+
+
+def test_applying_an_entry_twice_is_harmless(db_filename, tmp_path):
+    primary = str(tmp_path / "primary" / "mev_commit.duckdb")
+    directory = outbox_dir(primary)
+    publish_changes(primary, changes(["0x1", "0x2"]), 1, 0)
+
+    assert apply(db_filename, directory, 1) == (2, 0)
+    assert apply(db_filename, directory, 1) == (0, 0)
+    assert table_rows(db_filename, "commit_stores") == [("0x1",), ("0x2",)]
+    with duckdb.connect(db_filename, read_only=True) as conn:
+        assert get_position(conn) == 1
+
+
+def test_frames_are_inserted_by_column_name(db_filename, tmp_path):
+    primary = str(tmp_path / "primary" / "mev_commit.duckdb")
+    directory = outbox_dir(primary)
+    since = datetime(2024, 1, 1)
+    first = ChangeSet()
+    first.insert(
+        "commit_stores",
+        pl.DataFrame({"commitmentIndex": ["0x1"], "bidder": ["0xa"]}),
+        ["commitmentIndex"],
+    )
+    first.replace(
+        "leaderboard_buckets",
+        "bucket_start",
+        since,
+        pl.DataFrame({"bucket_start": [since], "address": ["0xa"], "count": [1]}),
+    )
+    publish_changes(primary, first, 1, 0)
+
+    # The same tables, with their columns in another order
+    second = ChangeSet()
+    second.insert(
+        "commit_stores",
+        pl.DataFrame({"bidder": ["0xb"], "commitmentIndex": ["0x2"]}),
+        ["commitmentIndex"],
+    )
+    second.replace(
+        "leaderboard_buckets",
+        "bucket_start",
+        since,
+        pl.DataFrame({"count": [2], "address": ["0xb"], "bucket_start": [since]}),
+    )
+    publish_changes(primary, second, 2, 1)
+
+    apply(db_filename, directory, 1)
+    assert apply(db_filename, directory, 2) == (2, 1)
+    assert table_rows(db_filename, "commit_stores") == [("0x1", "0xa"), ("0x2", "0xb")]
+    assert table_rows(db_filename, "leaderboard_buckets") == [(since, "0xb", 2)]
@@ -0,0 +1,194 @@
+import os
+import duckdb
+import polars as pl
+import pytest
+import landing
+from data_processing import get_changelog_position
+from landing import (
+    compact_landed,
+    discard_partial_segments,
+    get_checkpoint,
+    get_published,
+    land_batch,
+    landed_max_block,
+    landing_dir,
+    list_segments,
+    mark_published,
+)
+
+
+def batch(blocks):
+    return pl.DataFrame(
+        {
+            "block_number": pl.Series(blocks, dtype=pl.UInt64),
+            "value": [f"x{block}" for block in blocks],
+        }
+    )
+
+
+def table_rows(db_filename, table_name):
+    with duckdb.connect(db_filename, read_only=True) as conn:
+        return conn.execute(f"SELECT * FROM {table_name} ORDER BY ALL").pl()
+
+
+def test_land_batch_renames_complete_segments(db_filename):
+    assert land_batch(db_filename, "commit_stores", batch([])) is None
+    assert land_batch(db_filename, "commit_stores", batch([3, 1])) == 1
+    assert land_batch(db_filename, "l1_transactions", batch([2])) == 2
+
+    assert sorted(os.listdir(landing_dir(db_filename))) == [
+        "000000000001.commit_stores.arrow",
+        "000000000002.l1_transactions.arrow",
+    ]
+    segments = list_segments(db_filename)
+    assert [(seq, table) for seq, table, _ in segments] == [
+        (1, "commit_stores"),
+        (2, "l1_transactions"),
+    ]
+    assert pl.read_ipc(segments[0][2]).equals(batch([3, 1]))
+    assert landed_max_block(db_filename, "commit_stores") == 3
+    assert landed_max_block(db_filename, "encrypted_stores") == 0
+
+
+def test_compact_merges_sorted_and_checkpoints(db_filename):
+    land_batch(db_filename, "commit_stores", batch([5, 4]))
+    land_batch(db_filename, "l1_transactions", batch([9]))
+    land_batch(db_filename, "commit_stores", batch([2, 3]))
+
+    stats = {}
+    merged = compact_landed(db_filename, stats)
+
+    assert merged["commit_stores"]["block_number"].to_list() == [2, 3, 4, 5]
+    assert table_rows(db_filename, "commit_stores").equals(batch([2, 3, 4, 5]))
+    assert table_rows(db_filename, "l1_transactions").equals(batch([9]))
+    assert get_checkpoint(db_filename) == 3
+    assert stats["commit_stores"]["rows_written"] == 4
+    assert stats["l1_transactions"]["rows_written"] == 1
+
+    # The segments are kept until their rows are published
+    assert len(list_segments(db_filename)) == 3
+    mark_published(db_filename)
+    assert get_published(db_filename) == 3
+    assert list_segments(db_filename) == []
+
+    # Nothing left to merge
+    assert compact_landed(db_filename) == {}
+
+
+def test_crash_after_commit_is_not_merged_twice(db_filename, monkeypatch):
+    land_batch(db_filename, "commit_stores", batch([1, 2]))
+
+    # Crash between publishing and the deletion of the merged segments
+    monkeypatch.setattr(landing, "_remove_merged", lambda *args: None)
+    compact_landed(db_filename)
+    mark_published(db_filename)
+    assert len(list_segments(db_filename)) == 1
+    monkeypatch.undo()
+
+    # The rerun skips the segments at or below the checkpoint and deletes them
+    assert compact_landed(db_filename) == {}
+    assert list_segments(db_filename) == []
+    assert table_rows(db_filename, "commit_stores").equals(batch([1, 2]))
+
+
+def test_segment_numbers_stay_above_the_checkpoint(db_filename, monkeypatch):
+    land_batch(db_filename, "commit_stores", batch([1]))
+    land_batch(db_filename, "commit_stores", batch([2]))
+    compact_landed(db_filename)
+
+    # Merged segments that could not be deleted must not hide new ones
+    assert land_batch(db_filename, "commit_stores", batch([3])) == 3
+    monkeypatch.setattr(landing, "_remove_merged", lambda *args: None)
+    land_batch(db_filename, "commit_stores", batch([4]))
+    compact_landed(db_filename)
+    assert land_batch(db_filename, "commit_stores", batch([5])) == 5
+    monkeypatch.undo()
+
+    compact_landed(db_filename)
+    assert table_rows(db_filename, "commit_stores").equals(batch([1, 2, 3, 4, 5]))
+
+
+def test_failed_merge_keeps_segments_and_checkpoint(db_filename):
+    land_batch(db_filename, "commit_stores", batch([1]))
+    compact_landed(db_filename)
+
+    # A batch the table cannot take fails the whole transaction
+    land_batch(db_filename, "l1_transactions", batch([7]))
+    land_batch(
+        db_filename,
+        "commit_stores",
+        pl.DataFrame({"block_number": pl.Series([2], dtype=pl.UInt64)}),
+    )
+    with pytest.raises(duckdb.Error):
+        compact_landed(db_filename)
+
+    assert get_checkpoint(db_filename) == 1
+    assert len(list_segments(db_filename, get_checkpoint(db_filename))) == 2
+    assert table_rows(db_filename, "commit_stores").equals(batch([1]))
+    with duckdb.connect(db_filename, read_only=True) as conn:
+        tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+    assert "l1_transactions" not in tables
+
+
+def test_compaction_stops_at_max_rows(db_filename, monkeypatch):
+    monkeypatch.setattr(landing, "COMPACT_MAX_ROWS", 3)
+    land_batch(db_filename, "commit_stores", batch([1, 2]))
+    land_batch(db_filename, "commit_stores", batch([3, 4]))
+    land_batch(db_filename, "commit_stores", batch([5]))
+
+    # The first two segments reach the limit; the third waits for the next run
+    assert compact_landed(db_filename)["commit_stores"].height == 4
+    assert get_checkpoint(db_filename) == 2
+    mark_published(db_filename)
+    assert [seq for seq, _, _ in list_segments(db_filename)] == [3]
+
+    assert compact_landed(db_filename)["commit_stores"].height == 1
+    assert table_rows(db_filename, "commit_stores").equals(batch([1, 2, 3, 4, 5]))
+
+
+def test_unpublished_rows_are_replayed(db_filename):
+    land_batch(db_filename, "commit_stores", batch([1, 2]))
+    land_batch(db_filename, "l1_transactions", batch([9]))
+    compact_landed(db_filename)
+
+    # Crash after the merge committed, before the derived tables and the change log
+    # took the rows in: the next compaction returns them again with the new rows,
+    # without inserting them twice
+    land_batch(db_filename, "commit_stores", batch([3]))
+    stats = {}
+    merged = compact_landed(db_filename, stats)
+    assert merged["commit_stores"]["block_number"].to_list() == [1, 2, 3]
+    assert merged["l1_transactions"]["block_number"].to_list() == [9]
+    assert stats == {"commit_stores": stats["commit_stores"]}
+    assert stats["commit_stores"]["rows_written"] == 1
+    assert get_checkpoint(db_filename) == 3 and get_published(db_filename) == 0
+    assert table_rows(db_filename, "commit_stores").equals(batch([1, 2, 3]))
+
+    # A rerun with nothing new still returns them until they are published
+    assert compact_landed(db_filename)["commit_stores"].height == 3
+    mark_published(db_filename, 4)
+    assert compact_landed(db_filename) == {}
+    assert table_rows(db_filename, "l1_transactions").equals(batch([9]))
+    # The change log entry published with them is recorded in the same transaction
+    assert get_changelog_position(db_filename) == 4
+
+
+def test_discard_partial_segments(db_filename):
+    land_batch(db_filename, "commit_stores", batch([1]))
+    # A crash while writing leaves the temporary file, never a named segment
+    partial = os.path.join(
+        landing_dir(db_filename), "000000000002.commit_stores.arrow.tmp"
+    )
+    with open(partial, "wb") as f:
+        f.write(b"ARROW1")
+
+    assert [seq for seq, _, _ in list_segments(db_filename)] == [1]
+    assert discard_partial_segments(db_filename) == 1
+    assert not os.path.exists(partial)
+    assert discard_partial_segments(db_filename) == 0
+
+    assert compact_landed(db_filename)["commit_stores"].height == 1
+
+
+def test_discard_without_landing_dir(tmp_path):
+    assert discard_partial_segments(str(tmp_path / "missing.duckdb")) == 0
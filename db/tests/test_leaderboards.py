@@ -0,0 +1,36 @@
+import time
+import duckdb
+from data_processing import earliest_changed_timestamp
+from leaderboards import update_leaderboard_buckets
+
+NOW_MS = (int(time.time()) - 3600) * 1000
+
+EVENT_TABLES = ("encrypted_stores", "commit_stores", "commits_processed")
+
+
+def preconf_counts(db_filename):
+    with duckdb.connect(db_filename, read_only=True) as conn:
+        return dict(conn.execute("""
+                SELECT resolution, SUM(preconf_count) FROM leaderboard_buckets
+                WHERE role = 'bidder' GROUP BY 1
+                """).fetchall())
+
+
+def test_late_l1_transactions_reach_the_buckets(db_filename, add_commitments):
+    add_commitments(db_filename, 0, 5, NOW_MS)
+    update_leaderboard_buckets(db_filename, {})
+    assert preconf_counts(db_filename) == {"minute": 5, "hour": 5}
+
+    # The events land one compaction before their L1 transactions
+    events = add_commitments(db_filename, 5, 5, NOW_MS, tables=EVENT_TABLES)
+    update_leaderboard_buckets(
+        db_filename, {table: events[table] for table in EVENT_TABLES}
+    )
+    assert preconf_counts(db_filename) == {"minute": 5, "hour": 5}
+
+    frames = add_commitments(db_filename, 5, 5, NOW_MS, tables=["l1_transactions"])
+    l1_only = {"l1_transactions": frames["l1_transactions"]}
+    with duckdb.connect(db_filename, read_only=True) as conn:
+        assert earliest_changed_timestamp(conn, l1_only) == NOW_MS
+    update_leaderboard_buckets(db_filename, l1_only)
+    assert preconf_counts(db_filename) == {"minute": 10, "hour": 10}
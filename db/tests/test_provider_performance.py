@@ -0,0 +1,80 @@
+from datetime import datetime
+import polars as pl
+import pytest
+from provider_performance import inclusion_metrics, sketch_metrics
+from sketches import PROVIDER_METRICS, RELATIVE_ACCURACY, estimate_quantiles
+
+L1_TIMESTAMP = 1_700_000_040
+
+
+def commitments(dispatch_offsets_s):
+    """Commitments of one provider in L1 block 1000 (targeted at block 1001)."""
+    n = len(dispatch_offsets_s)
+    return pl.DataFrame(
+        {
+            "date": [datetime(2024, 1, 1, 10)] * n,
+            "committer": ["0xprovider"] * n,
+            "isSlash": [False] * n,
+            "bid_eth": [1.0] * n,
+            "decayed_bid_eth": [0.5] * n,
+            "decay_multiplier": [0.5] * n,
+            "inc_block_number": pl.Series([1001] * n, dtype=pl.UInt64),
+            "dispatchTimestamp": pl.Series(
+                [(L1_TIMESTAMP - offset) * 1000 for offset in dispatch_offsets_s],
+                dtype=pl.UInt64,
+            ),
+            "decayStartTimeStamp": pl.Series(
+                [(L1_TIMESTAMP - offset - 1) * 1000 for offset in dispatch_offsets_s],
+                dtype=pl.UInt64,
+            ),
+            "block_number_l1": pl.Series([1000] * n, dtype=pl.UInt64),
+            "timestamp_l1": pl.Series([L1_TIMESTAMP] * n, dtype=pl.UInt64),
+        }
+    )
+
+
+def test_negative_metrics_keep_their_sign_in_percentiles():
+    # Dispatch clocks running ahead of the chain give negative latencies
+    offsets = [-30, -20, -10, -5, -2]
+    timeline = pl.DataFrame(
+        {
+            "block_number": [900, 1000],
+            "timestamp": [L1_TIMESTAMP - 1200, L1_TIMESTAMP],
+        }
+    )
+    metrics = inclusion_metrics(commitments(offsets), timeline)
+    assert metrics["dispatch_latency_s"].max() < 0
+    assert (metrics["block_gap"] == -1).all()
+    assert metrics["dispatch_block_gap"].sort().to_list() == [-2, -1, 0, 0, 0]
+
+    bins = sketch_metrics(metrics, ["committer"], PROVIDER_METRICS)
+    quantiles = estimate_quantiles(
+        bins, ["committer"], (0.0, 0.5, 1.0), PROVIDER_METRICS
+    ).row(0, named=True)
+
+    for metric in PROVIDER_METRICS:
+        values = metrics[metric].cast(pl.Float64).sort()
+        assert quantiles[f"{metric}_p0"] <= quantiles[f"{metric}_p50"]
+        assert quantiles[f"{metric}_p50"] <= quantiles[f"{metric}_p100"]
+        for q, expected in ((0, values[0]), (50, values[2]), (100, values[-1])):
+            assert quantiles[f"{metric}_p{q}"] == pytest.approx(
+                expected, rel=RELATIVE_ACCURACY
+            )
+
+
+def test_percentiles_order_values_across_zero():
+    values = [-100.0, -1.5, -0.001, 0.0, 0.0, 0.002, 3.0, 250.0]
+    df = pl.DataFrame(
+        {
+            "date": [datetime(2024, 1, 1)] * len(values),
+            "value": values,
+        }
+    )
+    quantiles = estimate_quantiles(
+        sketch_metrics(df, [], ["value"]),
+        [],
+        [i / (len(values) - 1) for i in range(len(values))],
+        ["value"],
+    ).row(0)
+
+    assert list(quantiles) == pytest.approx(values, rel=RELATIVE_ACCURACY)
@@ -0,0 +1,20 @@
+from telemetry import CycleTelemetry
+
+
+def test_block_range_covers_mev_commit_blocks_only():
+    telemetry = CycleTelemetry()
+    telemetry.add_fetch("commit_stores", 10, 500, 520)
+    telemetry.add_fetch("encrypted_stores", 12, 498, 521)
+    telemetry.add_fetch("commits_processed", 0, 530, 530)
+    telemetry.add_fetch("l1_transactions", 10, 21_000_000, 21_000_004)
+
+    row = telemetry.row()
+    assert row[13:15] == [498, 521]
+    assert '"l1_transactions": [21000000, 21000004]' in row[-1]
+
+
+def test_block_range_is_empty_without_rows():
+    telemetry = CycleTelemetry()
+    telemetry.add_fetch("commit_stores", 0, 500, 500)
+    telemetry.add_fetch("l1_transactions", 3, 21_000_000, 21_000_001)
+    assert telemetry.row()[13:15] == [None, None]
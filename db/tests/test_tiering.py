@@ -0,0 +1,133 @@
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+import duckdb
+import pytest
+import tiering
+from archive import archive_dir, archive_files, read_manifest
+from commitments import commitments_query
+from tiering import compact_archive, tier_cold_data
+
+NOW_MS = int(datetime.now(timezone.utc).timestamp() * 1000)
+# Noon of a day past the 90 day horizon, so both runs archive into one partition
+OLD_MS = int(
+    (datetime.now(timezone.utc) - timedelta(days=100))
+    .replace(hour=12, minute=0, second=0, microsecond=0)
+    .timestamp()
+    * 1000
+)
+
+
+def both_tiers(db_filename):
+    """commitmentIndex of every commitment readers see in DuckDB and the archive."""
+    with duckdb.connect(db_filename, read_only=True) as conn:
+        query = commitments_query(archive_files=archive_files(db_filename))
+        return conn.execute(query).pl()["commitmentIndex"].to_list()
+
+
+def hot_count(db_filename, table):
+    with duckdb.connect(db_filename, read_only=True) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_archive_moves_each_commitment_once(db_filename, add_commitments):
+    add_commitments(db_filename, 0, 6, OLD_MS)
+    add_commitments(db_filename, 6, 4, NOW_MS)
+
+    stats = tier_cold_data(db_filename, 90)
+
+    assert stats == {"rows_archived": 6, "partitions_written": 1, "compacted": 0}
+    for table in ("commit_stores", "encrypted_stores", "commits_processed"):
+        assert hot_count(db_filename, table) == 4
+    assert hot_count(db_filename, "l1_transactions") == 4
+    seen = both_tiers(db_filename)
+    assert len(seen) == len(set(seen)) == 10
+
+    manifest = read_manifest(db_filename)
+    assert manifest["pending"] == []
+    assert manifest["max_blocks"]["commit_stores"] == 1001 + 3 * 5
+    assert manifest["max_blocks"]["l1_transactions"] == 20_000_005
+
+    # Nothing old is left to move
+    assert tier_cold_data(db_filename, 90)["rows_archived"] == 0
+    assert sorted(both_tiers(db_filename)) == sorted(seen)
+
+
+def test_interrupted_run_is_completed(db_filename, add_commitments, monkeypatch):
+    add_commitments(db_filename, 0, 6, OLD_MS)
+    add_commitments(db_filename, 6, 4, NOW_MS)
+
+    # Crash after the files are written and listed as pending, before the deletion
+    def crash(*args):
+        raise RuntimeError("killed")
+
+    monkeypatch.setattr(tiering, "_delete_archived", crash)
+    with pytest.raises(RuntimeError):
+        tier_cold_data(db_filename, 90)
+    monkeypatch.undo()
+
+    assert len(read_manifest(db_filename)["pending"]) == 1
+    assert hot_count(db_filename, "commit_stores") == 10
+    # Pending files are not listed, so the rows still in DuckDB are read once
+    assert archive_files(db_filename) == []
+    assert len(both_tiers(db_filename)) == 10
+
+    stats = tier_cold_data(db_filename, 90)
+    assert stats["rows_archived"] == 0
+    assert read_manifest(db_filename)["pending"] == []
+    assert hot_count(db_filename, "commit_stores") == 4
+    seen = both_tiers(db_filename)
+    assert len(seen) == len(set(seen)) == 10
+
+
+def test_compaction_retires_replaced_files(db_filename, add_commitments):
+    add_commitments(db_filename, 0, 3, OLD_MS)
+    tier_cold_data(db_filename, 90)
+    add_commitments(db_filename, 3, 3, OLD_MS + 60_000)
+
+    # The second run adds a file to the same day, then merges the two
+    assert tier_cold_data(db_filename, 90)["compacted"] == 1
+    manifest = read_manifest(db_filename)
+    (partition,) = manifest["partitions"].values()
+    assert partition["rows"] == 6
+    assert len(partition["files"]) == 1
+    assert len(manifest["retired"]) == 2
+    retired = [
+        os.path.join(archive_dir(db_filename), name) for name in manifest["retired"]
+    ]
+    # Readers that listed the replaced files before the manifest changed can still
+    # read them
+    assert all(os.path.exists(path) for path in retired)
+    seen = both_tiers(db_filename)
+    assert len(seen) == len(set(seen)) == 6
+
+    # The next run removes them
+    assert compact_archive(db_filename) == 0
+    assert read_manifest(db_filename)["retired"] == []
+    assert not any(os.path.exists(path) for path in retired)
+    assert sorted(both_tiers(db_filename)) == sorted(seen)
+
+
+def test_archive_files_skip_partitions_outside_the_ranges(db_filename, add_commitments):
+    add_commitments(db_filename, 0, 3, OLD_MS)
+    add_commitments(db_filename, 3, 3, OLD_MS - 86_400_000)
+    tier_cold_data(db_filename, 90)
+
+    assert len(archive_files(db_filename)) == 2
+    assert len(archive_files(db_filename, {"block_number_l1": (20_000_004, None)})) == 1
+    assert archive_files(db_filename, {"block_number": (None, 1000)}) == []
+
+
+def test_cli_locks_the_database_directory(db_filename, add_commitments):
+    add_commitments(db_filename, 0, 3, OLD_MS)
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(["pipe", "../common"])}
+    env.pop("NETWORK", None)
+    subprocess.run(
+        [sys.executable, "pipe/tiering.py", "--db", db_filename],
+        cwd=os.path.dirname(os.path.dirname(__file__)),
+        env=env,
+        check=True,
+    )
+    assert os.path.exists(os.path.join(os.path.dirname(db_filename), "duckdb_lock"))
+    assert hot_count(db_filename, "commit_stores") == 0
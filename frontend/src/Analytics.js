@@ -19,6 +19,92 @@ const formatDate = (dateString) => {
   return `${date.getMonth() + 1}/${date.getDate()}`;
 };
 
+const LEADERBOARD_METRICS = {
+  preconf_count: 'Preconfs',
+  total_bid: 'Total Bid',
+  total_decayed_bid: 'Total Bid (Decayed)',
+  slash_rate: 'Slash Rate',
+};
+
+// Top bidders or providers over a sliding window, served from the pipeline's buckets
+function Leaderboard({ role }) {
+  const [entries, setEntries] = useState([]);
+  const [timeWindow, setTimeWindow] = useState('24h');
+  const [metric, setMetric] = useState('total_bid');
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    const fetchLeaderboard = async () => {
+      setError(null);
+      try {
+        const params = new URLSearchParams({ window: timeWindow, metric, limit: 10 });
+        const response = await fetch(`${API_BASE_URL}/leaderboards/${role}s?${params.toString()}`);
+        if (!response.ok) {
+          throw new Error(`Error: ${response.status} ${response.statusText}`);
+        }
+        const data = await response.json();
+        setEntries(data.entries);
+      } catch (err) {
+        setError(err.message);
+      }
+    };
+    fetchLeaderboard();
+  }, [role, timeWindow, metric]);
+
+  return (
+    <div className="leaderboard">
+      <h2>Top {role === 'bidder' ? 'Bidders' : 'Providers'}</h2>
+      <div className="controls">
+        <label htmlFor={`${role}-window`}>Window:</label>
+        <select id={`${role}-window`} value={timeWindow} onChange={(e) => setTimeWindow(e.target.value)}>
+          <option value="1h">1 Hour</option>
+          <option value="24h">24 Hours</option>
+          <option value="7d">7 Days</option>
+          <option value="30d">30 Days</option>
+        </select>
+
+        <label htmlFor={`${role}-metric`}>Rank by:</label>
+        <select id={`${role}-metric`} value={metric} onChange={(e) => setMetric(e.target.value)}>
+          {Object.entries(LEADERBOARD_METRICS).map(([value, label]) => (
+            <option key={value} value={value}>
+              {label}
+            </option>
+          ))}
+        </select>
+      </div>
+
+      {error && <p style={{ color: 'red' }}>{error}</p>}
+      {!error && entries.length === 0 && <p>No data available.</p>}
+      {!error && entries.length > 0 && (
+        <table className="leaderboard-table">
+          <thead>
+            <tr>
+              <th>#</th>
+              <th>Address</th>
+              <th>Preconfs</th>
+              <th>Total Bid</th>
+              <th>Total Bid (Decayed)</th>
+              <th>Slash Rate</th>
+            </tr>
+          </thead>
+          <tbody>
+            {entries.map((entry) => (
+              <tr key={entry.address}>
+                <td>{entry.rank}</td>
+                <td className="address">{entry.address}</td>
+                <td>{entry.preconf_count.toLocaleString()}</td>
+                <td>{entry.total_bid.toFixed(4)} ETH</td>
+                <td>{entry.total_decayed_bid === null ? '-' : `${entry.total_decayed_bid.toFixed(4)} ETH`}</td>
+                <td>{(entry.slash_rate * 100).toFixed(2)}%</td>
+              </tr>
+            ))}
+          </tbody>
+        </table>
+      )}
+    </div>
+  );
+}
+
 function Analytics() {
   const [aggregations, setAggregations] = useState([]);
   const [bidders, setBidders] = useState('');  // For multiple bidders
@@ -179,6 +265,8 @@ function Analytics() {
         </div>
       )}
 
+      {activeTab === 'provider' && <Leaderboard role="provider" />}
+
       {activeTab === 'bidder' && (
         <div>
           <h2>Bidder Preconf Bid Volume</h2>
@@ -239,6 +327,8 @@ function Analytics() {
           )}
         </div>
       )}
+
+      {activeTab === 'bidder' && <Leaderboard role="bidder" />}
     </div>
   );
 }
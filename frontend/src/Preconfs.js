@@ -13,12 +13,81 @@ function Preconfs() {
   const [isSearching, setIsSearching] = useState(false);
   const [currentPage, setCurrentPage] = useState(1); // Current page number
   const [totalPages, setTotalPages] = useState(1); // Total number of pages
+  const [suggestions, setSuggestions] = useState([]); // Prefix matches grouped by field
+  const [blockSummary, setBlockSummary] = useState(null); // Totals of the searched L1 block
 
   useEffect(() => {
     fetchPreconfs();
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [currentPage, searchQuery]); // Re-fetch when currentPage or searchQuery changes
 
+  // Show the totals of the L1 block when a block number is searched
+  useEffect(() => {
+    const trimmedQuery = searchQuery.trim();
+    if (!/^\d+$/.test(trimmedQuery)) {
+      setBlockSummary(null);
+      return;
+    }
+    const controller = new AbortController();
+    fetch(`${API_BASE_URL}/blocks/${trimmedQuery}`, { signal: controller.signal })
+      .then((response) => (response.ok ? response.json() : null))
+      .then(setBlockSummary)
+      .catch(() => {});
+    return () => controller.abort();
+  }, [searchQuery]);
+
+  // Suggest hashes and addresses while a partial hex prefix is typed
+  useEffect(() => {
+    const trimmedQuery = searchQuery.trim();
+    const isPrefix = /^(0x)?[a-fA-F0-9]{6,}$/.test(trimmedQuery) && !/^0x[a-fA-F0-9]{64}$/.test(trimmedQuery);
+    if (!isPrefix) {
+      setSuggestions([]);
+      return;
+    }
+
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const queryParams = new URLSearchParams({ q: trimmedQuery, limit: 5 });
+        const response = await fetch(`${API_BASE_URL}/search?${queryParams.toString()}`, {
+          signal: controller.signal,
+        });
+        if (response.ok) {
+          const data = await response.json();
+          setSuggestions(data.groups);
+        }
+      } catch (err) {
+        if (err.name !== "AbortError") setSuggestions([]);
+      }
+    }, 200);
+
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [searchQuery]);
+
+  // Keep the first page live: new preconfs are pushed by the backend after every ingest cycle
+  useEffect(() => {
+    if (currentPage !== 1 || searchQuery.trim() !== "") return;
+
+    const source = new EventSource(`${API_BASE_URL}/preconfs/stream`);
+    source.addEventListener("preconfs", (event) => {
+      const newPreconfs = JSON.parse(event.data);
+      setPreconfs((current) => {
+        const seen = new Set(newPreconfs.map((preconf) => preconf.commitmentIndex));
+        const merged = [...newPreconfs, ...current.filter((preconf) => !seen.has(preconf.commitmentIndex))];
+        merged.sort((a, b) => b.inc_block_number - a.inc_block_number);
+        return merged.slice(0, PRECONFS_PER_PAGE);
+      });
+    });
+    // We fell behind the stream, so reload the page to resynchronize
+    source.addEventListener("lagged", () => fetchPreconfs());
+
+    return () => source.close();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [currentPage, searchQuery]);
+
   const fetchPreconfs = async (params = {}) => {
     setLoading(true);
     setError(null);
@@ -88,6 +157,11 @@ function Preconfs() {
     const isHash = /^0x[a-fA-F0-9]{64}$/.test(trimmedQuery);
     const isBlockNumber = /^\d+$/.test(trimmedQuery);
 
+    if (!isHash && suggestions.length > 0) {
+      // Partial hashes and addresses are answered by the suggestions
+      return;
+    }
+
     if (isHash || isBlockNumber) {
       // fetchPreconfs is already called via useEffect due to searchQuery change
       // No need to call it here
@@ -133,7 +207,7 @@ function Preconfs() {
       <form onSubmit={handleSearchSubmit} className="search-form">
         <input
           type="text"
-          placeholder="Search by Preconf Bid Hash or L1 Block Number"
+          placeholder="Search by Preconf Bid Hash (or a prefix of any hash or address) or L1 Block Number"
           value={searchQuery}
           onChange={(e) => setSearchQuery(e.target.value)}
           className="search-input"
@@ -154,8 +228,67 @@ function Preconfs() {
           </button>
         )}
       </form>
+      {suggestions.length > 0 && (
+        <div className="search-suggestions">
+          {suggestions.map((group) => (
+            <div key={group.entity} className="suggestion-group">
+              <p className="suggestion-entity">
+                {group.entity} ({group.total})
+              </p>
+              {group.results.map((result) => (
+                <button
+                  type="button"
+                  key={result.key}
+                  className="suggestion"
+                  disabled={!result.bidHash}
+                  onClick={() => setSearchQuery(result.bidHash)}
+                >
+                  <span className="suggestion-key">{result.key}</span>
+                  <span className="suggestion-meta">
+                    {result.bidHash
+                      ? `L1 block ${result.inc_block_number}`
+                      : `${result.preconf_count} preconfs, last in L1 block ${result.inc_block_number}`}
+                  </span>
+                </button>
+              ))}
+            </div>
+          ))}
+        </div>
+      )}
       {loading && <p>Loading...</p>}
       {error && <p className="error-message">{error}</p>}
+      {!loading && !error && blockSummary && (
+        <div className="preconf-card block-summary">
+          <div className="preconf-content">
+            <div className="preconf-left">
+              <div>
+                <strong>L1 Block:</strong> {blockSummary.block_number_l1}
+              </div>
+              <div>
+                <strong>Builder:</strong> {blockSummary.builder_graffiti}
+              </div>
+              <div>
+                <strong>Preconfs:</strong> {blockSummary.preconf_count} ({blockSummary.txn_count} txns,{" "}
+                {blockSummary.slash_count} slashed)
+              </div>
+            </div>
+            <div className="preconf-right">
+              <div>
+                <strong>Total Bid:</strong> {parseFloat(blockSummary.total_bid_eth).toFixed(5)} ETH
+              </div>
+              <div>
+                <strong>Decayed Bid:</strong> {parseFloat(blockSummary.total_decayed_bid_eth).toFixed(5)} ETH
+              </div>
+              <div>
+                <strong>Base Fee:</strong> {blockSummary.base_fee_per_gas_l1} Gwei
+              </div>
+              <div>
+                <strong>Gas Used:</strong> {blockSummary.gas_used_block_l1}
+              </div>
+            </div>
+          </div>
+        </div>
+      )}
       {!loading && !error && preconfs.length === 0 && <p>No results found.</p>}
       {!loading && !error && preconfs.length > 0 && (
         <>